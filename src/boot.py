@@ -0,0 +1,17 @@
+"""
+Runs once after reset, before USB starts
+
+Holding the button during reset makes the flash writable for the game, so
+it can record a session (src/session.py). The computer then sees the
+CIRCUITPY drive as read-only until the next normal reset.
+"""
+import board
+import digitalio
+import storage
+
+button = digitalio.DigitalInOut(board.D1)
+button.direction = digitalio.Direction.INPUT
+button.pull = digitalio.Pull.UP
+if not button.value:  # Pressed = pulled low
+    storage.remount("/", readonly=False)
+button.deinit()
@@ -0,0 +1,44 @@
+"""
+Warm-restart memory in NVM
+
+One NVM byte says "this unit booted recently". It is set once the boot
+animation has finished (or was skipped) and cleared after WARM_WINDOW seconds
+of uptime, so a power cycle shortly after a boot goes straight to the splash
+screen while a unit that has been running a while plays the animation again.
+That is two NVM writes per session at most.
+
+Without microcontroller.nvm (e.g. on a host) every boot is a cold boot.
+"""
+
+NVM_BOOT_FLAG = 0  # NVM offset of the flag byte
+WARM_WINDOW = 300  # Seconds of uptime after which the next boot is cold again
+
+_WARM = 0xA5
+
+
+def _nvm():
+    try:
+        import microcontroller
+        return microcontroller.nvm
+    except (ImportError, AttributeError):
+        return None
+
+
+def recently_booted():
+    """True if the last boot was less than WARM_WINDOW seconds of uptime ago"""
+    nvm = _nvm()
+    return nvm is not None and nvm[NVM_BOOT_FLAG] == _WARM
+
+
+def mark_booted():
+    """Remember this boot (no write if the flag is already set)"""
+    nvm = _nvm()
+    if nvm is not None and nvm[NVM_BOOT_FLAG] != _WARM:
+        nvm[NVM_BOOT_FLAG] = _WARM
+
+
+def forget_boot():
+    """Make the next boot a cold one (no write if the flag is already clear)"""
+    nvm = _nvm()
+    if nvm is not None and nvm[NVM_BOOT_FLAG] == _WARM:
+        nvm[NVM_BOOT_FLAG] = 0
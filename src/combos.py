@@ -0,0 +1,89 @@
+"""
+Action sequences for combo levels
+
+A level asks for a sequence of actions (integer ids from inputbus): a single
+action, a combo like TAP, TAP, SHAKE, a repeat like ROTATE x3, or a timed
+combo whose steps must follow each other within a window. Sequences are
+compiled once at import: step ids in a bytes object and the HUD text for
+every step, so matching an input event is one integer compare and the game
+never builds strings while a level runs.
+
+The matcher only ever waits for one action (expected), so the game only has
+to poll the detector of the current step.
+"""
+from inputbus import ACTION_NAMES, ROTATE, BUTTON, TAP, SHAKE
+
+
+class Sequence:
+    """A compiled action sequence"""
+
+    def __init__(self, steps, window=None):
+        self.steps = bytes(steps)
+        self.window = window  # Max seconds between steps, None = untimed
+        self.labels = tuple(self._label(self.steps[i:]) for i in range(len(self.steps)))
+
+    def _label(self, steps):
+        # HUD text for the remaining steps, e.g. "TAP,SHAKE" or "ROTATE x3"
+        first = steps[0]
+        if len(steps) > 1 and all(step == first for step in steps):
+            text = f"{ACTION_NAMES[first]} x{len(steps)}"
+        else:
+            text = ",".join(ACTION_NAMES[step] for step in steps)
+        if self.window is not None and len(steps) > 1:
+            text += " FAST"
+        return text
+
+    def __len__(self):
+        return len(self.steps)
+
+
+# One single-action sequence per action id
+SINGLES = tuple(Sequence((action,)) for action in (ROTATE, BUTTON, TAP, SHAKE))
+
+# Combo levels
+COMBOS = (
+    Sequence((TAP, TAP, SHAKE)),
+    Sequence((ROTATE, ROTATE, ROTATE)),
+    Sequence((BUTTON, TAP)),
+    Sequence((ROTATE, BUTTON)),
+    Sequence((TAP, TAP), window=0.8),
+    Sequence((BUTTON, BUTTON, BUTTON), window=0.6),
+)
+
+
+class SequenceMatcher:
+    """State machine over one sequence: which step is next, and when the last one happened"""
+
+    def __init__(self):
+        self.sequence = SINGLES[0]
+        self.index = 0
+        self.last_time = 0
+        self.expected = self.sequence.steps[0]
+
+    def start(self, sequence):
+        self.sequence = sequence
+        self.index = 0
+        self.expected = sequence.steps[0]
+
+    def expire(self, now):
+        """Timed combos: start over if the window since the last step ran out"""
+        window = self.sequence.window
+        if self.index and window is not None and now - self.last_time > window:
+            self.index = 0
+            self.expected = self.sequence.steps[0]
+            return True
+        return False
+
+    def advance(self, now):
+        """The expected action happened; returns True when the sequence is complete"""
+        self.index += 1
+        self.last_time = now
+        if self.index == len(self.sequence.steps):
+            return True
+        self.expected = self.sequence.steps[self.index]
+        return False
+
+    @property
+    def label(self):
+        """HUD text for the remaining steps"""
+        return self.sequence.labels[min(self.index, len(self.sequence.steps) - 1)]
@@ -0,0 +1,100 @@
+"""
+Level time limits
+
+EASY/NORMAL/HARD use the fixed formula: a base time per difficulty minus
+0.3 s per level, never below 1.5 s, plus EXTRA_STEP_TIME for every further
+step of a combo.
+
+ADAPTIVE fits the deadline to the player. For every action it keeps an
+exponentially weighted mean and variance of the player's reaction time
+(prompt to detection) and sets the deadline to a percentile of that
+distribution (normal approximation): the 95th percentile on level 1,
+tightening to the 75th on the last level. A timeout counts as a slow
+sample, so a struggling player gets more time on the next prompt.
+
+The game computes each level's limit once, in start_level().
+"""
+from array import array
+
+# Fixed modes (index = difficulty)
+BASE_TIMES = (8, 6, 4)  # EASY, NORMAL, HARD
+LEVEL_PENALTY = 0.3  # Seconds less per level
+MIN_TIME = 1.5
+EXTRA_STEP_TIME = 1.0  # Seconds added per further step of a combo
+
+ADAPTIVE = 3  # Difficulty index of the adaptive mode
+
+# Adaptive model
+ALPHA = 0.3  # Weight of the newest reaction time
+PRIOR_MEAN = 1.5  # Seconds, before the player has done an action
+PRIOR_STD = 0.5
+Z_FIRST = 1.645  # 95th percentile on the first level
+Z_LAST = 0.674  # 75th percentile on the last level
+ADAPTIVE_MIN = 0.8  # Seconds
+ADAPTIVE_MAX = 8.0
+TIMEOUT_PENALTY = 1.25  # A timeout counts as a reaction this much slower than the limit
+
+
+def fixed_time_limit(difficulty, level):
+    """Time limit of the fixed EASY/NORMAL/HARD modes"""
+    return max(BASE_TIMES[difficulty] - (level - 1) * LEVEL_PENALTY, MIN_TIME)
+
+
+class ReactionModel:
+    """Exponentially weighted mean/variance of reaction time per action"""
+
+    def __init__(self, actions=4, alpha=ALPHA):
+        self.alpha = alpha
+        self.mean = array("f", [PRIOR_MEAN] * actions)
+        self.variance = array("f", [PRIOR_STD * PRIOR_STD] * actions)
+        self.samples = array("H", [0] * actions)
+
+    def seed(self, action, mean):
+        """Start from a known average (e.g. saved statistics) instead of the prior"""
+        self.mean[action] = mean
+
+    def update(self, action, seconds):
+        alpha = self.alpha
+        delta = seconds - self.mean[action]
+        self.mean[action] += alpha * delta
+        # EW variance (West's incremental form)
+        self.variance[action] = (1 - alpha) * (self.variance[action] + alpha * delta * delta)
+        if self.samples[action] < 0xFFFF:
+            self.samples[action] += 1
+
+    def quantile(self, action, z):
+        return self.mean[action] + z * self.variance[action] ** 0.5
+
+
+class DifficultyEngine:
+    """Time limit per level for the fixed modes and the adaptive one"""
+
+    def __init__(self, levels=10, actions=4):
+        self.levels = levels
+        self.model = ReactionModel(actions)
+
+    def time_limit(self, difficulty, level, action):
+        """Deadline in seconds for one level"""
+        if difficulty != ADAPTIVE:
+            return fixed_time_limit(difficulty, level)
+        progress = (level - 1) / (self.levels - 1) if self.levels > 1 else 0
+        z = Z_FIRST + (Z_LAST - Z_FIRST) * progress
+        return min(max(self.model.quantile(action, z), ADAPTIVE_MIN), ADAPTIVE_MAX)
+
+    def sequence_limit(self, difficulty, level, steps):
+        """Deadline for a sequence of action ids (a combo gets time for every step)"""
+        limit = self.time_limit(difficulty, level, steps[0])
+        for action in steps[1:]:
+            if difficulty == ADAPTIVE:
+                limit += self.time_limit(difficulty, level, action)
+            else:
+                limit += EXTRA_STEP_TIME
+        return limit
+
+    def record(self, action, seconds):
+        """The player completed an action seconds after the prompt"""
+        self.model.update(action, seconds)
+
+    def record_timeout(self, action, limit):
+        """The player did not make it within limit seconds"""
+        self.model.update(action, limit * TIMEOUT_PENALTY)
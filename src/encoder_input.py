@@ -0,0 +1,151 @@
+"""
+Rotary encoder input without lost detents
+
+Counting happens outside the Python loop:
+- rotaryio.IncrementalEncoder where the port has it (hardware counter)
+- otherwise keypad.Keys scans both encoder pins in the background and queues
+  every edge with its timestamp; update() decodes the queued edges
+
+Each detent becomes a (timestamp, direction) event in a fixed-size queue.
+Without pins the queue is fed with push() only (session replay), and a
+listener sees every raw detent before the filter (session recording).
+Debounce is a filter over that stream: a reversal within debounce_ms of the
+previous detent is contact bounce and is dropped; detents in the same
+direction are never dropped, however fast the knob turns.
+"""
+from array import array
+
+QUEUE_SIZE = 32
+_STEP_MAX = 127  # array('b') slot; a folded event saturates here
+
+# supervisor.ticks_ms() / keypad timestamps wrap at 2**29
+_TICKS_PERIOD = 1 << 29
+_TICKS_MAX = _TICKS_PERIOD - 1
+_TICKS_HALFPERIOD = _TICKS_PERIOD // 2
+
+# Quadrature steps indexed by old_state * 4 + new_state, state = A << 1 | B
+# (1 = pin high). Clockwise from the detent: 11 -> 01 -> 00 -> 10 -> 11
+_STEPS = (0, -1, 1, 0,
+          1, 0, 0, -1,
+          -1, 0, 0, 1,
+          0, 1, -1, 0)
+_REST = 0b11  # Both pins high (pulled up) at a detent
+
+
+def ticks_diff(ticks1, ticks2):
+    """Signed difference of two wrapping millisecond tick values"""
+    diff = (ticks1 - ticks2) & _TICKS_MAX
+    return ((diff + _TICKS_HALFPERIOD) & _TICKS_MAX) - _TICKS_HALFPERIOD
+
+
+class EncoderInput:
+    """Queue of timestamped detents from a quadrature encoder"""
+
+    def __init__(self, pin_a, pin_b, debounce_ms=80, use_rotaryio=True):
+        self.debounce_ms = debounce_ms
+        self.position = 0  # Net detents that passed the filter
+        self.events_total = 0  # Detents decoded
+        self.events_filtered = 0  # Detents dropped as bounce
+        self._times = array("l", [0] * QUEUE_SIZE)
+        self._steps = array("b", [0] * QUEUE_SIZE)
+        self._head = 0
+        self._count = 0
+        self._last_time = None
+        self._last_step = 0
+        self.timestamp = 0  # Time of the last event returned by pop()
+        self.listener = None  # Called with (timestamp, step) for every raw detent
+
+        self._counter = None
+        self._keys = None
+        if pin_a is None:
+            return  # Fed with push() only
+        if use_rotaryio:
+            try:
+                import rotaryio
+                self._counter = rotaryio.IncrementalEncoder(pin_a, pin_b, divisor=4)
+                self._count_seen = self._counter.position
+                import supervisor
+                self._ticks_ms = supervisor.ticks_ms
+            except (ImportError, NotImplementedError, ValueError, RuntimeError):
+                self._counter = None
+        if self._counter is None:
+            import keypad
+            self._keys = keypad.Keys((pin_a, pin_b), value_when_pressed=False, pull=True,
+                                     interval=0.001, max_events=64)
+            self._event = keypad.Event()
+            self._state = _REST
+            self._partial = 0
+
+    def push(self, timestamp, step):
+        """Queue a raw detent (ticks in ms); pop() applies the bounce filter"""
+        if self.listener is not None:
+            self.listener(timestamp, step)
+        self.events_total += 1
+        if self._count == QUEUE_SIZE:
+            # Full: fold into the newest event so no detent is lost (until
+            # the slot saturates; opposite detents may cancel it out to 0)
+            newest = (self._head + self._count - 1) % QUEUE_SIZE
+            folded = self._steps[newest] + step
+            self._steps[newest] = max(-_STEP_MAX, min(_STEP_MAX, folded))
+            return
+        tail = (self._head + self._count) % QUEUE_SIZE
+        self._times[tail] = timestamp
+        self._steps[tail] = step
+        self._count += 1
+
+    def update(self):
+        """Move new detents from the counter / edge queue into the event queue"""
+        if self._counter is not None:
+            position = self._counter.position
+            delta = position - self._count_seen
+            if delta:
+                self._count_seen = position
+                now = self._ticks_ms()
+                step = 1 if delta > 0 else -1
+                for _ in range(abs(delta)):
+                    self.push(now, step)
+            return
+        if self._keys is None:
+            return
+
+        event = self._event
+        events = self._keys.events
+        while events.get_into(event):
+            # Pressed = pulled low
+            bit = 2 if event.key_number == 0 else 1
+            if event.pressed:
+                state = self._state & ~bit
+            else:
+                state = self._state | bit
+            self._partial += _STEPS[self._state * 4 + state]
+            self._state = state
+            if state == _REST:
+                # Back at a detent: count it if we got at least half way round
+                if self._partial >= 2:
+                    self.push(event.timestamp, 1)
+                elif self._partial <= -2:
+                    self.push(event.timestamp, -1)
+                self._partial = 0
+
+    def pop(self):
+        """Return the next detent (+1/-1) that passes the filter, or 0"""
+        while self._count:
+            head = self._head
+            timestamp = self._times[head]
+            step = self._steps[head]
+            self._head = (head + 1) % QUEUE_SIZE
+            self._count -= 1
+            if not step:
+                continue  # Folded detents that cancelled out
+            direction = 1 if step > 0 else -1
+            if (self._last_time is not None and direction != self._last_step
+                    and ticks_diff(timestamp, self._last_time) < self.debounce_ms):
+                # Quick reversal: contact bounce
+                self.events_filtered += 1
+                continue
+            self._last_time = timestamp
+            self._last_step = direction
+            self.timestamp = timestamp
+            self.position += step
+            return step
+        return 0
@@ -0,0 +1,155 @@
+"""
+Debug log as a ring buffer of compact records
+
+print() with an f-string on the game path formats a string and then blocks
+until USB CDC has taken it. Instead, the game records (time, level, event
+id, three ints) into preallocated arrays; nothing is formatted on the
+device. drain() prints the raw records as short lines and is only called
+when the game is idle:
+
+    #<ms>,<level>,<event>,<a>,<b>,<c>
+
+tools/logdecode.py turns those lines back into the messages below.
+
+Release builds: compiled with mpy-cross -O1 (__debug__ is False) the
+buffers are not allocated and every logging call is an empty function.
+"""
+from array import array
+
+# Levels
+DEBUG = 0
+INFO = 1
+WARN = 2
+ERROR = 3
+LEVEL_NAMES = ("DEBUG", "INFO", "WARN", "ERROR")
+
+# Event ids
+LEVEL_START = 0
+ACTION_DETECTED = 1
+LEVEL_PASSED = 2
+LEVEL_TIMEOUT = 3
+STATE_CHANGE = 4
+DIFFICULTY_SELECTED = 5
+GAME_STARTED = 6
+NEXT_LEVEL = 7
+GAME_WON = 8
+GAME_RESTARTED = 9
+MENU_RETURN = 10
+HIGH_SCORE = 11
+
+# Message per event id: (text, how to show each argument) - used by the host decoder
+# Argument kinds: "int", "tenths" (value / 10), "action", "difficulty", "state"
+MESSAGES = (
+    ("Level %d: %s, Time limit: %.1fs", ("int", "action", "tenths")),
+    ("%s detected!", ("action",)),
+    ("Level %d passed! Score: %d", ("int", "int")),
+    ("Level failed - timeout", ()),
+    ("State changed: %s -> %s", ("state", "state")),
+    ("Difficulty selected: %s", ("difficulty",)),
+    ("Game started: %s", ("difficulty",)),
+    ("Starting level %d", ("int",)),
+    ("All levels completed! Final score: %d/100", ("int",)),
+    ("Game restarted", ()),
+    ("Returned to menu", ()),
+    ("New high score #%d: %d", ("int", "int")),
+)
+
+# Names for the lookup argument kinds (same order as in code.py / inputbus.py)
+ARGUMENT_NAMES = {
+    "action": ("ROTATE", "BUTTON", "TAP", "SHAKE"),
+    "difficulty": ("EASY", "NORMAL", "HARD", "ADAPTIVE"),
+    "state": ("BOOT_ANIMATION", "SPLASH", "DIFFICULTY_SELECT", "GAME_PLAY", "GAME_RESULT", "STATS"),
+}
+STATE_OFFSET = 1  # STATE_BOOT_ANIMATION is -1
+
+
+def format_record(event, a=0, b=0, c=0):
+    """Message text of one record"""
+    text, kinds = MESSAGES[event]
+    values = []
+    for kind, value in zip(kinds, (a, b, c)):
+        if kind == "tenths":
+            values.append(value / 10)
+        elif kind == "state":
+            values.append(ARGUMENT_NAMES[kind][value + STATE_OFFSET])
+        elif kind in ARGUMENT_NAMES:
+            values.append(ARGUMENT_NAMES[kind][value])
+        else:
+            values.append(value)
+    return text % tuple(values)
+
+
+class EventLog:
+    """Preallocated ring buffer of (ms, level, event, a, b, c) records"""
+
+    def __init__(self, clock, size=64, level=INFO):
+        self.clock = clock  # Module with monotonic() (the game's time)
+        self.size = size
+        self.level = level  # Records below this level are ignored
+        self.dropped = 0  # Records overwritten before they were drained
+        self._head = 0
+        self._count = 0
+        if not __debug__:
+            return
+        self._times = array("l", [0] * size)
+        self._levels = array("B", [0] * size)
+        self._events = array("B", [0] * size)
+        self._args = array("l", [0] * (3 * size))
+
+    def record(self, level, event, a=0, b=0, c=0):
+        """Store one record; the oldest is overwritten when the buffer is full"""
+        if level < self.level:
+            return
+        if self._count == self.size:
+            self._head = (self._head + 1) % self.size
+            self._count -= 1
+            self.dropped += 1
+        tail = (self._head + self._count) % self.size
+        self._times[tail] = int(self.clock.monotonic() * 1000)
+        self._levels[tail] = level
+        self._events[tail] = event
+        args = self._args
+        args[3 * tail] = a
+        args[3 * tail + 1] = b
+        args[3 * tail + 2] = c
+        self._count += 1
+
+    def debug(self, event, a=0, b=0, c=0):
+        self.record(DEBUG, event, a, b, c)
+
+    def info(self, event, a=0, b=0, c=0):
+        self.record(INFO, event, a, b, c)
+
+    def warn(self, event, a=0, b=0, c=0):
+        self.record(WARN, event, a, b, c)
+
+    def error(self, event, a=0, b=0, c=0):
+        self.record(ERROR, event, a, b, c)
+
+    def pending(self):
+        return self._count
+
+    def drain(self, limit=8):
+        """Print up to limit records as raw lines; returns how many were printed"""
+        printed = 0
+        while self._count and printed < limit:
+            head = self._head
+            args = self._args
+            print(f"#{self._times[head]},{self._levels[head]},{self._events[head]},"
+                  f"{args[3 * head]},{args[3 * head + 1]},{args[3 * head + 2]}")
+            self._head = (head + 1) % self.size
+            self._count -= 1
+            printed += 1
+        if self.dropped and not self._count:
+            print(f"#dropped,{self.dropped}")
+            self.dropped = 0
+        return printed
+
+
+if not __debug__:
+    # Release build: logging compiles down to empty calls
+    def _nothing(self, *args):
+        return 0
+
+    EventLog.record = EventLog.debug = EventLog.info = EventLog.warn = EventLog.error = _nothing
+    EventLog.drain = EventLog.pending = _nothing
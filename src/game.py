@@ -0,0 +1,512 @@
+"""
+Game state machine and tasks
+
+code.py imports this module and runs main(). Screens live in screens.py,
+input sampling in inputs.py and shake detection in shake.py; this module
+holds the game state and the cooperative tasks that drive it.
+"""
+import time
+boot_start_ns = time.monotonic_ns()  # code.py overwrites this with its own, earlier, start time
+import asyncio
+from random import choice, random, seed
+import membudget
+import hardware
+import bootstate
+from render import Renderer
+import inputbus
+import profiler
+from leds import LedEngine, RED, GREEN, BLUE, YELLOW, PURPLE, CYAN, PINK
+import sound
+from difficulty import DifficultyEngine
+import combos
+import eventlog
+import scores
+import session
+import screens
+import shake
+from inputs import Inputs
+
+membudget.stage("imports")
+
+# Initialize hardware (board, or a simulator backend installed by the host)
+hw = hardware.get_backend()
+
+# Session capture for regression tests (session.MODE, see src/session.py):
+# record the RNG seed and every raw input, or replay a recorded session
+session_recorder = None
+session_player = None
+if session.MODE == "record":
+    session_recorder = session.SessionRecorder(session.PATH, time)
+    hw = session.RecordingBackend(hw, session_recorder)
+elif session.MODE == "replay":
+    session_player = session.SessionPlayer(session.PATH, time)
+    hw = session.ReplayBackend(hw, session_player)
+
+# Warm restart skips the boot animation (a replay takes the recorded flag)
+warm_boot = bootstate.recently_booted()
+i2c = hw.i2c
+bus = hw.bus  # Shared I2C bus: the accelerometer is served around every display push
+display = hw.display
+pixels = hw.pixels
+
+# All screen changes go through the renderer (explicit, FPS-capped refreshes)
+renderer = Renderer(display, fps=20, bus=bus)
+
+membudget.stage("hardware")
+
+boot_imports_ns = time.monotonic_ns()
+boot_first_frame_ns = 0
+
+# ==================== 游戏状态定义 ====================
+
+# Game states
+STATE_BOOT_ANIMATION = -1  # Boot animation state
+STATE_SPLASH = 0
+STATE_DIFFICULTY_SELECT = 1
+STATE_GAME_PLAY = 2
+STATE_GAME_RESULT = 3
+STATE_STATS = 4  # High scores (rotate on the splash screen)
+
+current_state = STATE_BOOT_ANIMATION
+selected_difficulty = 0
+difficulties = screens.DIFFICULTIES  # ADAPTIVE: deadlines follow the player's reaction times
+
+# Game variables
+current_level = 1
+total_levels = 10
+score = 0
+time_remaining = 0
+time_limit = 0  # Deadline of the current level, computed once in start_level()
+game_start_time = 0
+current_action = inputbus.ROTATE  # Action id of the current step (names: inputbus.ACTION_NAMES)
+actions = (inputbus.ROTATE, inputbus.BUTTON, inputbus.TAP, inputbus.SHAKE)
+sequence_matcher = combos.SequenceMatcher()  # Steps of the current level
+COMBO_FIRST_LEVEL = 4  # Combo levels can appear from this level on
+COMBO_CHANCE = 0.35
+action_completed = False
+level_passed = False
+
+# Result screen debounce
+result_screen_start_time = 0
+
+# High scores and play statistics: updated in RAM, written to NVM at the result screen
+score_store = scores.ScoreStore(persist=session_player is None)
+
+# Level deadlines; the reaction-time model starts from the saved averages
+difficulty_engine = DifficultyEngine(total_levels, len(actions))
+for kind in range(len(actions)):
+    saved = score_store.average_reaction_ms(None, kind)
+    if saved:
+        difficulty_engine.model.seed(kind, saved / 1000)
+
+# Encoder position the game has acted on (the input task counts detents in inputs.encoder_position)
+last_encoder_position = 0
+
+# Shake: filtered tilt beyond shake_threshold degrees, held for shake_duration seconds.
+# Defaults 30 deg / 0.2 s / 5 samples; /shake.json (tools/calibrate_shake.py) overrides them
+shake_threshold, shake_duration, shake_window = shake.load_config(threshold=30, duration=0.2, window=5)
+shake_detector = shake.ShakeDetector(shake_threshold, shake_duration, shake_window)
+
+# Timestamped input events for check_action(), with reaction-time histograms
+input_bus = inputbus.InputBus()
+
+# Task periods (seconds) for the cooperative scheduler
+INPUT_INTERVAL = 0.005   # Encoder/button sampling
+GAME_INTERVAL = 0.01     # Game logic tick
+RENDER_INTERVAL = 0.01   # Render checks (the renderer caps actual refreshes at its FPS)
+LED_INTERVAL = 0.01      # NeoPixel updates
+
+# Profiling: section timers and loop jitter, streamed as CSV telemetry over USB serial.
+# Type "p" on the serial console to switch it on/off (tools/telemetry.py parses the log)
+PROFILE_ON_BOOT = False
+PROFILE_REPORT_INTERVAL = 2.0  # Seconds per telemetry window
+perf = profiler.Profiler(GAME_INTERVAL, enabled=PROFILE_ON_BOOT)
+bus.set_enabled(PROFILE_ON_BOOT)  # I2C utilisation and sensor waits, in the same windows
+
+def set_profiling(enabled):
+    perf.set_enabled(enabled)
+    bus.set_enabled(enabled)
+
+# Game events are logged as compact records and printed only while the game
+# is idle (tools/logdecode.py formats them); print() can block on USB serial
+event_log = eventlog.EventLog(time)
+LOG_INTERVAL = 0.05  # Idle drain period
+
+# LED effects are keyframe schedules ticked by led_task(); the strip is only
+# written (and show() only called) when the frame actually changes
+leds = LedEngine(pixels)
+
+# Beeps and feedback tones, rendered once and played by DMA (play() never blocks)
+sounds = sound.SoundEngine(hw.audio)
+
+# Encoder, button and accelerometer, sampled by the input task
+inputs = Inputs(hw, input_bus, shake_detector, bus, perf)
+screens.setup(renderer, leds, sounds, score_store)
+
+membudget.stage("game")
+
+def set_leds(color):
+    """Request a solid LED color (shown on the next led_task tick)"""
+    leds.set(color)
+
+def get_time_limit(difficulty, level, steps):
+    """Get time limit based on difficulty (index), level and the level's action ids"""
+    return difficulty_engine.sequence_limit(difficulty, level, steps)
+
+game_hud = None
+
+def create_game_screen():
+    """Game screen with the current level's values (built once, reused for every level)"""
+    global game_hud
+    game_hud = screens.create_game_screen(total_levels)
+    update_game_screen()
+    return game_hud.group
+
+def update_game_screen():
+    """Push current game values to the HUD - only changed labels are redrawn"""
+    game_hud.set_level(current_level)
+    game_hud.set_action(sequence_matcher.label)
+    game_hud.set_time(time_remaining)
+    game_hud.set_score(score)
+
+def finish_game(won):
+    """Count the finished game and write the statistics (once per game, at the result screen)"""
+    rank = score_store.finish_game(selected_difficulty, score, total_levels if won else current_level, won)
+    if rank:
+        event_log.info(eventlog.HIGH_SCORE, rank, score)
+    score_store.commit()
+
+# LED hint while an action is expected, and feedback once it is detected (index = action id)
+ACTION_COLORS = (BLUE, GREEN, YELLOW, PURPLE)
+DONE_COLORS = (CYAN, GREEN, YELLOW, PURPLE)
+
+def choose_sequence():
+    """A single action, or from COMBO_FIRST_LEVEL on sometimes a combo"""
+    if current_level >= COMBO_FIRST_LEVEL and random() < COMBO_CHANCE:
+        return choice(combos.COMBOS)
+    return choice(combos.SINGLES)
+
+def start_level():
+    """Start new level"""
+    global current_action, time_remaining, time_limit, game_start_time, action_completed, level_passed
+    sequence = choose_sequence()  # Randomly select an action or combo
+    sequence_matcher.start(sequence)
+    current_action = sequence_matcher.expected
+    time_limit = get_time_limit(selected_difficulty, current_level, sequence.steps)
+    time_remaining = time_limit
+    game_start_time = time.monotonic()
+    action_completed = False
+    level_passed = False
+    
+    inputs.watch_for(current_action)
+    
+    # Inputs from before the prompt don't count; latency is measured from here
+    input_bus.prompt(game_start_time)
+    
+    # LED color hint based on action, counting down the time limit
+    leds.sweep(ACTION_COLORS[current_action], time_remaining)
+    sounds.play(sound.PROMPT)
+    
+    event_log.info(eventlog.LEVEL_START, current_level, current_action, int(time_remaining * 10 + 0.5))
+
+def check_action():
+    """Check if player completed the current action (or the whole combo)"""
+    global action_completed, current_action
+    now = time.monotonic()
+    
+    # Timed combo: too slow between steps, start over
+    if sequence_matcher.expire(now):
+        current_action = sequence_matcher.expected
+        inputs.watch_for(current_action)
+        leds.recolor(ACTION_COLORS[current_action])
+    
+    # Every source publishes to the input bus (see inputs.py); consume the expected event
+    if not input_bus.take(current_action, now):
+        return False
+    
+    if sequence_matcher.index == 0 and input_bus.last_latency_ms >= 0:
+        # Reaction time: prompt to the first step
+        score_store.record_action(selected_difficulty, current_action, input_bus.last_latency_ms)
+        difficulty_engine.record(current_action, input_bus.last_latency_ms / 1000)
+    event_log.info(eventlog.ACTION_DETECTED, current_action)
+    
+    if not sequence_matcher.advance(now):
+        # Next step of a combo
+        current_action = sequence_matcher.expected
+        inputs.watch_for(current_action)
+        leds.recolor(ACTION_COLORS[current_action])
+        return False
+    
+    action_completed = True
+    set_leds(DONE_COLORS[current_action])
+    sounds.play(sound.SUCCESS)
+    return True
+
+# ==================== Tasks ====================
+
+async def render_task():
+    """Update the game HUD and push damaged areas, at most renderer FPS times a second"""
+    global boot_first_frame_ns
+    while True:
+        if current_state == STATE_GAME_PLAY and game_hud is not None:
+            t0 = perf.begin()
+            update_game_screen()
+            perf.end(profiler.HUD, t0)
+        t0 = perf.begin()
+        if renderer.tick(time.monotonic()) and not boot_first_frame_ns:
+            boot_first_frame_ns = time.monotonic_ns()
+        perf.end(profiler.RENDER, t0)
+        await asyncio.sleep(RENDER_INTERVAL)
+
+async def led_task():
+    """Advance LED effects; the strip is only written when the frame changes"""
+    while True:
+        t0 = perf.begin()
+        leds.tick(time.monotonic())
+        perf.end(profiler.LEDS, t0)
+        await asyncio.sleep(LED_INTERVAL)
+
+async def profile_task():
+    """Toggle profiling from the serial console and stream telemetry windows"""
+    next_report = time.monotonic() + PROFILE_REPORT_INTERVAL
+    while True:
+        if profiler.serial_command() == "p":
+            set_profiling(not perf.enabled)
+            print(f"Profiling {'on' if perf.enabled else 'off'}")
+        now = time.monotonic()
+        if now >= next_report:
+            next_report = now + PROFILE_REPORT_INTERVAL
+            if perf.enabled:
+                perf.report()
+                bus.report()
+        await asyncio.sleep(0.1)
+
+async def log_task():
+    """Print queued log records (and write the session file), but never while the player is racing the clock"""
+    while True:
+        if current_state != STATE_GAME_PLAY or action_completed:
+            event_log.drain()
+            if session_recorder is not None:
+                session_recorder.flush()
+        if session_player is not None and session_player.take_finished():
+            print(f"Replay finished: {session_player.records} records")
+        await asyncio.sleep(LOG_INTERVAL)
+
+async def run_boot_animation():
+    """Play the boot animation; a button press skips it at any phase"""
+    inputs.button_pressed = False
+    animation = asyncio.create_task(screens.play_boot_animation())
+    while not animation.done():
+        if inputs.button_pressed:
+            animation.cancel()
+            print("Boot animation skipped")
+            break
+        await asyncio.sleep(GAME_INTERVAL)
+
+async def game_task():
+    """Boot animation and game state machine"""
+    global current_state, selected_difficulty, current_level, score, time_remaining
+    global last_encoder_position, level_passed, result_screen_start_time
+    
+    # Play boot animation
+    print("=== SQUID GAME: ACTION RUSH ===")
+    print("Booting...")
+    print(f"Accelerometer filter: Moving Average (window size={shake_detector.filter.size})")  # 新增：显示滤波器信息
+    
+    # Light up first, then do the heavy import
+    set_leds(PINK)
+    await asyncio.sleep(0)
+    screens.load_display_text()
+    membudget.stage("display_text")
+    
+    if warm_boot:
+        # Warm restart: straight to the splash screen
+        print("Warm restart - skipping boot animation")
+    else:
+        await run_boot_animation()
+        if session_player is None:
+            bootstate.mark_booted()
+    warm_flag_set = session_player is None  # A replay leaves NVM alone
+    
+    # Display splash after animation
+    renderer.show(screens.create_splash_screen())
+    leds.pulse(PINK)  # Pink breathing while waiting for the player
+    current_state = STATE_SPLASH
+    inputs.button_pressed = False  # Ignore presses during the animation
+    last_encoder_position = inputs.encoder_position  # ...and rotation
+    splash_shown_ns = time.monotonic_ns()
+    membudget.stage("splash")
+    
+    print(f"Boot: imports {(boot_imports_ns - boot_start_ns) // 1000000} ms, "
+          f"first frame {(boot_first_frame_ns - boot_start_ns) // 1000000 if boot_first_frame_ns else '-'} ms, "
+          f"splash {(splash_shown_ns - boot_start_ns) // 1000000} ms")
+    print("Game Ready!")
+    print("10 levels, 10 points each level")
+    print(f"Shake detection: >{shake_threshold}° for {shake_duration}s")
+    
+    while True:
+        current_time = time.monotonic()
+        perf.tick(time.monotonic_ns())
+        t0 = perf.begin()
+        
+        # Long uptime: the next power cycle should play the animation again
+        if warm_flag_set and current_time > bootstate.WARM_WINDOW:
+            bootstate.forget_boot()
+            warm_flag_set = False
+        
+        # State machine processing
+        if current_state == STATE_SPLASH:
+            if inputs.button_pressed:
+                current_state = STATE_DIFFICULTY_SELECT
+                inputs.encoder_position = 0
+                last_encoder_position = 0
+                renderer.show(screens.create_difficulty_screen(selected_difficulty))
+                event_log.info(eventlog.STATE_CHANGE, STATE_SPLASH, STATE_DIFFICULTY_SELECT)
+                inputs.button_pressed = False
+            elif inputs.encoder_position != last_encoder_position:
+                # Rotation: high scores
+                current_state = STATE_STATS
+                last_encoder_position = inputs.encoder_position
+                renderer.show(screens.create_stats_screen())
+                event_log.info(eventlog.STATE_CHANGE, STATE_SPLASH, STATE_STATS)
+        
+        elif current_state == STATE_STATS:
+            # Button or rotation: back to the splash screen
+            if inputs.button_pressed or inputs.encoder_position != last_encoder_position:
+                current_state = STATE_SPLASH
+                last_encoder_position = inputs.encoder_position
+                inputs.button_pressed = False
+                renderer.show(screens.create_splash_screen())
+                event_log.info(eventlog.STATE_CHANGE, STATE_STATS, STATE_SPLASH)
+        
+        elif current_state == STATE_DIFFICULTY_SELECT:
+            if inputs.encoder_position != last_encoder_position:
+                # One option per detent, even when several arrived since the last tick
+                selected_difficulty = (selected_difficulty + inputs.encoder_position - last_encoder_position) % len(difficulties)
+                screens.difficulty_screen.select(selected_difficulty)
+                event_log.info(eventlog.DIFFICULTY_SELECTED, selected_difficulty)
+                last_encoder_position = inputs.encoder_position
+            
+            if inputs.button_pressed:
+                current_state = STATE_GAME_PLAY
+                current_level = 1
+                score = 0
+                start_level()
+                renderer.show(create_game_screen())
+                event_log.info(eventlog.GAME_STARTED, selected_difficulty)
+                inputs.button_pressed = False
+        
+        elif current_state == STATE_GAME_PLAY:
+            # Update time
+            elapsed = current_time - game_start_time
+            time_remaining = max(time_limit - elapsed, 0)
+            
+            # Check action completion
+            if not action_completed and check_action():
+                level_passed = True
+                score += 10  # Fixed 10 points per level
+                event_log.info(eventlog.LEVEL_PASSED, current_level, score)
+            
+            # Check level end conditions
+            if time_remaining <= 0:
+                # Time's up, failed
+                inputs.unwatch()
+                score_store.record_failure(selected_difficulty, current_action)
+                if len(sequence_matcher.sequence) == 1:
+                    difficulty_engine.record_timeout(current_action, time_limit)
+                set_leds(RED)
+                sounds.play(sound.TIMEOUT)
+                update_game_screen()
+                await asyncio.sleep(1)
+                t0 = perf.resume()  # Transition waits are neither game work nor loop jitter
+                current_state = STATE_GAME_RESULT
+                renderer.show(screens.create_result_screen(False, score))
+                inputs.button_pressed = False
+                result_screen_start_time = time.monotonic()  # Record result screen entry time
+                event_log.info(eventlog.LEVEL_TIMEOUT)
+                finish_game(False)
+                event_log.drain(event_log.size)  # Idle now; keeps the serial log in order
+                input_bus.dump()
+                
+            elif level_passed:
+                # Action completed, proceed to next level
+                inputs.unwatch()
+                update_game_screen()
+                await asyncio.sleep(1)
+                t0 = perf.resume()
+                if current_level < total_levels:
+                    current_level += 1
+                    start_level()
+                    update_game_screen()
+                    event_log.info(eventlog.NEXT_LEVEL, current_level)
+                else:
+                    # All levels completed
+                    set_leds(GREEN)  # Success lighting
+                    await asyncio.sleep(2)  # Celebration time
+                    t0 = perf.resume()
+                    current_state = STATE_GAME_RESULT
+                    renderer.show(screens.create_result_screen(True, score))
+                    result_screen_start_time = time.monotonic()  # Record result screen entry time
+                    # Wait for button to be fully released
+                    await asyncio.sleep(0.5)
+                    t0 = perf.resume()
+                    inputs.button_pressed = False  # Reset button state
+                    event_log.info(eventlog.GAME_WON, score)
+                    finish_game(True)
+                    event_log.drain(event_log.size)
+                    input_bus.dump()
+        
+        elif current_state == STATE_GAME_RESULT:
+            # Prevent immediate trigger - must stay on result screen for at least 1 second
+            if time.monotonic() - result_screen_start_time < 1.0:
+                inputs.button_pressed = False  # Ignore button presses during this time
+                last_encoder_position = inputs.encoder_position  # Ignore rotation
+            else:
+                if inputs.button_pressed:
+                    # Button: restart
+                    current_state = STATE_GAME_PLAY
+                    current_level = 1
+                    score = 0
+                    start_level()
+                    renderer.show(create_game_screen())
+                    event_log.info(eventlog.GAME_RESTARTED)
+                    inputs.button_pressed = False
+                
+                # Encoder rotation: return to menu
+                if inputs.encoder_position != last_encoder_position:
+                    current_state = STATE_SPLASH
+                    renderer.show(screens.create_splash_screen())
+                    leds.pulse(PINK)  # Pink breathing while waiting for the player
+                    event_log.info(eventlog.MENU_RETURN)
+                    last_encoder_position = inputs.encoder_position
+        
+        perf.end(profiler.GAME, t0)
+        await asyncio.sleep(GAME_INTERVAL)
+
+def start_session():
+    """Seed the RNG and start recording or replaying inputs (session.MODE)"""
+    global warm_boot
+    now = time.monotonic()
+    if session_player is not None:
+        # Same seed, boot path and ADAPTIVE starting point as the recording
+        seed(session_player.seed)
+        warm_boot = session_player.warm
+        for kind, average in enumerate(session_player.averages):
+            if average:
+                difficulty_engine.model.seed(kind, average / 1000)
+        session_player.start(now)
+        print(f"Replaying {session.PATH} (seed {session_player.seed})")
+    elif session_recorder is not None:
+        value = session.new_seed()
+        seed(value)
+        averages = [score_store.average_reaction_ms(None, kind) for kind in actions]
+        try:
+            session_recorder.start(now, value, warm_boot, hw.accel_service.rate, averages)
+            print(f"Recording {session.PATH} (seed {value})")
+        except OSError:
+            print("Session not recorded: flash is read-only (hold the button during reset)")
+
+async def main():
+    """Run input, render, LED, profiling, logging and game tasks cooperatively"""
+    start_session()
+    await asyncio.gather(inputs.run(INPUT_INTERVAL), render_task(), led_task(), profile_task(), log_task(), game_task())
@@ -0,0 +1,100 @@
+"""
+Hardware backend
+
+All board objects (I2C bus, OLED, rotary encoder, button, ADXL345,
+NeoPixels and the audio output) are created here instead of at the top of
+code.py. The game asks get_backend() for them; on the board that builds
+BoardHardware, on a host the simulator installs its own backend with
+set_backend() before the game loads.
+
+A backend only needs these attributes:
+    i2c, bus, display, encoder, button, accel_service, pixels, audio
+
+bus is the i2cbus.BusManager that shares i2c between the sensor service
+and the display pushes. audio plays audiocore samples (play(), stop(),
+playing), or is None without a speaker.
+"""
+
+# Pin wired to the ADXL345 INT1 output (e.g. "D6"), or None to poll the
+# interrupt register over I2C instead
+ACCEL_INT_PIN = None
+
+# Pin driving a piezo or a small amplifier (e.g. "D10"), or None for no
+# sound; needs a port with audiopwmio
+AUDIO_PIN = None
+
+# I2C clock: the ADXL345 allows 400 kHz (fast mode), the SSD1306 ~1 MHz, so
+# the shared bus runs at the slower part's limit (busio's default is 100 kHz)
+I2C_FREQUENCY = 400_000
+
+_backend = None
+
+
+def set_backend(backend):
+    """Use the given backend instead of the real board (e.g. a simulator)"""
+    global _backend
+    _backend = backend
+
+
+def get_backend():
+    """Return the active backend, creating the board hardware on first use"""
+    global _backend
+    if _backend is None:
+        _backend = BoardHardware()
+    return _backend
+
+
+class BoardHardware:
+    """Real hardware on the Xiao ESP32-C3"""
+
+    def __init__(self):
+        # Board-only modules are imported here so this file imports anywhere
+        import board
+        import busio
+        import digitalio
+        import displayio
+        import i2cdisplaybus
+        import adafruit_displayio_ssd1306
+        import neopixel
+        from i2cbus import BusManager
+        from encoder_input import EncoderInput
+
+        # Initialize display
+        displayio.release_displays()
+        self.i2c = busio.I2C(board.SCL, board.SDA, frequency=I2C_FREQUENCY)
+        self.bus = BusManager(self.i2c)
+        display_bus = i2cdisplaybus.I2CDisplayBus(self.i2c, device_address=0x3C)
+        self.display = adafruit_displayio_ssd1306.SSD1306(display_bus, width=128, height=64)
+
+        # Initialize rotary encoder (hardware counter or background edge queue)
+        self.encoder = EncoderInput(board.D3, board.D2)
+
+        # Initialize button
+        self.button = digitalio.DigitalInOut(board.D1)
+        self.button.direction = digitalio.Direction.INPUT
+        self.button.pull = digitalio.Pull.UP
+
+        # Accelerometer: created on first use (accel_service), after the boot
+        self._int_pin = getattr(board, ACCEL_INT_PIN) if ACCEL_INT_PIN else None
+        self._accel = None
+
+        # Initialize NeoPixel
+        self.pixels = neopixel.NeoPixel(board.A0, 8, brightness=0.3, auto_write=False)
+
+        # Initialize audio output (PWM, fed by DMA)
+        self.audio = None
+        if AUDIO_PIN:
+            try:
+                import audiopwmio
+            except ImportError:
+                print("No audiopwmio on this board: sound off")
+            else:
+                self.audio = audiopwmio.PWMAudioOut(getattr(board, AUDIO_PIN))
+
+    @property
+    def accel_service(self):
+        """ADXL345 service (interrupt-driven tap/activity + FIFO); its register setup runs on first use"""
+        if self._accel is None:
+            import sensors
+            self._accel = sensors.AccelService(self.bus, int_pin=self._int_pin)
+        return self._accel
@@ -0,0 +1,147 @@
+"""
+Shared I2C bus manager
+
+The OLED and the ADXL345 sit on one I2C bus. BusManager owns the busio.I2C
+object and sits between it and both users:
+
+- the sensor service talks to the manager as if it were the bus
+  (try_lock/unlock/writeto/writeto_then_readfrom are passed through and
+  timed per lock)
+- the renderer pushes frames with push(): the sensor gets the bus right
+  before the push, and again right after it, so FIFO data that came in
+  during a frame is read as soon as the display lets go of the bus
+
+A frame cannot be split into page-sized pieces from Python: displayio
+writes all damaged areas in one native refresh() call that holds the bus
+until it is done. The sensor is served around each push instead, and the
+bus runs at the highest clock both parts allow (hardware.I2C_FREQUENCY),
+which shortens every push.
+
+With accounting on (the profiler switches it together with its own), the
+manager keeps per client transactions, bus time and the longest single
+hold, plus the sensor's waits: accesses made right after a push were due
+during it, and waited at most the push time. report() prints one line per
+client and a wait line, and resets the window:
+
+    @B,<ms>,<client>,<transactions>,<busy_us>,<max_hold_us>,<utilisation_permille>
+    @W,<ms>,<waits>,<avg_wait_us>,<max_wait_us>
+"""
+import time
+from array import array
+
+# Clients
+SENSOR = 0
+DISPLAY = 1
+CLIENT_NAMES = ("sensor", "display")
+
+
+class BusManager:
+    """Owns the shared I2C bus: sensor before display, with utilisation accounting"""
+
+    def __init__(self, i2c, clock=time):
+        self.i2c = i2c
+        self.clock = clock
+        self.enabled = False
+        self._service = None  # Sensor service run around display pushes
+        clients = len(CLIENT_NAMES)
+        self.transactions = array("L", [0] * clients)
+        self.busy_us = array("L", [0] * clients)
+        self.max_hold_us = array("L", [0] * clients)
+        self._locked_ns = 0
+        self._push_us = 0  # Length of the push just finished, while the sensor is served after it
+        self.reset()
+
+    def reset(self):
+        """Start a new accounting window"""
+        for client in range(len(CLIENT_NAMES)):
+            self.transactions[client] = 0
+            self.busy_us[client] = 0
+            self.max_hold_us[client] = 0
+        self.waits = 0
+        self.wait_total_us = 0
+        self.wait_max_us = 0
+        self._window_start_ns = self.clock.monotonic_ns()
+
+    def set_enabled(self, enabled):
+        if enabled and not self.enabled:
+            self.reset()
+        self.enabled = enabled
+
+    def set_sensor_service(self, service):
+        """service(now) reads whatever the sensor has pending; it runs around every display push"""
+        self._service = service
+
+    def _account(self, client, us):
+        self.busy_us[client] += us
+        if us > self.max_hold_us[client]:
+            self.max_hold_us[client] = us
+
+    # ==================== Sensor side (busio.I2C interface) ====================
+
+    def try_lock(self):
+        if not self.i2c.try_lock():
+            return False
+        if self.enabled:
+            self._locked_ns = self.clock.monotonic_ns()
+            wait = self._push_us
+            if wait:
+                # Due during the push: waited at most its length
+                self.waits += 1
+                self.wait_total_us += wait
+                if wait > self.wait_max_us:
+                    self.wait_max_us = wait
+                self._push_us = 0
+        return True
+
+    def unlock(self):
+        self.i2c.unlock()
+        if self.enabled and self._locked_ns:
+            self._account(SENSOR, (self.clock.monotonic_ns() - self._locked_ns) // 1000)
+            self._locked_ns = 0
+
+    def writeto(self, address, buffer, **kwargs):
+        self.i2c.writeto(address, buffer, **kwargs)
+        self.transactions[SENSOR] += 1
+
+    def readfrom_into(self, address, buffer, **kwargs):
+        self.i2c.readfrom_into(address, buffer, **kwargs)
+        self.transactions[SENSOR] += 1
+
+    def writeto_then_readfrom(self, address, out_buffer, in_buffer, **kwargs):
+        self.i2c.writeto_then_readfrom(address, out_buffer, in_buffer, **kwargs)
+        self.transactions[SENSOR] += 1
+
+    # ==================== Display side ====================
+
+    def push(self, refresh, now):
+        """Run a display refresh (one native call that locks the bus itself), sensor first"""
+        service = self._service
+        if service is not None:
+            service(now)
+        if not self.enabled:
+            refresh()
+        else:
+            t0 = self.clock.monotonic_ns()
+            refresh()
+            us = (self.clock.monotonic_ns() - t0) // 1000
+            self.transactions[DISPLAY] += 1
+            self._account(DISPLAY, us)
+            self._push_us = us
+        if service is not None:
+            service(self.clock.monotonic())
+        self._push_us = 0
+
+    # ==================== Report ====================
+
+    def report(self):
+        """Print the window as telemetry lines and start a new one"""
+        now_ns = self.clock.monotonic_ns()
+        ms = now_ns // 1000000
+        window_us = (now_ns - self._window_start_ns) // 1000
+        for client, name in enumerate(CLIENT_NAMES):
+            busy = self.busy_us[client]
+            permille = busy * 1000 // window_us if window_us > 0 else 0
+            print(f"@B,{ms},{name},{self.transactions[client]},{busy},{self.max_hold_us[client]},{permille}")
+        average = self.wait_total_us // self.waits if self.waits else 0
+        print(f"@W,{ms},{self.waits},{average},{self.wait_max_us}")
+        self.reset()
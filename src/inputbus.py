@@ -0,0 +1,138 @@
+"""
+Input event bus with reaction-time measurement
+
+Every input source publishes (kind, time) events into one fixed-size ring
+buffer; the game consumes them instead of sampling loose flags. Times are
+integer milliseconds of time.monotonic() when the input was seen (the input
+task runs every few ms; shakes use the time of the FIFO sample that
+completed them).
+
+For each action kind the bus keeps a latency histogram of prompt -> event
+(the player's reaction plus detection delay) and the worst event -> consume
+delay (how long the game took to notice). Both live in preallocated arrays;
+dump() prints them over serial.
+"""
+from array import array
+
+# Action kinds (index into ACTION_NAMES)
+ROTATE = 0
+BUTTON = 1
+TAP = 2
+SHAKE = 3
+ACTION_NAMES = ("ROTATE", "BUTTON", "TAP", "SHAKE")
+
+QUEUE_SIZE = 32
+
+# Latency histogram: BIN_MS wide bins, the last one collects everything longer
+BIN_MS = 100
+BINS = 40
+
+
+class InputBus:
+    """Ring buffer of timestamped input events plus per-action latency stats"""
+
+    def __init__(self, size=QUEUE_SIZE):
+        self.size = size
+        self._kinds = array("B", [0] * size)
+        self._times = array("l", [0] * size)
+        self._head = 0
+        self._count = 0
+        self.dropped = 0  # Events lost because the buffer was full
+        self.prompt_ms = None  # When the current prompt was shown
+        self.last_latency_ms = -1  # Prompt -> event of the last measured event
+
+        kinds = len(ACTION_NAMES)
+        self.histogram = array("H", [0] * (kinds * BINS))
+        self.samples = array("L", [0] * kinds)
+        self.total_ms = array("L", [0] * kinds)
+        self.min_ms = array("l", [-1] * kinds)
+        self.max_ms = array("l", [0] * kinds)
+        self.max_lag_ms = array("l", [0] * kinds)  # Event -> consumed by the game
+
+    def publish(self, kind, t):
+        """Queue an event seen at time t (seconds); the oldest is dropped when full"""
+        if self._count == self.size:
+            self._head = (self._head + 1) % self.size
+            self._count -= 1
+            self.dropped += 1
+        tail = (self._head + self._count) % self.size
+        self._kinds[tail] = kind
+        self._times[tail] = int(t * 1000)
+        self._count += 1
+
+    def clear(self):
+        """Drop pending events (e.g. inputs from before the current prompt)"""
+        self._head = 0
+        self._count = 0
+
+    def prompt(self, t):
+        """A new prompt was shown at time t: start measuring from here"""
+        self.clear()
+        self.prompt_ms = int(t * 1000)
+        self.last_latency_ms = -1
+
+    def take(self, kind, now):
+        """
+        Consume pending events up to the first one of the given kind
+
+        Returns True if one was found; its latency is recorded against the
+        current prompt. Events of other kinds before it are discarded.
+        """
+        while self._count:
+            head = self._head
+            event_kind = self._kinds[head]
+            event_ms = self._times[head]
+            self._head = (head + 1) % self.size
+            self._count -= 1
+            if event_kind == kind:
+                self._record(kind, event_ms, int(now * 1000))
+                return True
+        return False
+
+    def _record(self, kind, event_ms, now_ms):
+        lag = now_ms - event_ms
+        if lag > self.max_lag_ms[kind]:
+            self.max_lag_ms[kind] = lag
+        if self.prompt_ms is None:
+            return
+        latency = max(event_ms - self.prompt_ms, 0)
+        self.prompt_ms = None  # One measurement per prompt
+        self.last_latency_ms = latency
+        self.histogram[kind * BINS + min(latency // BIN_MS, BINS - 1)] += 1
+        self.samples[kind] += 1
+        self.total_ms[kind] += latency
+        if self.min_ms[kind] < 0 or latency < self.min_ms[kind]:
+            self.min_ms[kind] = latency
+        if latency > self.max_ms[kind]:
+            self.max_ms[kind] = latency
+
+    def percentile(self, kind, fraction):
+        """Latency (ms, bin resolution) below which the given fraction of samples fall"""
+        count = self.samples[kind]
+        if not count:
+            return None
+        target = fraction * count
+        seen = 0
+        base = kind * BINS
+        for i in range(BINS):
+            seen += self.histogram[base + i]
+            if seen >= target:
+                return (i + 1) * BIN_MS
+        return BINS * BIN_MS
+
+    def dump(self):
+        """Print latency summaries and non-empty histogram bins"""
+        for kind, name in enumerate(ACTION_NAMES):
+            count = self.samples[kind]
+            if not count:
+                continue
+            print(f"LAT {name} n={count} avg={self.total_ms[kind] // count}ms "
+                  f"min={self.min_ms[kind]}ms p50<={self.percentile(kind, 0.5)}ms "
+                  f"p90<={self.percentile(kind, 0.9)}ms max={self.max_ms[kind]}ms "
+                  f"lag<={self.max_lag_ms[kind]}ms")
+            base = kind * BINS
+            bins = " ".join(f"{i * BIN_MS}:{self.histogram[base + i]}"
+                            for i in range(BINS) if self.histogram[base + i])
+            print(f"HIST {name} {bins}")
+        if self.dropped:
+            print(f"Input events dropped: {self.dropped}")
@@ -0,0 +1,102 @@
+"""
+Input sampling
+
+The input task polls the encoder, the button and the accelerometer service
+every few milliseconds and publishes what it finds to the input bus with
+its timestamp, so no event is missed while the game task is busy. Shakes
+are detected here, on the raw FIFO batches (shake.py).
+
+The game reads encoder_position and button_pressed, and chooses the
+detector the current step needs with watch_for().
+"""
+import asyncio
+import time
+import inputbus
+import profiler
+
+
+class Inputs:
+    """Encoder, button and accelerometer sampling for the input task"""
+
+    def __init__(self, hw, input_bus, shake_detector, bus, perf, encoder_debounce_ms=80):
+        self.hw = hw
+        self.encoder = hw.encoder
+        self.button = hw.button
+        self.input_bus = input_bus
+        self.shake_detector = shake_detector
+        self.bus = bus
+        self.perf = perf
+        self.accel_service = None  # Created on the first level (see watch_for)
+
+        # Encoder variables
+        self.encoder_position = 0  # Detents seen (either direction), compared with the game's last position
+        self.encoder.debounce_ms = encoder_debounce_ms  # Reversals faster than this are contact bounce
+
+        # Button state (button_pressed stays set until the game task consumes it)
+        self.button_pressed = False
+        self.last_button_value = self.button.value
+
+    def watch_for(self, action):
+        """Poll only the detector the current step needs"""
+        if action == inputbus.SHAKE:
+            # ==================== 修改点1：重置滤波器 ====================
+            self.shake_detector.reset()
+
+        # Only listen to the accelerometer when the step needs it
+        if self.accel_service is None:
+            self.accel_service = self.hw.accel_service
+            self.bus.set_sensor_service(self.accel_service.update)
+        self.accel_service.watch(tap=action == inputbus.TAP, shake=action == inputbus.SHAKE)
+
+    def unwatch(self):
+        """Stop listening to the accelerometer (no bus traffic between levels)"""
+        self.accel_service.watch()
+
+    def poll(self, now):
+        """Sample all inputs once and publish what happened"""
+        perf = self.perf
+        input_bus = self.input_bus
+        accel_service = self.accel_service
+
+        # Accelerometer interrupts (no I2C traffic unless the chip signals)
+        if accel_service is not None:
+            t0 = perf.begin()
+            accel_service.update(now)
+            if accel_service.take_tap():
+                input_bus.publish(inputbus.TAP, now)
+
+            # ==================== 修改点2：使用滤波器 ====================
+            # 1. 取出传感器服务从 FIFO 批量读到的原始数据（没有移动时为 0 个）
+            count = accel_service.take_samples()
+
+            # 2-4. 整批滤波、计算角度、检测摇晃（事件时间 = 完成摇晃的那个采样的时间）
+            if count:
+                shake_time = self.shake_detector.detect(accel_service.samples, count,
+                                                        accel_service.sample_time, 1 / accel_service.rate)
+                if shake_time is not None:
+                    input_bus.publish(inputbus.SHAKE, shake_time)
+            perf.end(profiler.ACCEL, t0)
+
+        # Encoder handling: every detent is queued with its timestamp, bounce is filtered out
+        t0 = perf.begin()
+        encoder = self.encoder
+        encoder.update()
+        step = encoder.pop()
+        while step:
+            self.encoder_position += abs(step)
+            input_bus.publish(inputbus.ROTATE, now)
+            step = encoder.pop()
+
+        # Button handling
+        current_button_value = self.button.value
+        if self.last_button_value and not current_button_value:
+            self.button_pressed = True
+            input_bus.publish(inputbus.BUTTON, now)
+        self.last_button_value = current_button_value
+        perf.end(profiler.INPUT, t0)
+
+    async def run(self, interval):
+        """Input task: sample every interval seconds"""
+        while True:
+            self.poll(time.monotonic())
+            await asyncio.sleep(interval)
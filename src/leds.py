@@ -0,0 +1,132 @@
+"""
+Non-blocking NeoPixel engine
+
+Owns the strip. Everything shown is a keyframe schedule: a list of
+(offset seconds, color, lit LEDs) steps, optionally looping. tick(now) is
+called from the LED task, picks the current keyframe and writes the strip
+only when the resulting frame differs from what is already shown, so
+pixels.show() (which bit-bangs the whole strip with interrupts off) runs only
+on real changes.
+
+Effects:
+- set(color): solid color
+- flash(color, on, off, count): blink, then hold end_color
+- pulse(color, period): breathe between dim and full brightness
+- sweep(color, duration): countdown, one LED goes dark every duration / n
+- recolor(color): same effect and timing, new color (e.g. next combo step)
+"""
+from array import array
+
+PULSE_STEPS = 8  # Keyframes per pulse half-period
+
+# Color definitions
+RED = (255, 0, 0)
+GREEN = (0, 255, 0)
+BLUE = (0, 0, 255)
+YELLOW = (255, 150, 0)
+PURPLE = (180, 0, 255)
+CYAN = (0, 255, 255)
+WHITE = (255, 255, 255)
+PINK = (255, 20, 147)
+OFF = (0, 0, 0)
+
+
+def _pack(color):
+    return (color[0] << 16) | (color[1] << 8) | color[2]
+
+
+def _scale(color, level, levels):
+    return tuple(c * level // levels for c in color)
+
+
+class LedEngine:
+    """Keyframe LED effects with change detection on show()"""
+
+    def __init__(self, pixels):
+        self.pixels = pixels
+        self.n = len(pixels)
+        self._shown = array("l", [-1] * self.n)  # Packed 0xRRGGBB per pixel, -1 = unknown
+        self._keyframes = ()
+        self._period = None
+        self._start = 0
+        self._index = 0
+        self._pending_start = True
+        # Metrics
+        self.shows = 0
+        self.pixel_writes = 0
+
+    def _play(self, keyframes, period=None):
+        self._keyframes = keyframes
+        self._period = period
+        self._index = 0
+        self._pending_start = True  # Start time is taken on the next tick
+
+    def set(self, color):
+        """Solid color on all LEDs"""
+        self._play(((0, _pack(color), self.n),))
+
+    def flash(self, color, on=0.2, off=0.2, count=3, end_color=(0, 0, 0)):
+        """Blink count times, then hold end_color"""
+        packed = _pack(color)
+        keyframes = []
+        for i in range(count):
+            keyframes.append((i * (on + off), packed, self.n))
+            keyframes.append((i * (on + off) + on, 0, self.n))
+        keyframes.append((count * (on + off), _pack(end_color), self.n))
+        self._play(tuple(keyframes))
+
+    def pulse(self, color, period=1.5):
+        """Breathe between a quarter and full brightness, forever"""
+        step = period / (2 * PULSE_STEPS)
+        keyframes = []
+        for i in range(2 * PULSE_STEPS):
+            level = i if i < PULSE_STEPS else 2 * PULSE_STEPS - i
+            keyframes.append((i * step, _pack(_scale(color, PULSE_STEPS + 3 * level, 4 * PULSE_STEPS)), self.n))
+        self._play(tuple(keyframes), period)
+
+    def sweep(self, color, duration):
+        """Countdown: all LEDs lit, one goes dark every duration / n seconds"""
+        packed = _pack(color)
+        step = duration / self.n
+        self._play(tuple((i * step, packed, self.n - i) for i in range(self.n + 1)))
+
+    def recolor(self, color):
+        """Change the color of the running effect without restarting it"""
+        packed = _pack(color)
+        self._keyframes = tuple((offset, packed if value else 0, lit) for offset, value, lit in self._keyframes)
+
+    def tick(self, now):
+        """Advance the current effect; returns True if the strip was updated"""
+        keyframes = self._keyframes
+        if not keyframes:
+            return False
+        if self._pending_start:
+            self._pending_start = False
+            self._start = now
+        elapsed = now - self._start
+        if self._period:
+            elapsed %= self._period
+            if elapsed < keyframes[self._index][0]:
+                self._index = 0  # Wrapped around
+        index = self._index
+        while index + 1 < len(keyframes) and keyframes[index + 1][0] <= elapsed:
+            index += 1
+        self._index = index
+        _, packed, lit = keyframes[index]
+        return self._render(packed, lit)
+
+    def _render(self, packed, lit):
+        pixels = self.pixels
+        shown = self._shown
+        changed = False
+        for i in range(self.n):
+            value = packed if i < lit else 0
+            if shown[i] != value:
+                shown[i] = value
+                pixels[i] = value
+                self.pixel_writes += 1
+                changed = True
+        if changed:
+            pixels.show()
+            self.shows += 1
+        return changed
@@ -0,0 +1,57 @@
+"""
+RAM budget per boot stage
+
+start() takes gc.mem_free() before the game is imported; every stage()
+after that collects garbage and prints how much heap the stage kept:
+
+    @M,<stage>,<used_bytes>,<free_bytes>,<budget_bytes>
+
+A stage over its budget is listed in over, and with STRICT set the boot
+stops with a MemoryError, so a change that makes the game too big fails
+at once on the bench instead of as fragmentation later.
+tools/build.py --compare checks the same budgets in captured serial logs.
+
+Off CircuitPython (no gc.mem_free) everything here is a no-op.
+"""
+import gc
+
+# Bytes each stage may keep on the heap. Starting estimates, not yet measured
+# on the board: tune them from the @M lines of a real boot (tools/build.py --compare)
+BUDGETS = {
+    "imports": 40000,  # Game modules (source is compiled in RAM; .mpy needs much less)
+    "hardware": 12000,  # Board objects, display driver, renderer
+    "game": 18000,  # Game state, profiler, event log, LED engine, inputs, ~8 KB of sound buffers
+    "display_text": 12000,  # adafruit_display_text
+    "splash": 8000,  # First screen built
+}
+STRICT = False  # True: raise MemoryError when a stage goes over its budget
+
+over = []
+_mem_free = getattr(gc, "mem_free", None)  # CircuitPython only
+_last_free = 0
+
+
+def start():
+    """Baseline before the first import"""
+    global _last_free
+    if _mem_free is None:
+        return
+    gc.collect()
+    _last_free = _mem_free()
+
+
+def stage(name):
+    """Report what the stage since the previous call kept, and check it against its budget"""
+    global _last_free
+    if _mem_free is None or not _last_free:
+        return
+    gc.collect()
+    free = _mem_free()
+    used = _last_free - free
+    budget = BUDGETS.get(name, -1)
+    print(f"@M,{name},{used},{free},{budget}")
+    _last_free = free
+    if budget >= 0 and used > budget:
+        over.append(name)
+        if STRICT:
+            raise MemoryError(f"Boot stage {name} kept {used} bytes, budget {budget}")
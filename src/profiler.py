@@ -0,0 +1,181 @@
+"""
+Hot-path profiler with a serial telemetry stream
+
+Named sections are small integer ids. Timing one is
+
+    t0 = profiler.begin()
+    ...
+    profiler.end(profiler.ACCEL, t0)
+
+begin() returns 0 while profiling is off and end() returns right away for
+0, so a disabled profiler costs two calls and a compare per section.
+
+Per section it keeps count, total, min, max and a quarter-octave histogram
+of microseconds (for p99); tick() measures the game loop rate and jitter.
+report() prints one CSV line per section plus a loop line and resets the
+window:
+
+    @P,<ms>,<section>,<count>,<avg_us>,<min_us>,<max_us>,<p99_us>
+    @L,<ms>,<ticks>,<loop_hz>,<jitter_avg_us>,<jitter_max_us>,<late_ticks>,<mem_free>
+
+tools/telemetry.py turns a captured serial log into a report.
+"""
+import gc
+import time
+from array import array
+
+# Sections
+INPUT = 0    # Encoder and button
+ACCEL = 1    # ADXL345 service (I2C)
+GAME = 2     # Game state machine tick (includes its print() calls)
+HUD = 3      # update_game_screen()
+RENDER = 4   # Renderer tick (display refresh)
+LEDS = 5     # pixels.show()
+SECTION_NAMES = ("input", "accel", "game", "hud", "render", "leds")
+
+BINS = 64  # Quarter-octave bins: exact below 4 us, up to ~130 ms
+
+_NO_MIN = 0x7FFFFFFF
+
+
+def _bin(us):
+    if us < 4:
+        return us
+    length = us.bit_length()
+    index = 4 * (length - 2) + ((us >> (length - 3)) & 3)
+    return index if index < BINS else BINS - 1
+
+
+def _bin_floor(index):
+    if index < 4:
+        return index
+    return (4 + index % 4) << (index // 4 - 1)
+
+
+class Profiler:
+    """Section timers, loop rate/jitter and free memory, streamed as CSV"""
+
+    def __init__(self, loop_interval, enabled=False):
+        sections = len(SECTION_NAMES)
+        self.enabled = enabled
+        self.loop_interval_us = int(loop_interval * 1000000)
+        self.count = array("L", [0] * sections)
+        self.total_us = array("L", [0] * sections)
+        self.min_us = array("L", [_NO_MIN] * sections)
+        self.max_us = array("L", [0] * sections)
+        self.histogram = array("H", [0] * (sections * BINS))
+        self._mem_free = getattr(gc, "mem_free", None)  # CircuitPython only
+        self.reset()
+
+    def reset(self):
+        """Start a new measurement window"""
+        for section in range(len(SECTION_NAMES)):
+            self.count[section] = 0
+            self.total_us[section] = 0
+            self.min_us[section] = _NO_MIN
+            self.max_us[section] = 0
+        for i in range(len(self.histogram)):
+            self.histogram[i] = 0
+        self.ticks = 0
+        self.jitter_total_us = 0
+        self.jitter_max_us = 0
+        self.late_ticks = 0  # Ticks more than one interval late
+        self._last_tick_ns = 0
+        self._window_start_ns = 0  # Time of the first tick in the window
+
+    def set_enabled(self, enabled):
+        if enabled and not self.enabled:
+            self.reset()
+        self.enabled = enabled
+
+    def begin(self):
+        """Start timing a section (0 when profiling is off)"""
+        if self.enabled:
+            return time.monotonic_ns()
+        return 0
+
+    def end(self, section, t0):
+        """Finish timing a section started with begin()"""
+        if not t0:
+            return
+        us = (time.monotonic_ns() - t0) // 1000
+        self.count[section] += 1
+        self.total_us[section] += us
+        if us < self.min_us[section]:
+            self.min_us[section] = us
+        if us > self.max_us[section]:
+            self.max_us[section] = us
+        index = section * BINS + _bin(us)
+        if self.histogram[index] < 0xFFFF:
+            self.histogram[index] += 1
+
+    def tick(self, now_ns):
+        """Game loop heartbeat: measures rate and jitter against loop_interval"""
+        if not self.enabled:
+            return
+        if self._last_tick_ns:
+            jitter = (now_ns - self._last_tick_ns) // 1000 - self.loop_interval_us
+            if jitter < 0:
+                jitter = -jitter
+            self.jitter_total_us += jitter
+            if jitter > self.jitter_max_us:
+                self.jitter_max_us = jitter
+            if jitter > self.loop_interval_us:
+                self.late_ticks += 1
+        elif not self.ticks:
+            self._window_start_ns = now_ns
+        self._last_tick_ns = now_ns
+        self.ticks += 1
+
+    def resume(self):
+        """
+        Call after an intentional wait inside a timed loop (e.g. a screen transition):
+        the wait is neither loop jitter nor section time. Returns a new begin() value.
+        """
+        self._last_tick_ns = 0
+        return self.begin()
+
+    def percentile(self, section, fraction):
+        """Upper bound (us) of the given fraction of samples, at bin resolution"""
+        count = self.count[section]
+        if not count:
+            return 0
+        target = fraction * count
+        seen = 0
+        base = section * BINS
+        for i in range(BINS):
+            seen += self.histogram[base + i]
+            if seen >= target:
+                if i + 1 < BINS:
+                    return min(_bin_floor(i + 1) - 1, self.max_us[section])
+                break
+        return self.max_us[section]
+
+    def report(self):
+        """Print the window as telemetry lines and start a new one"""
+        ms = self._last_tick_ns // 1000000
+        for section, name in enumerate(SECTION_NAMES):
+            count = self.count[section]
+            if not count:
+                continue
+            print(f"@P,{ms},{name},{count},{self.total_us[section] // count},"
+                  f"{self.min_us[section]},{self.max_us[section]},{self.percentile(section, 0.99)}")
+        elapsed_ns = self._last_tick_ns - self._window_start_ns
+        loop_hz = (self.ticks - 1) * 1000000000 // elapsed_ns if elapsed_ns > 0 else 0
+        jitter_avg = self.jitter_total_us // (self.ticks - 1) if self.ticks > 1 else 0
+        mem_free = self._mem_free() if self._mem_free else -1
+        if self.ticks:
+            print(f"@L,{ms},{self.ticks},{loop_hz},{jitter_avg},{self.jitter_max_us},{self.late_ticks},{mem_free}")
+        self.reset()
+
+
+def serial_command():
+    """Return one character typed on the USB serial console, or None"""
+    try:
+        import supervisor
+        import sys
+    except ImportError:
+        return None
+    if supervisor.runtime.serial_bytes_available:
+        return sys.stdin.read(1)
+    return None
@@ -0,0 +1,120 @@
+"""
+Render scheduler for the SSD1306
+
+Sits between the game and displayio. Auto refresh is turned off; screen
+changes are collected as damage and pushed with one explicit
+display.refresh() at most fps times a second, so several label changes in a
+row cost a single frame.
+
+Damage is tracked the way the SSD1306 is written: per 8-pixel page, the
+range of dirty columns. That gives the metrics their byte count (one byte
+per column per page) and lets tick() skip frames when nothing changed.
+
+With a bus manager (i2cbus.BusManager) the refresh goes through its push(),
+which lets the accelerometer use the shared I2C bus right before and after
+every frame.
+"""
+from array import array
+
+WIDTH = 128
+HEIGHT = 64
+PAGES = HEIGHT // 8
+
+# terminalio.FONT glyph cell
+GLYPH_WIDTH = 6
+GLYPH_HEIGHT = 12
+
+
+class Renderer:
+    """Coalesces screen updates and caps the refresh rate"""
+
+    def __init__(self, display, fps=20, bus=None):
+        self.display = display
+        self.bus = bus
+        display.auto_refresh = False
+        self.frame_interval = 1 / fps
+        self.next_frame = 0
+        self.pending_group = None
+        self._dirty_min = array("B", [WIDTH] * PAGES)
+        self._dirty_max = array("B", [0] * PAGES)
+        self.dirty = False
+        # Metrics
+        self.frames_rendered = 0
+        self.frames_skipped = 0  # Ticks where damage waited for the FPS cap
+        self.bytes_pushed = 0
+
+    def set_fps(self, fps):
+        self.frame_interval = 1 / fps
+
+    def show(self, group):
+        """Switch to a new screen (whole display is damaged)"""
+        self.pending_group = group
+        self.invalidate(0, 0, WIDTH, HEIGHT)
+
+    def invalidate(self, x, y, width, height):
+        """Mark a screen rectangle as changed"""
+        if x < 0:
+            width += x
+            x = 0
+        if y < 0:
+            height += y
+            y = 0
+        if width <= 0 or height <= 0 or x >= WIDTH or y >= HEIGHT:
+            return
+        right = min(x + width, WIDTH) - 1
+        first_page = y // 8
+        last_page = (min(y + height, HEIGHT) - 1) // 8
+        dirty_min = self._dirty_min
+        dirty_max = self._dirty_max
+        for page in range(first_page, last_page + 1):
+            if x < dirty_min[page]:
+                dirty_min[page] = x
+            if right > dirty_max[page]:
+                dirty_max[page] = right
+        self.dirty = True
+
+    def invalidate_label(self, text_label):
+        """Mark the area covered by a label's current text as changed"""
+        scale = text_label.scale
+        self.invalidate(text_label.x, text_label.y - GLYPH_HEIGHT * scale // 2,
+                        GLYPH_WIDTH * scale * len(text_label.text), GLYPH_HEIGHT * scale)
+
+    def set_text(self, text_label, text):
+        """Change a label's text, damaging both the old and the new area"""
+        if text_label.text == text:
+            return False
+        self.invalidate_label(text_label)
+        text_label.text = text
+        self.invalidate_label(text_label)
+        return True
+
+    def damaged_bytes(self):
+        """Bytes the current damage needs on the wire (one per column per page)"""
+        total = 0
+        for page in range(PAGES):
+            if self._dirty_max[page] >= self._dirty_min[page]:
+                total += self._dirty_max[page] - self._dirty_min[page] + 1
+        return total
+
+    def tick(self, now):
+        """Push a frame if something changed and the FPS cap allows it"""
+        if not self.dirty:
+            return False
+        if now < self.next_frame:
+            self.frames_skipped += 1
+            return False
+        if self.pending_group is not None:
+            self.display.root_group = self.pending_group
+            self.pending_group = None
+        if self.bus is not None:
+            self.bus.push(self.display.refresh, now)
+        else:
+            self.display.refresh()
+        self.bytes_pushed += self.damaged_bytes()
+        self.frames_rendered += 1
+        self.next_frame = now + self.frame_interval
+        for page in range(PAGES):
+            self._dirty_min[page] = WIDTH
+            self._dirty_max[page] = 0
+        self.dirty = False
+        return True
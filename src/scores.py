@@ -0,0 +1,214 @@
+"""
+High scores and play statistics in NVM
+
+One fixed-layout binary record holds everything: the top three scores,
+games/wins/best level per difficulty, and for each difficulty x action the
+number of successes, failures and the summed reaction time. The game
+updates the in-RAM copy while playing; commit() writes it once, at the
+result screen.
+
+Writes rotate through SLOTS slots (each record carries a sequence number),
+so every slot sees 1/SLOTS of the writes. A record with a bad checksum (e.g.
+power lost mid-write) is ignored and the previous slot wins, which makes the
+slots a journal. At boot only the SLOTS headers are compared and one record
+is read.
+
+NVM offset 0 belongs to bootstate; records start at NVM_STATS_OFFSET.
+Without microcontroller.nvm (or with persist=False, e.g. while replaying a
+recorded session) the statistics live in RAM only.
+"""
+import struct
+from array import array
+
+NVM_STATS_OFFSET = 64
+SLOTS = 8
+SLOT_SIZE = 192
+
+DIFFICULTIES = 4  # EASY, NORMAL, HARD, ADAPTIVE
+ACTIONS = 4
+TOP = 3
+
+_MAGIC = 0x5A
+_VERSION = 2
+# magic, version, sequence | top scores (score, difficulty) x3
+# | per difficulty: games, wins, best level | per difficulty x action: successes, failures, reaction ms
+# | checksum
+_FORMAT = "<BBH" + "BB" * TOP + "HHB" * DIFFICULTIES + "HHL" * (DIFFICULTIES * ACTIONS) + "H"
+RECORD_SIZE = struct.calcsize(_FORMAT)
+_HEADER = "<BBH"
+
+
+def _checksum(buffer, length):
+    total = 0
+    for i in range(length):
+        total += buffer[i]
+    return total & 0xFFFF
+
+
+def _nvm():
+    try:
+        import microcontroller
+        return microcontroller.nvm
+    except (ImportError, AttributeError):
+        return None
+
+
+class ScoreStore:
+    """In-RAM statistics with journalled, batched NVM writes"""
+
+    def __init__(self, persist=True):
+        self.top_scores = array("B", [0] * TOP)
+        self.top_difficulties = array("B", [0] * TOP)
+        self.games = array("H", [0] * DIFFICULTIES)
+        self.wins = array("H", [0] * DIFFICULTIES)
+        self.best_level = array("B", [0] * DIFFICULTIES)
+        self.successes = array("H", [0] * (DIFFICULTIES * ACTIONS))
+        self.failures = array("H", [0] * (DIFFICULTIES * ACTIONS))
+        self.reaction_ms = array("L", [0] * (DIFFICULTIES * ACTIONS))
+        self.sequence = 0
+        self.slot = -1  # Slot of the last record read or written
+        self.dirty = False
+        self.writes = 0
+        self._buffer = bytearray(RECORD_SIZE)
+        self._nvm = _nvm() if persist else None
+        self.slots = 0
+        if self._nvm is not None:
+            self.slots = min(SLOTS, (len(self._nvm) - NVM_STATS_OFFSET) // SLOT_SIZE)
+        self.load()
+
+    # ---------- Recording (RAM only) ----------
+
+    def record_action(self, difficulty, action, reaction_ms):
+        index = difficulty * ACTIONS + action
+        if self.successes[index] < 0xFFFF:
+            self.successes[index] += 1
+            self.reaction_ms[index] = min(self.reaction_ms[index] + reaction_ms, 0xFFFFFFFF)
+        self.dirty = True
+
+    def record_failure(self, difficulty, action):
+        index = difficulty * ACTIONS + action
+        if self.failures[index] < 0xFFFF:
+            self.failures[index] += 1
+        self.dirty = True
+
+    def finish_game(self, difficulty, score, level_reached, won):
+        """Count a finished game; returns the high-score rank (1-3) or 0"""
+        if self.games[difficulty] < 0xFFFF:
+            self.games[difficulty] += 1
+            if won:
+                self.wins[difficulty] += 1
+        if level_reached > self.best_level[difficulty]:
+            self.best_level[difficulty] = level_reached
+        self.dirty = True
+        rank = 0
+        for i in range(TOP):
+            if score > self.top_scores[i]:
+                rank = i + 1
+                break
+        if rank:
+            for i in range(TOP - 1, rank - 1, -1):
+                self.top_scores[i] = self.top_scores[i - 1]
+                self.top_difficulties[i] = self.top_difficulties[i - 1]
+            self.top_scores[rank - 1] = score
+            self.top_difficulties[rank - 1] = difficulty
+        return rank
+
+    def average_reaction_ms(self, difficulty, action):
+        """Average reaction time of an action (difficulty None: over all difficulties)"""
+        if difficulty is None:
+            count = total = 0
+            for index in range(action, DIFFICULTIES * ACTIONS, ACTIONS):
+                count += self.successes[index]
+                total += self.reaction_ms[index]
+            return total // count if count else 0
+        index = difficulty * ACTIONS + action
+        count = self.successes[index]
+        return self.reaction_ms[index] // count if count else 0
+
+    def total_games(self):
+        return sum(self.games)
+
+    def total_wins(self):
+        return sum(self.wins)
+
+    # ---------- NVM ----------
+
+    def _slot_offset(self, slot):
+        return NVM_STATS_OFFSET + slot * SLOT_SIZE
+
+    def load(self):
+        """Read the newest valid record (compares SLOTS headers, reads one record)"""
+        nvm = self._nvm
+        if not self.slots:
+            return False
+        candidates = []
+        for slot in range(self.slots):
+            offset = self._slot_offset(slot)
+            magic, version, sequence = struct.unpack_from(_HEADER, nvm[offset:offset + 4])
+            if magic == _MAGIC and version == _VERSION:
+                candidates.append((sequence, slot))
+        if not candidates:
+            return False
+        # Newest first; sequence numbers wrap at 16 bits, so order them
+        # relative to half a period behind the largest one
+        base = max(candidates)[0] + 0x8000
+        candidates.sort(key=lambda item: (item[0] - base) & 0xFFFF, reverse=True)
+        for sequence, slot in candidates:
+            offset = self._slot_offset(slot)
+            self._buffer[:] = nvm[offset:offset + RECORD_SIZE]
+            if self._unpack():
+                self.sequence = sequence
+                self.slot = slot
+                return True
+        return False
+
+    def _unpack(self):
+        values = struct.unpack_from(_FORMAT, self._buffer)
+        if values[-1] != _checksum(self._buffer, RECORD_SIZE - 2):
+            return False
+        i = 3
+        for rank in range(TOP):
+            self.top_scores[rank] = values[i]
+            self.top_difficulties[rank] = values[i + 1]
+            i += 2
+        for difficulty in range(DIFFICULTIES):
+            self.games[difficulty] = values[i]
+            self.wins[difficulty] = values[i + 1]
+            self.best_level[difficulty] = values[i + 2]
+            i += 3
+        for index in range(DIFFICULTIES * ACTIONS):
+            self.successes[index] = values[i]
+            self.failures[index] = values[i + 1]
+            self.reaction_ms[index] = values[i + 2]
+            i += 3
+        return True
+
+    def _pack(self):
+        values = [_MAGIC, _VERSION, self.sequence]
+        for rank in range(TOP):
+            values.append(self.top_scores[rank])
+            values.append(self.top_difficulties[rank])
+        for difficulty in range(DIFFICULTIES):
+            values.append(self.games[difficulty])
+            values.append(self.wins[difficulty])
+            values.append(self.best_level[difficulty])
+        for index in range(DIFFICULTIES * ACTIONS):
+            values.append(self.successes[index])
+            values.append(self.failures[index])
+            values.append(self.reaction_ms[index])
+        values.append(0)
+        struct.pack_into(_FORMAT, self._buffer, 0, *values)
+        struct.pack_into("<H", self._buffer, RECORD_SIZE - 2, _checksum(self._buffer, RECORD_SIZE - 2))
+
+    def commit(self):
+        """Write pending changes to the next slot (call at the result screen only)"""
+        if not self.dirty or not self.slots:
+            return False
+        self.sequence = (self.sequence + 1) & 0xFFFF
+        self.slot = (self.slot + 1) % self.slots
+        self._pack()
+        offset = self._slot_offset(self.slot)
+        self._nvm[offset:offset + RECORD_SIZE] = self._buffer
+        self.dirty = False
+        self.writes += 1
+        return True
@@ -0,0 +1,371 @@
+"""
+Screens and the boot animation
+
+Every screen is built once on first use and kept resident; later visits
+only change the label texts that differ, through the renderer, so its
+damage tracking sees exactly what changed. setup() hands over the
+renderer, the LED and sound engines (boot animation) and the score store
+(high scores) before the first screen is built.
+
+adafruit_display_text is the heaviest import, so load_display_text()
+pulls it in only after the LEDs are on; sprites are imported on first use.
+"""
+import asyncio
+import displayio
+import terminalio
+from leds import PINK, CYAN, YELLOW
+import sound
+
+DIFFICULTIES = ("EASY", "NORMAL", "HARD", "ADAPTIVE")  # ADAPTIVE: deadlines follow the player's reaction times
+
+renderer = None
+leds = None
+sounds = None
+score_store = None
+label = None
+
+def setup(screen_renderer, led_engine, sound_engine, store):
+    """Hand over the objects the screens draw with (call before the first screen)"""
+    global renderer, leds, sounds, score_store
+    renderer = screen_renderer
+    leds = led_engine
+    sounds = sound_engine
+    score_store = store
+
+def load_display_text():
+    """Import the label library on first use"""
+    global label
+    if label is None:
+        from adafruit_display_text import label as text_label
+        label = text_label
+
+# ==================== Boot animation ====================
+
+async def show_squid_game_title_zoom():
+    """Display SQUID GAME text with zoom-in animation"""
+    # Pink lighting
+    leds.set(PINK)
+    
+    # Zoom animation: gradually scale from 1 to 3
+    # Use more steps with shorter display time to make changes more noticeable
+    for scale in range(1, 4):  # 1, 2, 3
+        group = displayio.Group()
+        
+        # Adjust position based on scale to keep centered
+        if scale == 1:
+            x1, y1 = 42, 25
+            x2, y2 = 46, 40
+        elif scale == 2:
+            x1, y1 = 28, 20
+            x2, y2 = 34, 44
+        else:  # scale == 3
+            x1, y1 = 14, 15
+            x2, y2 = 22, 45
+        
+        # First line: SQUID
+        title1 = label.Label(terminalio.FONT, text="SQUID", x=x1, y=y1, scale=scale)
+        group.append(title1)
+        
+        # Second line: GAME
+        title2 = label.Label(terminalio.FONT, text="GAME", x=x2, y=y2, scale=scale)
+        group.append(title2)
+        
+        renderer.show(group)
+        await asyncio.sleep(0.3)  # Display each size longer to make changes more noticeable
+    
+    # Keep large text displayed for a moment
+    await asyncio.sleep(0.4)
+
+async def play_boot_animation():
+    """Play Squid Game-style boot animation"""
+    import sprites
+    
+    # Phase 1: Pink light flashing
+    leds.flash(PINK, on=0.2, off=0.2, count=3)
+    await asyncio.sleep(1.2)
+    
+    # Phase 2: Display SQUID GAME zoom animation
+    await show_squid_game_title_zoom()
+    
+    # Phase 3: Display triangle, circle, square guard symbols in sequence (cached 1-bit sprites)
+    
+    symbols_data = [
+        # Triangle
+        {
+            "type": sprites.TRIANGLE,
+            "size": 35,
+            "color": PINK
+        },
+        # Circle
+        {
+            "type": sprites.CIRCLE,
+            "size": 36,
+            "color": CYAN
+        },
+        # Square
+        {
+            "type": sprites.SQUARE,
+            "size": 36,
+            "color": YELLOW
+        }
+    ]
+    
+    for symbol_data in symbols_data:
+        group = displayio.Group()
+        
+        # Hollow symbol centered on screen (one TileGrid instead of ~100 vectorio dots)
+        group.append(sprites.make_symbol(symbol_data["type"], 64, 32, symbol_data["size"]))
+        
+        renderer.show(group)
+        
+        # Corresponding color light effect
+        leds.set(symbol_data["color"])
+        await asyncio.sleep(0.6)
+    
+    
+    # Phase 4: Display number and countdown
+    for countdown in range(3, 0, -1):
+        group = displayio.Group()
+        
+        # Number 456 (protagonist's number)
+        number_label = label.Label(terminalio.FONT, text="No.456", x=42, y=15, scale=1)
+        group.append(number_label)
+        
+        # Countdown
+        count_label = label.Label(terminalio.FONT, text=str(countdown), x=58, y=40, scale=2)
+        group.append(count_label)
+        
+        renderer.show(group)
+        
+        # Countdown lighting: all pink, one beep per number
+        leds.set(PINK)
+        sounds.play(sound.COUNTDOWN)
+        
+        await asyncio.sleep(0.6)
+    
+    # Phase 5: START flashing
+    leds.flash(PINK, on=0.3, off=0.3, count=2)
+    sounds.play(sound.GO)
+    for _ in range(2):
+        group = displayio.Group()
+        start_label = label.Label(terminalio.FONT, text="START!", x=45, y=32, scale=1)
+        group.append(start_label)
+        renderer.show(group)
+        await asyncio.sleep(0.6)
+
+# ==================== Screens ====================
+
+# Screens are built once and kept resident; later visits only change what differs
+splash_screen = None
+
+def create_splash_screen():
+    """Create splash screen - Squid Game theme (built once)"""
+    global splash_screen
+    if splash_screen is not None:
+        return splash_screen
+    group = displayio.Group()
+    
+    # Game title
+    title_label = label.Label(terminalio.FONT, text="SQUID GAME", x=32, y=10, scale=1)
+    group.append(title_label)
+    
+    # Subtitle
+    subtitle_label = label.Label(terminalio.FONT, text="ACTION RUSH", x=28, y=25, scale=1)
+    group.append(subtitle_label)
+    
+    # Prize pool
+    prize_label = label.Label(terminalio.FONT, text="$1 MILLION", x=32, y=40, scale=1)
+    group.append(prize_label)
+    
+    # Hint
+    hint_label = label.Label(terminalio.FONT, text="Press to Start", x=23, y=55, scale=1)
+    group.append(hint_label)
+    
+    splash_screen = group
+    return group
+
+class DifficultyScreen:
+    """
+    Difficulty selection screen with icons - built once
+
+    Every option has both a large and a small icon; changing the selection
+    only moves the pointer, swaps which icon is hidden and shifts the name,
+    so spinning through the menu creates no new objects.
+    """
+    def __init__(self):
+        import sprites
+        self.group = displayio.Group()
+        
+        # Title
+        self.group.append(label.Label(terminalio.FONT, text="SELECT MODE", x=30, y=8, scale=1))
+        
+        # Pointer, moved to the selected row
+        self.pointer_label = label.Label(terminalio.FONT, text=">", x=20, y=22, scale=2)
+        self.group.append(self.pointer_label)
+        
+        # Difficulty icons and row positions (ADAPTIVE has no guard symbol)
+        self.rows = []
+        icons = (sprites.TRIANGLE, sprites.CIRCLE, sprites.SQUARE, None)
+        for symbol, name, y in zip(icons, DIFFICULTIES, (22, 33, 44, 55)):
+            large_icon = small_icon = None
+            if symbol is not None:
+                large_icon = sprites.make_symbol(symbol, 42, y, 9)
+                small_icon = sprites.make_symbol(symbol, 38, y, 5)
+                self.group.append(large_icon)
+                self.group.append(small_icon)
+            name_label = label.Label(terminalio.FONT, text=name, x=48, y=y, scale=1)
+            self.group.append(name_label)
+            self.rows.append((large_icon, small_icon, name_label, y))
+        self.selected = None
+    
+    def select(self, index):
+        """Highlight one option: large icon, name and pointer"""
+        if index == self.selected:
+            return
+        if self.selected is not None:
+            self._invalidate_row(self.selected)
+        for i, (large_icon, small_icon, name_label, y) in enumerate(self.rows):
+            selected = i == index
+            if large_icon is not None:
+                large_icon.hidden = not selected
+                small_icon.hidden = selected
+            name_label.x = 55 if selected else 48
+        self.pointer_label.y = self.rows[index][3]
+        self.selected = index
+        self._invalidate_row(index)
+    
+    def _invalidate_row(self, index):
+        y = self.rows[index][3]
+        renderer.invalidate(0, y - 6, 128, 12)
+
+difficulty_screen = None
+
+def create_difficulty_screen(selected):
+    """Show the difficulty screen with the given selection"""
+    global difficulty_screen
+    if difficulty_screen is None:
+        difficulty_screen = DifficultyScreen()
+    difficulty_screen.select(selected)
+    return difficulty_screen.group
+
+class GameHUD:
+    """
+    Persistent game screen - built once, then only changed labels are updated
+
+    Each setter compares against the last shown value and only touches the
+    label text when it differs, so the renderer only sees real changes.
+    Time is quantized to 0.1 s (the precision shown on screen).
+    """
+    def __init__(self, total_levels):
+        self.total_levels = total_levels
+        self.group = displayio.Group()
+        self.level_label = label.Label(terminalio.FONT, text="LEVEL:", x=10, y=10, scale=1)
+        self.action_label = label.Label(terminalio.FONT, text="DO:", x=10, y=25, scale=1)
+        self.time_label = label.Label(terminalio.FONT, text="TIME:", x=10, y=40, scale=1)
+        self.score_label = label.Label(terminalio.FONT, text="SCORE:", x=10, y=55, scale=1)
+        self.group.append(self.level_label)
+        self.group.append(self.action_label)
+        self.group.append(self.time_label)
+        self.group.append(self.score_label)
+        self.updates = 0  # Number of label text changes (the renderer coalesces them into frames)
+        self.reset()
+
+    def reset(self):
+        """Forget shown values so the next setters redraw every label"""
+        self._level = None
+        self._action = None
+        self._time_tenths = None
+        self._score = None
+
+    def set_level(self, level):
+        if level != self._level:
+            self._level = level
+            renderer.set_text(self.level_label, f"LEVEL: {level}/{self.total_levels}")
+            self.updates += 1
+
+    def set_action(self, text):
+        if text is not self._action:  # Labels are precompiled strings, identity is enough
+            self._action = text
+            renderer.set_text(self.action_label, "DO: " + text)
+            self.updates += 1
+
+    def set_time(self, seconds):
+        tenths = int(seconds * 10 + 0.5)  # Same rounding as f"{seconds:.1f}"
+        if tenths != self._time_tenths:
+            self._time_tenths = tenths
+            renderer.set_text(self.time_label, f"TIME: {tenths // 10}.{tenths % 10}s")
+            self.updates += 1
+
+    def set_score(self, value):
+        if value != self._score:
+            self._score = value
+            renderer.set_text(self.score_label, f"SCORE: {value}")
+            self.updates += 1
+
+game_hud = None
+
+def create_game_screen(total_levels):
+    """Game screen (built once, reused for every level); the caller fills in the values"""
+    global game_hud
+    if game_hud is None:
+        game_hud = GameHUD(total_levels)
+    game_hud.reset()
+    return game_hud
+
+result_screen = None
+
+def create_result_screen(success, score):
+    """Create result screen (built once, texts updated per game)"""
+    global result_screen
+    if result_screen is None:
+        group = displayio.Group()
+        group.append(label.Label(terminalio.FONT, text="", x=30, y=15, scale=1))
+        group.append(label.Label(terminalio.FONT, text="", x=30, y=35, scale=1))
+        group.append(label.Label(terminalio.FONT, text="BTN:RETRY ROT:MENU", x=10, y=50, scale=1))
+        result_screen = group
+    result_label = result_screen[0]
+    score_label = result_screen[1]
+    
+    if success:
+        result_label.x = 40
+        renderer.set_text(result_label, "YOU WIN!")
+        renderer.set_text(score_label, f"Prize:{score}pts")
+    else:
+        result_label.x = 30
+        renderer.set_text(result_label, "ELIMINATED")
+        renderer.set_text(score_label, f"Score:{score}pts")
+    
+    return result_screen
+
+class StatsScreen:
+    """High scores and game count - built once, texts come from score_store (RAM)"""
+    def __init__(self):
+        self.group = displayio.Group()
+        self.group.append(label.Label(terminalio.FONT, text="HIGH SCORES", x=30, y=8, scale=1))
+        self.rank_labels = []
+        for y in (22, 34, 46):
+            rank_label = label.Label(terminalio.FONT, text="", x=22, y=y, scale=1)
+            self.group.append(rank_label)
+            self.rank_labels.append(rank_label)
+        self.games_label = label.Label(terminalio.FONT, text="", x=10, y=58, scale=1)
+        self.group.append(self.games_label)
+
+    def refresh(self):
+        for rank, rank_label in enumerate(self.rank_labels):
+            points = score_store.top_scores[rank]
+            if points:
+                text = f"{rank + 1}. {points:3d} {DIFFICULTIES[score_store.top_difficulties[rank]]}"
+            else:
+                text = f"{rank + 1}.   -"
+            renderer.set_text(rank_label, text)
+        renderer.set_text(self.games_label, f"GAMES:{score_store.total_games()} WINS:{score_store.total_wins()}")
+
+stats_screen = None
+
+def create_stats_screen():
+    """Show high scores and totals (built once)"""
+    global stats_screen
+    if stats_screen is None:
+        stats_screen = StatsScreen()
+    stats_screen.refresh()
+    return stats_screen.group
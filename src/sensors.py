@@ -0,0 +1,262 @@
+"""
+ADXL345 sensor service
+
+Talks to the accelerometer register by register instead of polling
+accelerometer.events / accelerometer.acceleration every loop. The chip's own
+tap and activity interrupts and its FIFO do the work:
+
+- single tap and activity are routed to INT1; the INT1 line is edge-captured
+  by keypad.Keys in the background, so update() touches the I2C bus only when
+  the chip has something to report
+- the FIFO runs in stream mode at a configurable rate (default 200 Hz) and
+  keeps the last 32 samples; while streaming is on (SHAKE levels) a watermark
+  interrupt drains them in one go, straight into a preallocated array
+
+The game says what it is waiting for with watch(); when it waits for
+nothing, all interrupts are off and update() never touches the bus. Without
+an INT pin the service falls back to reading INT_SOURCE at most every
+poll_interval seconds, and only while watching.
+"""
+from array import array
+
+ADDRESS = 0x53
+
+# Registers
+_THRESH_TAP = 0x1D
+_DUR = 0x21
+_LATENT = 0x22
+_WINDOW = 0x23
+_THRESH_ACT = 0x24
+_ACT_INACT_CTL = 0x27
+_TAP_AXES = 0x2A
+_BW_RATE = 0x2C
+_POWER_CTL = 0x2D
+_INT_ENABLE = 0x2E
+_INT_MAP = 0x2F
+_INT_SOURCE = 0x30
+_DATA_FORMAT = 0x31
+_DATAX0 = 0x32
+_FIFO_CTL = 0x38
+_FIFO_STATUS = 0x39
+
+# Interrupt bits
+INT_SINGLE_TAP = 0x40
+INT_ACTIVITY = 0x10
+INT_WATERMARK = 0x02
+
+FIFO_SIZE = 32
+_FIFO_STREAM = 0x80
+
+# Full resolution keeps 4 mg per count in every range
+G_PER_COUNT = 0.004
+STANDARD_GRAVITY = 9.80665
+MS2_PER_COUNT = G_PER_COUNT * STANDARD_GRAVITY
+
+# DC activity threshold that starts the FIFO stream: 62.5 mg per count,
+# 6 = 0.375 g, the X/Y component of gravity at ~22 degrees of tilt
+ACTIVITY_THRESHOLD = 6
+G_PER_ACTIVITY_COUNT = 0.0625
+
+# BW_RATE codes for the supported output data rates (Hz)
+_RATE_CODES = {25: 0x08, 50: 0x09, 100: 0x0A, 200: 0x0B, 400: 0x0C, 800: 0x0D}
+
+
+class AccelService:
+    """
+    Event-driven ADXL345 access
+
+    Call update() from the input loop. Taps are latched and read with
+    take_tap(); while watching for shakes, FIFO samples collect in samples
+    (raw x, y, z counts, interleaved) and are read with take_samples().
+    """
+
+    def __init__(self, i2c, int_pin=None, address=ADDRESS, rate=200, tap_threshold=20,
+                 activity_threshold=ACTIVITY_THRESHOLD, watermark=8, poll_interval=0.02):
+        self.i2c = i2c
+        self.address = address
+        self.watermark = watermark
+        # Activity threshold (62.5 mg/count) in 4 mg data counts
+        self.activity_limit = int(activity_threshold * G_PER_ACTIVITY_COUNT / G_PER_COUNT)
+        self.rate = rate  # Output data rate in Hz
+        self.samples = array("h", bytes(2 * 3 * FIFO_SIZE))
+        # One x, y, z slot per FIFO entry: the chip's little-endian data lands
+        # in samples as-is, with no decoding and no allocation per read
+        view = memoryview(self.samples)
+        self._slots = [view[3 * i:3 * i + 3] for i in range(FIFO_SIZE)]
+        self.sample_count = 0
+        self.sample_time = 0  # time.monotonic() of the last FIFO drain
+        self.transactions = 0  # I2C transactions issued, for profiling
+        self.poll_interval = poll_interval
+        self.watching_tap = False
+        self.streaming = False
+        self._next_poll = 0
+        self._tap = False
+        self._active = False
+        self._int_enable = 0
+        self._byte = bytearray(1)
+        self._pair = bytearray(2)
+        self._register = bytearray(1)
+
+        self._keys = None
+        if int_pin is not None:
+            import keypad
+            # INT1 is active high; the key "press" is the rising edge
+            self._keys = keypad.Keys((int_pin,), value_when_pressed=True, pull=False)
+            self._event = keypad.Event()
+
+        # Measurement mode, full resolution
+        self._write(_POWER_CTL, 0x00)
+        self._write(_DATA_FORMAT, 0x0B)
+        self.set_rate(rate)
+
+        # Single tap on all axes (same settings as enable_tap_detection())
+        self._write(_THRESH_TAP, tap_threshold)
+        self._write(_DUR, 50)
+        self._write(_LATENT, 20)
+        self._write(_WINDOW, 255)
+        self._write(_TAP_AXES, 0x07)
+
+        # DC-coupled activity on X and Y: fires when the board tilts past
+        # ~22 deg (ACTIVITY_THRESHOLD; shake.MIN_THRESHOLD keeps shakes above it)
+        self._write(_THRESH_ACT, activity_threshold)
+        self._write(_ACT_INACT_CTL, 0x60)
+
+        # FIFO in stream mode, everything on INT1
+        self._write(_FIFO_CTL, _FIFO_STREAM | (watermark & 0x1F))
+        self._write(_INT_MAP, 0x00)
+        self._write(_INT_ENABLE, 0x00)
+        self._write(_POWER_CTL, 0x08)
+
+    # ==================== Register access ====================
+
+    def _write(self, register, value):
+        self._pair[0] = register
+        self._pair[1] = value
+        while not self.i2c.try_lock():
+            pass
+        try:
+            self.i2c.writeto(self.address, self._pair)
+        finally:
+            self.i2c.unlock()
+        self.transactions += 1
+
+    def _read_byte(self, register):
+        self._register[0] = register
+        while not self.i2c.try_lock():
+            pass
+        try:
+            self.i2c.writeto_then_readfrom(self.address, self._register, self._byte)
+        finally:
+            self.i2c.unlock()
+        self.transactions += 1
+        return self._byte[0]
+
+    def _set_interrupts(self, mask):
+        if mask != self._int_enable:
+            self._int_enable = mask
+            self._write(_INT_ENABLE, mask)
+
+    # ==================== Service ====================
+
+    def set_rate(self, rate):
+        """Set the output data rate (25-800 Hz) used for FIFO samples"""
+        if rate not in _RATE_CODES:
+            raise ValueError("Unsupported data rate: %d Hz" % rate)
+        self.rate = rate
+        self._write(_BW_RATE, _RATE_CODES[rate])
+
+    def watch(self, tap=False, shake=False):
+        """Choose what to listen for; with neither, the bus stays idle"""
+        self.watching_tap = tap
+        self.streaming = shake
+        self._active = False
+        self._tap = False
+        self.sample_count = 0
+        self._update_interrupts()
+        if self._int_enable:
+            # Clear anything latched while we were not listening
+            self._read_byte(_INT_SOURCE)
+
+    def _update_interrupts(self):
+        mask = INT_SINGLE_TAP if self.watching_tap else 0
+        if self.streaming:
+            # Drain the FIFO while the board moves, otherwise wait for movement
+            mask |= INT_WATERMARK if self._active else INT_ACTIVITY
+        self._set_interrupts(mask)
+
+    def update(self, now):
+        """Handle pending interrupts; returns True if the chip was read"""
+        if not self._int_enable:
+            return False
+        if self._keys is not None:
+            # No edge on INT1: nothing to read, no bus traffic
+            if not self._keys.events.get_into(self._event):
+                return False
+            while self._keys.events.get_into(self._event):
+                pass
+        elif now < self._next_poll:
+            return False
+        else:
+            self._next_poll = now + self.poll_interval
+
+        source = self._read_byte(_INT_SOURCE) & self._int_enable
+        if source & INT_SINGLE_TAP:
+            self._tap = True
+        if self.streaming:
+            if source & INT_ACTIVITY and not self._active:
+                # Board moved: stream the FIFO until it settles again
+                self._active = True
+                self._update_interrupts()
+            if self._active:
+                self._drain(now)
+        return True
+
+    def _drain(self, now):
+        """Read every FIFO entry into samples (oldest first)"""
+        entries = min(self._read_byte(_FIFO_STATUS) & 0x3F, FIFO_SIZE)
+        count = self.sample_count
+        if count + entries > FIFO_SIZE:
+            count = 0  # Consumer fell behind: keep the newest samples
+        end = count + entries
+
+        # The ADXL345 pops one entry per 6-byte read of DATAX0..DATAZ1 (a longer
+        # read runs into FIFO_CTL), so the batch is one bus lock with back to
+        # back reads into the preallocated slots
+        i2c = self.i2c
+        address = self.address
+        register = self._register
+        slots = self._slots
+        register[0] = _DATAX0
+        while not i2c.try_lock():
+            pass
+        try:
+            for i in range(count, end):
+                i2c.writeto_then_readfrom(address, register, slots[i])
+        finally:
+            i2c.unlock()
+        self.transactions += entries
+        self.sample_count = end
+        self.sample_time = now
+
+        # Still tilted or moving? Otherwise go back to waiting for activity
+        samples = self.samples
+        limit = self.activity_limit
+        for i in range(3 * count, 3 * end, 3):
+            if abs(samples[i]) > limit or abs(samples[i + 1]) > limit:
+                return
+        if entries:
+            self._active = False
+            self._update_interrupts()
+
+    def take_tap(self):
+        """Return True once for every tap the chip reported"""
+        tap = self._tap
+        self._tap = False
+        return tap
+
+    def take_samples(self):
+        """Return how many samples are waiting in samples and mark them read"""
+        count = self.sample_count
+        self.sample_count = 0
+        return count
+
@@ -0,0 +1,467 @@
+"""
+Session record and replay
+
+Record mode logs everything the game reads from the hardware, below the
+detection code, so a captured session can be fed back through the same
+state machine later:
+
+- the RNG seed, the warm-boot flag and the saved reaction averages that
+  seed the ADAPTIVE model (header)
+- button level changes
+- raw encoder detents before the bounce filter, with the gap to the
+  previous detent (the filter only looks at gaps)
+- tap flags and raw ADXL345 FIFO batches before filtering and tilt checks
+- how long each accelerometer call that used the I2C bus took, so the
+  replay holds the calling task for as long and keeps the same timing
+
+Records are "time since the previous record (ms), kind" plus a small
+payload, collected in a RAM buffer and appended to the file only when the
+game is idle (flush()), like the event log. The flash must be writable by
+the game for that: hold the button during reset (see boot.py).
+
+Replay mode swaps the encoder, button and accelerometer for stand-ins fed
+from the file at the recorded times; display and LEDs stay real. The
+input task polls on the same grid as in the recording, so each record is
+applied at the poll that recorded it. On the board that runs in real
+time; tools/simulator.py --replay runs it on a virtual clock, many times
+faster and with the recorded timing exactly. NVM is left alone while
+replaying.
+
+Set MODE before code.py runs (the simulator does it from the command line).
+"""
+import struct
+from array import array
+from encoder_input import EncoderInput, ticks_diff
+
+MODE = None  # None, "record" or "replay"
+PATH = "/session.bin"
+
+MAGIC = b"SGRS"
+VERSION = 2
+# magic, version, accel rate (Hz), RNG seed, warm boot, saved reaction average (ms) per action
+_HEADER = "<4sBHLB4H"
+HEADER_SIZE = struct.calcsize(_HEADER)
+# ms since the previous record, kind
+_RECORD = "<HB"
+RECORD_SIZE = struct.calcsize(_RECORD)
+
+# Record kinds
+BUTTON_UP = 0
+BUTTON_DOWN = 1
+DETENT = 2  # step (b), ms since the previous raw detent (h)
+TAP = 3
+SAMPLES = 4  # count (B), count x (x, y, z) int16
+SKIP = 5  # Only advances the time (gaps longer than 65535 ms)
+BUS_UPDATE = 6  # seconds (d) an accelerometer update spent on the bus
+BUS_WATCH = 7  # seconds (d) an accelerometer watch spent on the bus
+
+_DETENT = "<bh"
+_BUS = "<d"
+_MAX_DELTA = 0xFFFF
+_MAX_GAP = 0x7FFF
+FIFO_SIZE = 32
+_MAX_RECORD = RECORD_SIZE + 1 + 6 * FIFO_SIZE
+
+
+def new_seed():
+    """A fresh RNG seed (drawn from the RNG itself, which the board seeds at boot)"""
+    from random import getrandbits
+    return getrandbits(32)
+
+
+# ==================== Recording ====================
+
+class SessionRecorder:
+    """Buffers raw input records and appends them to the session file"""
+
+    def __init__(self, path, clock, buffer_size=4096):
+        self.path = path
+        self.clock = clock
+        self.active = False
+        self.records = 0
+        self.bytes_written = 0
+        self.forced_flushes = 0  # Buffer ran full while the game was busy
+        self._buffer = bytearray(buffer_size)
+        self._fill = 0
+        self._start_ms = 0
+        self._last_ms = 0
+        self._detent_time = None
+
+    def start(self, now, seed, warm, rate, averages):
+        """Write the header (raises OSError if the flash is read-only) and start recording"""
+        header = struct.pack(_HEADER, MAGIC, VERSION, rate, seed, 1 if warm else 0, *averages)
+        with open(self.path, "wb") as file:
+            file.write(header)
+        self.bytes_written = HEADER_SIZE
+        self._start_ms = int(now * 1000 + 0.5)
+        self._last_ms = 0
+        self.active = True
+
+    def _record(self, now, kind, payload_size=0):
+        """Append a record header; returns the payload offset in the buffer"""
+        if self._fill + _MAX_RECORD > len(self._buffer):
+            self.forced_flushes += 1
+            self.flush()
+        ms = max(int(now * 1000 + 0.5) - self._start_ms, self._last_ms)
+        delta = ms - self._last_ms
+        while delta > _MAX_DELTA:
+            struct.pack_into(_RECORD, self._buffer, self._fill, _MAX_DELTA, SKIP)
+            self._fill += RECORD_SIZE
+            delta -= _MAX_DELTA
+        struct.pack_into(_RECORD, self._buffer, self._fill, delta, kind)
+        self._last_ms = ms
+        offset = self._fill + RECORD_SIZE
+        self._fill = offset + payload_size
+        self.records += 1
+        return offset
+
+    def button(self, now, value):
+        if self.active:
+            self._record(now, BUTTON_UP if value else BUTTON_DOWN)
+
+    def detent(self, timestamp, step):
+        """EncoderInput listener: raw detent with its ticks timestamp"""
+        if not self.active:
+            return
+        if self._detent_time is None:
+            gap = _MAX_GAP
+        else:
+            gap = min(max(ticks_diff(timestamp, self._detent_time), 0), _MAX_GAP)
+        self._detent_time = timestamp
+        offset = self._record(self.clock.monotonic(), DETENT, 3)
+        struct.pack_into(_DETENT, self._buffer, offset, step, gap)
+
+    def tap(self, now):
+        if self.active:
+            self._record(now, TAP)
+
+    def bus(self, now, kind, seconds):
+        """An accelerometer call (BUS_UPDATE or BUS_WATCH) starting at now used the bus for seconds"""
+        if self.active:
+            offset = self._record(now, kind, 8)
+            struct.pack_into(_BUS, self._buffer, offset, seconds)
+
+    def samples(self, now, samples, count):
+        if not self.active:
+            return
+        buffer = self._buffer
+        offset = self._record(now, SAMPLES, 1 + 6 * count)
+        buffer[offset] = count
+        offset += 1
+        for i in range(3 * count):
+            struct.pack_into("<h", buffer, offset, samples[i])
+            offset += 2
+
+    def flush(self):
+        """Append buffered records to the file (call while the game is idle)"""
+        if not self._fill:
+            return
+        with open(self.path, "ab") as file:
+            file.write(memoryview(self._buffer)[:self._fill])
+        self.bytes_written += self._fill
+        self._fill = 0
+
+
+class RecordingButton:
+    """Button wrapper that records level changes"""
+
+    def __init__(self, button, recorder):
+        self._button = button
+        self._recorder = recorder
+        self._last = None
+
+    @property
+    def value(self):
+        value = self._button.value
+        if value != self._last and self._recorder.active:
+            self._last = value
+            self._recorder.button(self._recorder.clock.monotonic(), value)
+        return value
+
+
+class RecordingAccel:
+    """AccelService wrapper that records taps and raw FIFO batches"""
+
+    def __init__(self, service, recorder):
+        self._service = service
+        self._recorder = recorder
+        self.samples = service.samples
+
+    @property
+    def rate(self):
+        return self._service.rate
+
+    @property
+    def sample_time(self):
+        return self._service.sample_time
+
+    def _timed(self, kind, start, transactions):
+        """Record the time of a call that talked to the chip"""
+        if self._service.transactions != transactions:
+            recorder = self._recorder
+            recorder.bus(start, kind, recorder.clock.monotonic() - start)
+
+    def watch(self, tap=False, shake=False):
+        transactions = self._service.transactions
+        start = self._recorder.clock.monotonic()
+        self._service.watch(tap, shake)
+        self._timed(BUS_WATCH, start, transactions)
+
+    def update(self, now):
+        transactions = self._service.transactions
+        start = self._recorder.clock.monotonic()
+        read = self._service.update(now)
+        self._timed(BUS_UPDATE, start, transactions)
+        return read
+
+    def take_tap(self):
+        tap = self._service.take_tap()
+        if tap:
+            self._recorder.tap(self._recorder.clock.monotonic())
+        return tap
+
+    def take_samples(self):
+        count = self._service.take_samples()
+        if count:
+            self._recorder.samples(self._service.sample_time, self.samples, count)
+        return count
+
+
+class RecordingBackend:
+    """Hardware backend whose inputs are recorded"""
+
+    def __init__(self, backend, recorder):
+        self._backend = backend
+        self._recorder = recorder
+        self._accel = None
+        self.i2c = backend.i2c
+        self.bus = backend.bus
+        self.display = backend.display
+        self.pixels = backend.pixels
+        self.audio = backend.audio
+        self.encoder = backend.encoder
+        self.encoder.listener = recorder.detent
+        self.button = RecordingButton(backend.button, recorder)
+
+    @property
+    def accel_service(self):
+        if self._accel is None:
+            self._accel = RecordingAccel(self._backend.accel_service, self._recorder)
+        return self._accel
+
+
+# ==================== Replay ====================
+
+class SessionPlayer:
+    """Reads a session file and feeds its records to the replay inputs when they are due"""
+
+    def __init__(self, path, clock, chunk_size=512):
+        self.clock = clock
+        self._file = open(path, "rb")
+        header = self._file.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE:
+            raise ValueError("Not a session file: " + path)
+        fields = struct.unpack(_HEADER, header)
+        if fields[0] != MAGIC or fields[1] != VERSION:
+            raise ValueError("Not a session file: " + path)
+        self.rate = fields[2]
+        self.seed = fields[3]
+        self.warm = bool(fields[4])
+        self.averages = fields[5:]
+        self.records = 0
+        self.done = False
+        self._finished_reported = False
+        self._chunk = bytearray(chunk_size)
+        self._pos = 0
+        self._end = 0
+        self._start_ms = None
+        self._due_ms = 0  # Session time of the next record
+        self._kind = None  # Kind of the next record (None: not read yet)
+        self._detent_ticks = 0
+
+        self.button_value = True  # Released
+        self.encoder = ReplayEncoder(self)
+        self.button = ReplayButton(self)
+        self.accel = ReplayAccel(self)
+
+    def start(self, now):
+        self._start_ms = int(now * 1000 + 0.5)
+
+    def _need(self, size):
+        """Make size bytes available at _pos; False at the end of the file"""
+        available = self._end - self._pos
+        if available >= size:
+            return True
+        chunk = self._chunk
+        chunk[0:available] = chunk[self._pos:self._end]
+        read = self._file.readinto(memoryview(chunk)[available:]) or 0
+        self._pos = 0
+        self._end = available + read
+        return self._end >= size
+
+    def _next(self):
+        """Read the header of the next record"""
+        if not self._need(RECORD_SIZE):
+            self.done = True
+            self._file.close()
+            return False
+        delta, self._kind = struct.unpack_from(_RECORD, self._chunk, self._pos)
+        self._pos += RECORD_SIZE
+        self._due_ms += delta
+        return True
+
+    def poll(self, now, bus=None):
+        """
+        Apply every record that is due at time now
+
+        A BUS_UPDATE or BUS_WATCH record is applied only by the accelerometer
+        call of that kind (bus, one record per call); other callers stop in
+        front of it while it is due this millisecond and drop it after that.
+        """
+        if self._start_ms is None or self.done:
+            return
+        ms = int(now * 1000 + 0.5) - self._start_ms
+        while True:
+            if self._kind is None and not self._next():
+                return
+            if self._due_ms > ms:
+                return
+            kind = self._kind
+            if kind == BUS_UPDATE or kind == BUS_WATCH:
+                if kind != bus:
+                    if self._due_ms == ms:
+                        return  # Its call is still to come
+                    # Its call never came: drop it
+                    if not self._need(8):
+                        return
+                    self._pos += 8
+                    self._kind = None
+                    continue
+                bus = None
+                self._apply(kind, now)
+                # Records made during the call (its tap, its samples) are due now
+                ms = int(self.clock.monotonic() * 1000 + 0.5) - self._start_ms
+            else:
+                self._apply(kind, now)
+            self._kind = None
+            self.records += 1
+
+    def _apply(self, kind, now):
+        chunk = self._chunk
+        if kind == BUTTON_UP or kind == BUTTON_DOWN:
+            self.button_value = kind == BUTTON_UP
+        elif kind == DETENT:
+            if not self._need(3):
+                return
+            step, gap = struct.unpack_from(_DETENT, chunk, self._pos)
+            self._pos += 3
+            # The bounce filter only compares gaps between detents
+            self._detent_ticks = self._due_ms if gap == _MAX_GAP else self._detent_ticks + gap
+            self.encoder.push(self._detent_ticks, step)
+        elif kind == TAP:
+            self.accel.tap = True
+        elif kind == BUS_UPDATE or kind == BUS_WATCH:
+            if not self._need(8):
+                return
+            seconds = struct.unpack_from(_BUS, chunk, self._pos)[0]
+            self._pos += 8
+            # Hold the calling task as the bus transfers did (time.sleep on
+            # the board, an exact clock step on the simulator's virtual clock)
+            self.clock.sleep(seconds)
+        elif kind == SAMPLES:
+            if not self._need(1):
+                return
+            count = chunk[self._pos]
+            if not self._need(1 + 6 * count):
+                return
+            # Drained now, as in the recording (the input task polls on the same grid)
+            self.accel.load(chunk, self._pos + 1, count, now)
+            self._pos += 1 + 6 * count
+
+    def take_finished(self):
+        """Return True once, after the last record was replayed"""
+        if self.done and not self._finished_reported:
+            self._finished_reported = True
+            return True
+        return False
+
+
+class ReplayButton:
+    """Button level from the session"""
+
+    def __init__(self, player):
+        self._player = player
+
+    @property
+    def value(self):
+        player = self._player
+        player.poll(player.clock.monotonic())
+        return player.button_value
+
+
+class ReplayEncoder(EncoderInput):
+    """Encoder fed with the session's raw detents; pop() filters them as usual"""
+
+    def __init__(self, player):
+        super().__init__(None, None)
+        self._player = player
+
+    def update(self):
+        player = self._player
+        player.poll(player.clock.monotonic())
+
+
+class ReplayAccel:
+    """Stand-in for AccelService with the session's taps and FIFO batches"""
+
+    def __init__(self, player):
+        self._player = player
+        self.rate = player.rate
+        self.samples = array("h", bytes(2 * 3 * FIFO_SIZE))
+        self.sample_count = 0
+        self.sample_time = 0
+        self.tap = False
+
+    def watch(self, tap=False, shake=False):
+        # The session only holds what the chip reported, and the bus time
+        player = self._player
+        player.poll(player.clock.monotonic(), BUS_WATCH)
+
+    def update(self, now):
+        self._player.poll(now, BUS_UPDATE)
+        return self.tap or self.sample_count > 0
+
+    def load(self, data, offset, count, sample_time):
+        start = self.sample_count
+        if start + count > FIFO_SIZE:
+            start = 0  # Consumer fell behind: keep the newest samples, as AccelService does
+        samples = self.samples
+        for i in range(3 * start, 3 * (start + count)):
+            samples[i] = struct.unpack_from("<h", data, offset)[0]
+            offset += 2
+        self.sample_count = start + count
+        self.sample_time = sample_time
+
+    def take_tap(self):
+        tap = self.tap
+        self.tap = False
+        return tap
+
+    def take_samples(self):
+        count = self.sample_count
+        self.sample_count = 0
+        return count
+
+
+class ReplayBackend:
+    """Hardware backend whose inputs come from a session file"""
+
+    def __init__(self, backend, player):
+        self.i2c = backend.i2c
+        self.bus = backend.bus
+        self.display = backend.display
+        self.pixels = backend.pixels
+        self.audio = backend.audio
+        self.encoder = player.encoder
+        self.button = player.button
+        self.accel_service = player.accel
@@ -0,0 +1,178 @@
+"""
+Shake detection on raw ADXL345 FIFO batches
+
+Samples go through a moving-average filter; a shake is the filtered tilt
+staying above threshold degrees (X or Y) for duration seconds. The tilt
+test runs on the filter's window sums with integer math (tilt.py).
+
+The three parameters can come from a calibration file written by
+tools/calibrate_shake.py (load_config(), CONFIG_PATH on the board).
+
+Samples only arrive once the ADXL345's activity interrupt has started the
+FIFO stream (sensors.py), so a threshold below that tilt is never reached:
+MIN_THRESHOLD is the lowest one accepted.
+"""
+import json
+import math
+from array import array
+from tilt import TiltDetector, calculate_angles
+from sensors import ACTIVITY_THRESHOLD, G_PER_ACTIVITY_COUNT
+
+CONFIG_PATH = "/shake.json"
+MIN_THRESHOLD = math.degrees(math.asin(ACTIVITY_THRESHOLD * G_PER_ACTIVITY_COUNT))  # ~22 deg
+MAX_WINDOW = 32  # One FIFO's worth of samples
+
+
+def load_config(path=CONFIG_PATH, threshold=30, duration=0.2, window=5):
+    """(threshold, duration, window) from the calibration file, or the given defaults"""
+    try:
+        with open(path) as file:
+            config = json.load(file)
+        values = (float(config.get("threshold", threshold)),
+                  float(config.get("duration", duration)),
+                  int(config.get("window", window)))
+    except OSError:
+        return threshold, duration, window  # No calibration file
+    except (ValueError, TypeError, AttributeError):
+        values = None
+    # A bad file must not stop the boot: warn and keep the defaults
+    if values is None or not (MIN_THRESHOLD <= values[0] < 90 and values[1] >= 0
+                              and 1 <= values[2] <= MAX_WINDOW):
+        print("Ignoring bad shake calibration in " + path)
+        return threshold, duration, window
+    return values
+
+# ==================== 新增：加速度计滤波器类 ====================
+
+class MovingAverageFilter:
+    """
+    移动平均滤波器 - 用于平滑加速度计数据
+    
+    原理：保存最近N个读数，返回它们的平均值
+    优点：可以有效减少噪声和抖动
+    
+    实现：预分配的 array('f') 环形缓冲区 + 每个轴的累计和
+          每个采样只做常数次加减，不再 append/pop(0)/sum()，
+          所以窗口变大（20-50）也不会变慢，内存大小固定
+    
+    参数：
+        size: 滤波窗口大小（保存多少个历史数据）
+              size越大越平滑，但响应越慢
+              建议值：3-50
+        typecode: 缓冲区类型，"f" 用于浮点数据；"h" 用于 ADXL345 原始
+                  整数读数，这时累计和也都是整数（精确、不漂移）
+    """
+    def __init__(self, size=5, typecode="f"):
+        self.size = size
+        self.values = array(typecode, [0] * (3 * size))  # x,y,z 交错存放的环形缓冲区
+        self.reset()
+    
+    def filter(self, x, y, z):
+        """
+        对新的加速度数据进行滤波
+        
+        参数：
+            x, y, z: 加速度计原始读数
+        
+        返回：
+            滤波后的 (x, y, z) 数据
+        """
+        self.add(x, y, z)
+        n = self.count
+        return self.sum_x / n, self.sum_y / n, self.sum_z / n
+    
+    def add(self, x, y, z):
+        """添加新数据，只更新累计和 sum_x/sum_y/sum_z（不计算平均值）"""
+        values = self.values
+        i = self.index
+        
+        # 窗口已满：从累计和中减去即将被覆盖的最旧数据
+        if self.count == self.size:
+            self.sum_x -= values[i]
+            self.sum_y -= values[i + 1]
+            self.sum_z -= values[i + 2]
+        else:
+            self.count += 1
+        
+        # 写入新数据（累加存进缓冲区后的值，减去时才能完全抵消）
+        values[i] = x
+        values[i + 1] = y
+        values[i + 2] = z
+        self.sum_x += values[i]
+        self.sum_y += values[i + 1]
+        self.sum_z += values[i + 2]
+        
+        i += 3
+        self.index = 0 if i == len(values) else i
+    
+    def reset(self):
+        """重置滤波器（清空历史数据）"""
+        self.index = 0
+        self.count = 0
+        self.sum_x = 0
+        self.sum_y = 0
+        self.sum_z = 0
+
+
+class ShakeDetector:
+    """Filter plus shake state machine: angle > threshold, sustained for duration"""
+
+    def __init__(self, threshold=30, duration=0.2, window=5):
+        self.threshold = threshold
+        self.duration = duration
+        # size=window: 使用最近几个读数的平均值（直接对 ADXL345 原始读数滤波）
+        self.filter = MovingAverageFilter(size=window, typecode="h")
+        self.tilt = TiltDetector(threshold)
+        self.start_time = None
+        self.is_shaking = False
+
+    def reset(self):
+        """Reset shake detection state and the filter"""
+        self.start_time = None
+        self.is_shaking = False
+        # 开始检测摇晃时重置滤波器，避免之前的数据影响
+        self.filter.reset()
+
+    def check(self, angle_x, angle_y, current_time):
+        """Detect shake from angles - angle > threshold, sustained for duration"""
+        threshold = self.threshold
+        return self.update(abs(angle_x) > threshold or abs(angle_y) > threshold, current_time)
+
+    def update(self, angle_exceeded, current_time):
+        """Shake state machine - True once the tilt has lasted duration"""
+        if angle_exceeded:
+            if self.start_time is None:
+                # First time exceeding the threshold, record start time
+                self.start_time = current_time
+            elif current_time - self.start_time >= self.duration:
+                # Exceeded long enough, shake detected
+                if not self.is_shaking:
+                    self.is_shaking = True
+                    return True
+        else:
+            # Angle returns below the threshold, reset state
+            self.start_time = None
+            self.is_shaking = False
+        return False
+
+    def detect(self, samples, count, end_time, period):
+        """Filter a batch of raw FIFO samples; return the time of the sample that completed a shake, or None"""
+        accel_filter = self.filter
+        add_sample = accel_filter.add
+        exceeded = self.tilt.exceeded
+        # The last sample was taken at end_time, the others one period apart
+        sample_time = end_time - (count - 1) * period
+        for j in range(0, 3 * count, 3):
+            add_sample(samples[j], samples[j + 1], samples[j + 2])
+            # Window sums have the same angles as the averages: integer math only
+            if self.update(exceeded(accel_filter.sum_x, accel_filter.sum_y, accel_filter.sum_z), sample_time):
+                return sample_time
+            sample_time += period
+        return None
+
+    def angles(self):
+        """Exact filtered angles in degrees (for debugging)"""
+        accel_filter = self.filter
+        if not accel_filter.count:
+            return 0.0, 0.0
+        return calculate_angles(accel_filter.sum_x, accel_filter.sum_y, accel_filter.sum_z)
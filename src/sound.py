@@ -0,0 +1,89 @@
+"""
+Non-blocking sound effects
+
+Every sound is rendered once, at boot, into its own buffer of 8-bit
+samples (square wave notes) wrapped in an audiocore.RawSample. play()
+hands that sample to the audio output (audiopwmio.PWMAudioOut on the
+board), which streams it by DMA and stops by itself at the end: no Python
+runs per sample, and play() returns at once.
+
+Sounds overlap only by replacing each other, by priority: a sound that
+asks while a higher priority one is still playing is dropped, anything
+else takes over the output.
+
+Without an audio output (hardware.AUDIO_PIN = None) nothing is rendered
+and play() does nothing.
+"""
+
+# Sound ids
+COUNTDOWN = 0  # Boot countdown, once per number
+GO = 1  # Boot countdown, START
+PROMPT = 2  # New level
+SUCCESS = 3  # Level passed
+TIMEOUT = 4  # Time's up
+SOUND_NAMES = ("countdown", "go", "prompt", "success", "timeout")
+
+# Notes (Hz, seconds) and priority per sound id
+SOUNDS = (
+    (((880, 0.08),), 0),
+    (((1760, 0.25),), 0),
+    (((1320, 0.05),), 1),
+    (((1320, 0.06), (1760, 0.09)), 2),
+    (((440, 0.15), (330, 0.25)), 3),
+)
+
+SAMPLE_RATE = 8000  # Hz; ~8 KB for all sounds
+VOLUME = 0.5  # Square wave amplitude, 0..1 of full scale
+
+
+def render(notes, sample_rate=SAMPLE_RATE, volume=VOLUME):
+    """Unsigned 8-bit square wave samples for a list of (Hz, seconds) notes"""
+    swing = int(127 * volume)
+    high = bytes((128 + swing,))
+    low = bytes((128 - swing,))
+    buffer = bytearray(sum(int(sample_rate * seconds) for _, seconds in notes))
+    start = 0
+    for frequency, seconds in notes:
+        count = int(sample_rate * seconds)
+        period = max(sample_rate // frequency, 2)
+        cycle = high * (period // 2) + low * (period - period // 2)
+        buffer[start:start + count] = (cycle * (count // period + 1))[:count]
+        start += count
+    return buffer
+
+
+class SoundEngine:
+    """Prerendered sounds on a DMA audio output, with priority preemption"""
+
+    def __init__(self, output, sample_rate=SAMPLE_RATE, volume=VOLUME):
+        self.output = output
+        self.samples = ()
+        if output is not None:
+            from audiocore import RawSample
+            self.samples = tuple(RawSample(render(notes, sample_rate, volume), sample_rate=sample_rate)
+                                 for notes, _ in SOUNDS)
+        self._priority = -1  # Priority of the last sound started
+        # Metrics
+        self.played = 0
+        self.dropped = 0
+        self.preempted = 0
+
+    def play(self, sound):
+        """Start a sound unless a higher priority one is still playing"""
+        output = self.output
+        if output is None:
+            return
+        priority = SOUNDS[sound][1]
+        if output.playing:
+            if priority < self._priority:
+                self.dropped += 1
+                return
+            output.stop()
+            self.preempted += 1
+        output.play(self.samples[sound])
+        self._priority = priority
+        self.played += 1
+
+    def stop(self):
+        if self.output is not None:
+            self.output.stop()
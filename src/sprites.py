@@ -0,0 +1,93 @@
+"""
+Guard symbol sprites (triangle, circle, square)
+
+Each symbol is rasterized once into a 1-bit displayio.Bitmap and cached, so
+drawing a symbol is a single TileGrid instead of one vectorio.Circle per
+perimeter pixel. The outlines match the old draw_hollow_* functions: the same
+perimeter points, each stamped with the footprint of a radius-1 circle.
+"""
+import displayio
+import math
+
+TRIANGLE = "triangle"
+CIRCLE = "circle"
+SQUARE = "square"
+
+# Pixels covered by vectorio.Circle(radius=1) around its center
+_DOT = ((0, 0), (-1, 0), (1, 0), (0, -1), (0, 1))
+
+_bitmaps = {}   # (kind, size[, x, y]) -> (bitmap, left offset, top offset)
+_palettes = {}  # color -> 2-color palette with transparent background
+
+
+def symbol_points(kind, size, x, y):
+    """
+    Perimeter points of a symbol centered on (x, y), relative to that center
+
+    size is the height of the triangle, the diameter of the circle or the
+    side of the square. Circle points are rounded on the screen, at (x, y),
+    as the per-pixel drawing did; the other outlines do not depend on it.
+    """
+    points = []
+    half = size // 2
+    if kind == TRIANGLE:
+        top = -half
+        for i in range(size):
+            points.append((-(i // 2), top + i))  # Left edge
+        for i in range(size):
+            points.append((i // 2, top + i))  # Right edge
+        for x in range(-half, half + 1):
+            points.append((x, top + size - 1))  # Bottom edge
+    elif kind == CIRCLE:
+        for angle in range(0, 360, 3):  # A point every 3 degrees
+            rad = angle * math.pi / 180
+            points.append((int(x + half * math.cos(rad)) - x, int(y + half * math.sin(rad)) - y))
+    elif kind == SQUARE:
+        for i in range(size):
+            points.append((i - half, -half))  # Top edge
+            points.append((i - half, size - 1 - half))  # Bottom edge
+            points.append((-half, i - half))  # Left edge
+            points.append((size - 1 - half, i - half))  # Right edge
+    else:
+        raise ValueError("Unknown symbol: " + kind)
+    return points
+
+
+def symbol_bitmap(kind, size, x, y):
+    """Return (bitmap, left, top) for a symbol centered on (x, y), rasterizing it on first use"""
+    key = (kind, size, x, y) if kind == CIRCLE else (kind, size)  # Circles round at their center
+    cached = _bitmaps.get(key)
+    if cached is None:
+        pixels = set()
+        for px, py in symbol_points(kind, size, x, y):
+            for dx, dy in _DOT:
+                pixels.add((px + dx, py + dy))
+        left = min(p[0] for p in pixels)
+        top = min(p[1] for p in pixels)
+        width = max(p[0] for p in pixels) - left + 1
+        height = max(p[1] for p in pixels) - top + 1
+        bitmap = displayio.Bitmap(width, height, 2)
+        for px, py in pixels:
+            bitmap[px - left, py - top] = 1
+        cached = (bitmap, left, top)
+        _bitmaps[key] = cached
+    return cached
+
+
+def symbol_palette(color=0xFFFFFF):
+    """Shared 1-bit palette: index 0 transparent, index 1 the given color"""
+    palette = _palettes.get(color)
+    if palette is None:
+        palette = displayio.Palette(2)
+        palette[0] = 0x000000
+        palette[1] = color
+        palette.make_transparent(0)
+        _palettes[color] = palette
+    return palette
+
+
+def make_symbol(kind, x, y, size, color=0xFFFFFF):
+    """Create a TileGrid showing a symbol centered on (x, y)"""
+    bitmap, left, top = symbol_bitmap(kind, size, x, y)
+    return displayio.TileGrid(bitmap, pixel_shader=symbol_palette(color),
+                              x=x + left, y=y + top)
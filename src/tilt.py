@@ -0,0 +1,72 @@
+"""
+Tilt detection without trigonometry
+
+The game only needs to know whether the X or Y angle is above a threshold.
+For angle_x = atan2(x, sqrt(y*y + z*z)):
+
+    |angle_x| > T  <=>  x*x * cos(T)^2 > sin(T)^2 * (y*y + z*z)
+
+cos(T)^2 and sin(T)^2 are computed once per threshold as fixed-point
+coefficients (both at most RATIO_SCALE), so each sample costs a few integer
+multiplies and compares. The inputs are raw ADXL345 counts or window sums of
+them (the angles do not depend on scale): while a component is above LIMIT
+the three are halved, which keeps every product below 2^30, inside
+CircuitPython's small ints, even for 32-sample sums at the 16 g full scale.
+Raw counts up to 4 g and 5-sample sums at rest need no halving or one.
+Exact angles are still available from calculate_angles() for debugging.
+"""
+import math
+
+# Fixed-point scale of cos^2 and sin^2
+RATIO_SCALE = 256
+# Largest magnitude squared: 2 * LIMIT^2 * RATIO_SCALE < 2^30
+LIMIT = 1023
+
+
+def calculate_angles(x, y, z):
+    """Calculate X-axis and Y-axis angles"""
+    angle_x = math.atan2(x, math.sqrt(y*y + z*z)) * 180 / math.pi
+    angle_y = math.atan2(y, math.sqrt(x*x + z*z)) * 180 / math.pi
+    return angle_x, angle_y
+
+
+class TiltDetector:
+    """Answers "is |angle_x| or |angle_y| above threshold?" with integer math"""
+
+    def __init__(self, threshold):
+        self.set_threshold(threshold)
+
+    def set_threshold(self, degrees):
+        """Precompute cos(threshold)^2 and sin(threshold)^2 as fixed-point coefficients"""
+        self.threshold = degrees
+        sine = math.sin(degrees * math.pi / 180)
+        self.sin2 = int(sine * sine * RATIO_SCALE + 0.5)
+        self.cos2 = RATIO_SCALE - self.sin2
+
+    def exceeded(self, x, y, z):
+        """True if either tilt angle of (x, y, z) is above the threshold"""
+        while not (-LIMIT <= x <= LIMIT and -LIMIT <= y <= LIMIT and -LIMIT <= z <= LIMIT):
+            x >>= 1
+            y >>= 1
+            z >>= 1
+        xx = x * x
+        yy = y * y
+        zz = z * z
+        cos2 = self.cos2
+        sin2 = self.sin2
+        return xx * cos2 > sin2 * (yy + zz) or yy * cos2 > sin2 * (xx + zz)
+
+    def terms(self, x, y, z):
+        """Both sides of the X and Y comparisons in exceeded(), for tests"""
+        while not (-LIMIT <= x <= LIMIT and -LIMIT <= y <= LIMIT and -LIMIT <= z <= LIMIT):
+            x >>= 1
+            y >>= 1
+            z >>= 1
+        xx = x * x
+        yy = y * y
+        zz = z * z
+        return xx * self.cos2, self.sin2 * (yy + zz), yy * self.cos2, self.sin2 * (xx + zz)
+
+    def angles(self, x, y, z):
+        """Exact angles in degrees, for debugging"""
+        return calculate_angles(x, y, z)
@@ -0,0 +1,38 @@
+"""
+CPython timing of the ring-buffer filter against the original list filter
+
+Not a test (pytest does not collect it); run it directly:
+
+    python tests/bench_filter.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from shake import MovingAverageFilter  # noqa: E402
+from test_filter import ListFilter, readings  # noqa: E402
+
+SAMPLES = 2000
+
+
+def per_sample_ns(make, window, data):
+    def run():
+        filter_ = make(window)
+        for x, y, z in data:
+            filter_.filter(x, y, z)
+    return min(timeit.repeat(run, number=1, repeat=5)) / len(data) * 1e9
+
+
+def main():
+    data = list(readings(SAMPLES, 0))
+    print(f"{'window':>6} {'list ns':>9} {'ring ns':>9} {'speed-up':>9}")
+    for window in (1, 5, 10, 20, 50):
+        old = per_sample_ns(ListFilter, window, data)
+        new = per_sample_ns(MovingAverageFilter, window, data)
+        print(f"{window:>6} {old:>9.0f} {new:>9.0f} {old / new:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
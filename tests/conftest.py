@@ -0,0 +1,38 @@
+"""
+Host tests for the game modules in src/
+
+They run under CPython with the simulator's stand-ins for the CircuitPython
+modules (tools/simulator.py), so no board is needed:
+
+    python -m pytest tests
+"""
+import code  # noqa: F401  The standard library's, before src/code.py (the board entry point) is on the path
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+import simulator  # noqa: E402
+
+simulator.install_stubs()  # displayio, terminalio, label, keypad, ...; puts src/ on sys.path
+
+
+import pytest  # noqa: E402
+
+
+def boot_to_splash(sim, limit=30.0):
+    """Run a simulation until the splash screen is up"""
+    game = sim.game
+    while game.current_state != game.STATE_SPLASH:
+        assert sim.now < limit, "no splash screen"
+        sim.run_for(0.1)
+
+
+@pytest.fixture
+def sim():
+    """A simulated device, booted to the splash screen"""
+    simulation = simulator.Simulation()
+    boot_to_splash(simulation)
+    yield simulation
+    simulation.close()
@@ -0,0 +1,53 @@
+"""Encoder event queue: bounce filter and folding when the queue is full"""
+from encoder_input import QUEUE_SIZE, EncoderInput
+
+
+def drain(encoder):
+    steps = []
+    step = encoder.pop()
+    while step:  # Same loop as inputs.py
+        steps.append(step)
+        step = encoder.pop()
+    return steps
+
+
+def test_quick_reversal_is_bounce():
+    encoder = EncoderInput(None, None, debounce_ms=80)
+    encoder.push(0, 1)
+    encoder.push(20, -1)
+    encoder.push(200, -1)
+    assert drain(encoder) == [1, -1]
+    assert encoder.events_filtered == 1
+
+
+def test_full_queue_folds_into_newest_event():
+    encoder = EncoderInput(None, None, debounce_ms=0)
+    for i in range(QUEUE_SIZE + 5):
+        encoder.push(i * 100, 1)
+    steps = drain(encoder)
+    assert sum(steps) == QUEUE_SIZE + 5
+    assert steps[-1] == 6
+
+
+def test_cancelled_fold_does_not_end_the_drain():
+    encoder = EncoderInput(None, None, debounce_ms=0)
+    for i in range(QUEUE_SIZE - 1):
+        encoder.push(i * 100, 1)
+    encoder.push(5000, -1)  # Newest slot
+    encoder.push(5100, 1)  # Folds to 0
+    # Put the cancelled slot in front of live events
+    for _ in range(QUEUE_SIZE - 1):
+        assert encoder.pop() == 1
+    for i in range(3):
+        encoder.push(6000 + i * 100, 1)
+    assert drain(encoder) == [1, 1, 1]
+    assert encoder.position == QUEUE_SIZE + 2
+
+
+def test_fold_saturates_instead_of_overflowing():
+    encoder = EncoderInput(None, None, debounce_ms=0)
+    for i in range(QUEUE_SIZE + 300):
+        encoder.push(i, 1)
+    steps = drain(encoder)
+    assert steps[-1] == 127
+    assert encoder.events_total == QUEUE_SIZE + 300
@@ -0,0 +1,90 @@
+"""The ring-buffer MovingAverageFilter gives the averages of the original list-based filter"""
+import math
+import random
+
+import pytest
+
+from shake import MovingAverageFilter
+
+
+class ListFilter:
+    """The original filter: append, pop(0) and sum() per sample"""
+
+    def __init__(self, size=5):
+        self.size = size
+        self.reset()
+
+    def filter(self, x, y, z):
+        self.values_x.append(x)
+        self.values_y.append(y)
+        self.values_z.append(z)
+        if len(self.values_x) > self.size:
+            self.values_x.pop(0)
+            self.values_y.pop(0)
+            self.values_z.pop(0)
+        return (sum(self.values_x) / len(self.values_x),
+                sum(self.values_y) / len(self.values_y),
+                sum(self.values_z) / len(self.values_z))
+
+    def reset(self):
+        self.values_x = []
+        self.values_y = []
+        self.values_z = []
+
+
+def readings(count, seed):
+    """Accelerometer-like m/s^2 readings: gravity, tilts and noise"""
+    rng = random.Random(seed)
+    for i in range(count):
+        tilt = math.sin(i / 40) * 1.2
+        yield (9.81 * math.sin(tilt) + rng.gauss(0, 0.5),
+               rng.gauss(0, 0.5),
+               9.81 * math.cos(tilt) + rng.gauss(0, 0.5))
+
+
+def float32(value):
+    return MovingAverageFilter(1).filter(value, 0, 0)[0]
+
+
+@pytest.mark.parametrize("window", [1, 5, 50])
+def test_float_filter_matches_list_filter(window):
+    ring = MovingAverageFilter(window)
+    reference = ListFilter(window)
+    for x, y, z in readings(5000, window):
+        # The ring buffer stores float32: compare against the list filter on the same values,
+        # allowing the running sums' rounding (a few float32 ulps of the readings)
+        expected = reference.filter(float32(x), float32(y), float32(z))
+        for got, want in zip(ring.filter(x, y, z), expected):
+            assert math.isclose(got, want, rel_tol=1e-6, abs_tol=1e-5)
+
+
+@pytest.mark.parametrize("window", [1, 5, 50])
+def test_float_filter_is_within_float32_of_exact_averages(window):
+    ring = MovingAverageFilter(window)
+    reference = ListFilter(window)
+    for x, y, z in readings(5000, window + 100):
+        for got, want in zip(ring.filter(x, y, z), reference.filter(x, y, z)):
+            assert math.isclose(got, want, rel_tol=2 ** -22, abs_tol=1e-5)
+
+
+@pytest.mark.parametrize("window", [1, 5, 50])
+def test_raw_count_filter_is_exact(window):
+    ring = MovingAverageFilter(window, typecode="h")
+    reference = ListFilter(window)
+    rng = random.Random(window)
+    for _ in range(5000):
+        sample = (rng.randint(-512, 512), rng.randint(-512, 512), rng.randint(-512, 512))
+        assert ring.filter(*sample) == reference.filter(*sample)
+
+
+def test_reset_starts_a_new_window():
+    ring = MovingAverageFilter(5)
+    reference = ListFilter(5)
+    samples = list(readings(20, 0))
+    for sample in samples:
+        ring.filter(*sample)
+    ring.reset()
+    for sample in samples[:3]:
+        got = ring.filter(*sample)
+        want = reference.filter(*(float32(value) for value in sample))
+        assert got == pytest.approx(want, rel=1e-6)
@@ -0,0 +1,64 @@
+"""The game HUD is built once and redraws only what changed"""
+import tracemalloc
+
+import simulator
+
+TICK = 0.01  # The game task's period
+
+
+def test_hud_updates_and_allocations_per_second(sim):
+    screens = sim.game.screens
+    built = simulator.Label.constructed
+    hud = screens.GameHUD(10)
+    renderer = sim.game.renderer
+    calls = []
+    set_text = renderer.set_text
+    renderer.set_text = lambda text_label, text: (calls.append(text_label), set_text(text_label, text))
+
+    # Ten seconds of a level counting down, driven at the game's tick
+    seconds = 10
+    ticks = int(seconds / TICK)
+    tracemalloc.start()
+    try:
+        for i in range(ticks):
+            if i == 100:
+                # Steady state: everything after the first second
+                base, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+            hud.set_level(3)
+            hud.set_action("TAP")
+            hud.set_time(12.0 - i * TICK)
+            hud.set_score(20)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    time_updates = calls.count(hud.time_label)
+    assert time_updates <= 10 * seconds + 1  # 0.1 s resolution
+    assert calls.count(hud.level_label) == calls.count(hud.action_label) == calls.count(hud.score_label) == 1
+    assert simulator.Label.constructed == built + 4  # Only the HUD's own labels
+    # Only the time text is formatted, ten times a second: nothing is kept and
+    # the transient allocations stay tiny
+    assert current - base < 1024
+    assert peak - base < 4096
+
+
+def test_game_screen_refreshes_per_second(sim):
+    game = sim.game
+    display = sim.backend.display
+    sim.apply("click")  # Difficulty selection
+    sim.run_for(0.3)
+    sim.apply("click")  # Game
+    sim.run_for(0.3)
+    assert game.current_state == game.STATE_GAME_PLAY
+    built = simulator.Label.constructed
+
+    # No input: the level counts down to a timeout
+    refreshes = display.refreshes
+    start = sim.now
+    while game.current_state == game.STATE_GAME_PLAY and not game.time_remaining <= 0:
+        sim.run_for(0.1)
+    seconds = sim.now - start
+    assert seconds > 1
+    assert display.refreshes - refreshes <= seconds * 20 + 1  # Renderer FPS cap
+    assert simulator.Label.constructed == built
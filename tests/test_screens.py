@@ -0,0 +1,40 @@
+"""Screens are built once: after every screen has been shown, no Label is constructed again"""
+import simulator
+
+
+def wait_for(sim, state, limit=30.0):
+    game = sim.game
+    end = sim.now + limit
+    while game.current_state != state:
+        assert sim.now < end, f"state {state} not reached"
+        sim.run_for(0.05)
+
+
+def visit_every_screen(sim, detents):
+    game = sim.game
+    sim.apply("rotate", 1)  # High scores
+    wait_for(sim, game.STATE_STATS)
+    sim.run_for(0.2)
+    sim.apply("rotate", 1)  # Back to the splash screen
+    wait_for(sim, game.STATE_SPLASH)
+    sim.run_for(0.2)
+    sim.apply("click")
+    wait_for(sim, game.STATE_DIFFICULTY_SELECT)
+    sim.apply("rotate", detents)
+    sim.run_for(detents * 0.01 + 0.3)
+    sim.apply("click")
+    wait_for(sim, game.STATE_GAME_PLAY)
+    wait_for(sim, game.STATE_GAME_RESULT)  # No input: time runs out
+    sim.run_for(1.2)  # Result screen debounce
+    sim.apply("rotate", 1)  # Menu
+    wait_for(sim, game.STATE_SPLASH)
+    sim.run_for(0.2)
+
+
+def test_no_labels_built_after_warm_up(sim):
+    visit_every_screen(sim, 3)
+    built = simulator.Label.constructed
+    for _ in range(2):
+        visit_every_screen(sim, 39)
+    assert simulator.Label.constructed == built
+    assert sim.backend.display.root_group_sets > 10
@@ -0,0 +1,77 @@
+"""A replayed session logs the same events at the same times as the recording"""
+import asyncio
+
+import microcontroller
+import pytest
+
+import simulator
+
+
+def collect_events(sim):
+    """Event log lines (#time,level,event,args) the game prints from now on"""
+    lines = []
+
+    def collect(line, *args, **kwargs):
+        if line.startswith("#"):
+            lines.append(line)
+
+    sim.game.eventlog.print = collect
+    return lines
+
+
+def record(path, seed, games):
+    sim = simulator.Simulation(seed=seed, session_mode="record", session_path=path)
+    events = collect_events(sim)
+    player = simulator.AutoPlayer(sim, games, jitter=0.1, miss_rate=0.02)
+    sim.loop.run_until_complete(player.run())
+    sim.game.session_recorder.flush()
+    sim.game.event_log.drain(sim.game.event_log.size)
+    sim.close()
+    return events
+
+
+def replay(path):
+    sim = simulator.Simulation(session_mode="replay", session_path=path)
+    events = collect_events(sim)
+    sim.loop.run_until_complete(simulator.SessionReplay(sim).run())
+    sim.close()
+    return events
+
+
+@pytest.mark.parametrize("seed", [4, 7])
+def test_replay_matches_recording(tmp_path, seed):
+    path = str(tmp_path / "session.bin")
+    nvm = bytes(microcontroller.nvm)
+    recorded = record(path, seed, 2)
+    microcontroller.nvm[:] = nvm  # Same high score table as the recording started with
+    replayed = replay(path)
+    assert len(recorded) > 40
+    assert not any(line.startswith("#dropped") for line in recorded)
+    # The replay keeps running a little after the last record
+    assert replayed[:len(recorded)] == recorded
+
+
+def test_virtual_clock_ties_do_not_depend_on_other_timers():
+    """Tasks due at the same time run in scheduling order, whatever timers ran before"""
+    def run(extra):
+        clock = simulator.VirtualClock()
+        loop = simulator.VirtualTimeLoop(clock)
+        order = []
+
+        async def task(name, period):
+            for _ in range(50):
+                order.append((clock.monotonic_ns(), name))
+                await asyncio.sleep(period)
+
+        async def other():
+            for _ in range(2000):
+                await asyncio.sleep(0.0003)
+
+        tasks = [loop.create_task(task("render", 0.01)), loop.create_task(task("input", 0.005))]
+        if extra:
+            tasks.append(loop.create_task(other()))
+        loop.run_until_complete(asyncio.gather(*tasks))
+        loop.close()
+        return order
+
+    assert run(True) == run(False)
@@ -0,0 +1,81 @@
+"""Cached symbol sprites draw the same pixels as the old per-point vectorio drawing"""
+import math
+
+import pytest
+
+import sprites
+
+# Pixels covered by vectorio.Circle(radius=1) around its center
+DOT = ((0, 0), (-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+# The original draw_hollow_* functions, collecting dot centers instead of vectorio shapes
+
+def draw_hollow_triangle(x_center, y_top, size):
+    points = []
+    for i in range(size):
+        points.append((x_center - i // 2, y_top + i))
+    for i in range(size):
+        points.append((x_center + i // 2, y_top + i))
+    bottom_y = y_top + size - 1
+    for x in range(x_center - size // 2, x_center + size // 2 + 1):
+        points.append((x, bottom_y))
+    return points
+
+
+def draw_hollow_circle(x_center, y_center, radius):
+    points = []
+    for angle in range(0, 360, 3):
+        rad = angle * math.pi / 180
+        points.append((int(x_center + radius * math.cos(rad)), int(y_center + radius * math.sin(rad))))
+    return points
+
+
+def draw_hollow_square(x_left, y_top, size):
+    points = []
+    for x in range(x_left, x_left + size):
+        points.append((x, y_top))
+        points.append((x, y_top + size - 1))
+    for y in range(y_top, y_top + size):
+        points.append((x_left, y))
+        points.append((x_left + size - 1, y))
+    return points
+
+
+def reference_pixels(kind, x, y, size):
+    half = size // 2
+    if kind == sprites.TRIANGLE:
+        points = draw_hollow_triangle(x, y - half, size)
+    elif kind == sprites.CIRCLE:
+        points = draw_hollow_circle(x, y, half)
+    else:
+        points = draw_hollow_square(x - half, y - half, size)
+    return {(px + dx, py + dy) for px, py in points for dx, dy in DOT}
+
+
+def sprite_pixels(kind, x, y, size):
+    grid = sprites.make_symbol(kind, x, y, size)
+    bitmap = grid.bitmap
+    return {(grid.x + bx, grid.y + by)
+            for by in range(bitmap.height) for bx in range(bitmap.width) if bitmap[bx, by]}
+
+
+KINDS = (sprites.TRIANGLE, sprites.CIRCLE, sprites.SQUARE)
+
+
+@pytest.mark.parametrize("kind,size", [(sprites.TRIANGLE, 35), (sprites.CIRCLE, 36), (sprites.SQUARE, 36)])
+def test_boot_symbols_match_old_drawing(kind, size):
+    assert sprite_pixels(kind, 64, 32, size) == reference_pixels(kind, 64, 32, size)
+
+
+@pytest.mark.parametrize("kind", KINDS)
+@pytest.mark.parametrize("x,y,size", [(42, 22, 9), (38, 33, 5), (42, 44, 9), (20, 50, 17), (100, 10, 12), (5, 5, 7)])
+def test_symbols_match_old_drawing_anywhere(kind, x, y, size):
+    assert sprite_pixels(kind, x, y, size) == reference_pixels(kind, x, y, size)
+
+
+def test_bitmaps_are_cached():
+    first = sprites.make_symbol(sprites.SQUARE, 42, 22, 9)
+    second = sprites.make_symbol(sprites.SQUARE, 10, 50, 9)
+    assert first.bitmap is second.bitmap
+    assert first.pixel_shader is second.pixel_shader
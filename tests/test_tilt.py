@@ -0,0 +1,73 @@
+"""The integer tilt test agrees with calculate_angles() except right at the threshold"""
+import random
+
+import pytest
+
+from shake import MAX_WINDOW
+from tilt import TiltDetector, calculate_angles
+
+FULL_SCALE = 4096  # Counts: +-16 g at 4 mg per count
+SMALL_INT = 2 ** 30  # CircuitPython's small int limit
+
+TOLERANCE = 0.1  # Degrees: the fixed-point tan^2 ratio may decide differently this close to the threshold
+
+
+# The thresholds shake.load_config() accepts start at ~22 deg; below that the
+# 256 fixed-point scale of tan^2 gets too coarse for this tolerance
+@pytest.mark.parametrize("threshold,count", [(30, 200_000), (23, 50_000), (45, 50_000), (60, 50_000)])
+def test_integer_tilt_matches_angles(threshold, count):
+    detector = TiltDetector(threshold)
+    rng = random.Random(threshold)
+    disagreements = 0
+    for _ in range(count):
+        # Raw ADXL345 counts (4 mg each), up to +-2 g per axis
+        x = rng.randint(-512, 512)
+        y = rng.randint(-512, 512)
+        z = rng.randint(-512, 512)
+        angle_x, angle_y = calculate_angles(x, y, z)
+        exact = abs(angle_x) > threshold or abs(angle_y) > threshold
+        if detector.exceeded(x, y, z) != exact:
+            disagreements += 1
+            nearest = min(abs(abs(angle_x) - threshold), abs(abs(angle_y) - threshold))
+            assert nearest < TOLERANCE, (x, y, z, angle_x, angle_y)
+    assert disagreements < count // 1000
+
+
+@pytest.mark.parametrize("window", [1, 5, 16, 31, MAX_WINDOW])
+def test_products_stay_small_ints(window):
+    """Full-scale window sums never make a long int, and exceeded() uses the same terms"""
+    edge = window * FULL_SCALE
+    corners = [(x, y, z) for x in (-edge, 0, edge - window) for y in (-edge, 0, edge - window)
+               for z in (-edge, 0, edge - window)]
+    rng = random.Random(window)
+    sums = corners + [tuple(rng.randint(-edge, edge - window) for _ in range(3)) for _ in range(20_000)]
+    for threshold in (23, 45, 89.9):
+        detector = TiltDetector(threshold)
+        for x, y, z in sums:
+            terms = detector.terms(x, y, z)
+            assert max(terms) < SMALL_INT, (x, y, z)
+            assert detector.exceeded(x, y, z) == (terms[0] > terms[1] or terms[2] > terms[3])
+
+
+@pytest.mark.parametrize("window", [5, MAX_WINDOW])
+def test_window_sums_match_angles(window):
+    threshold = 30
+    detector = TiltDetector(threshold)
+    rng = random.Random(window)
+    for _ in range(50_000):
+        # A steady reading up to +-2 g, summed over the window
+        x = rng.randint(-512, 512)
+        y = rng.randint(-512, 512)
+        z = rng.randint(-512, 512)
+        angle_x, angle_y = calculate_angles(x, y, z)
+        exact = abs(angle_x) > threshold or abs(angle_y) > threshold
+        if detector.exceeded(window * x, window * y, window * z) != exact:
+            nearest = min(abs(abs(angle_x) - threshold), abs(abs(angle_y) - threshold))
+            assert nearest < TOLERANCE, (x, y, z, angle_x, angle_y)
+
+
+def test_exact_angles_still_available():
+    detector = TiltDetector(30)
+    angle_x, angle_y = detector.angles(250, 0, 0)
+    assert angle_x == pytest.approx(90)
+    assert angle_y == pytest.approx(0)
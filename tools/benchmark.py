@@ -0,0 +1,517 @@
+"""
+Benchmarks for the game loop and its hot functions
+
+Runs the game (src/game.py) under CPython on the simulator's backend and stand-ins
+(tools/simulator.py), so nothing from the board is needed.
+
+State benchmarks hold the game in one state for a few virtual seconds and
+measure the host cost of one tick (GAME_INTERVAL of game time, i.e. every
+task's work in that time):
+- SPLASH, DIFFICULTY_SELECT, GAME_RESULT (idle)
+- GAME_PLAY_<action>: a level waiting for that action with its detector
+  armed; for SHAKE the board is tilted below the threshold, so the FIFO
+  streams but no shake is detected
+
+Microbenchmarks time single calls of the filter, angle and shake code,
+get_time_limit() and the screen builders (first build and revisit).
+
+Allocations are measured with tracemalloc in a separate run: the heap
+growth at the peak of every scheduler pass (or call). For states, the same
+figure for a bare event loop with the game's task periods (LOOP_ONLY) is
+subtracted, which leaves the game's own allocations. CPython allocates
+where MicroPython does not (floats, large ints), so the absolute numbers
+are only a proxy; compare against a baseline made with the same Python on
+the same machine.
+
+Timings are the best of several slices or batches, but the host's speed
+changes from run to run and even within one (load, clock scaling), so raw
+times are only reported. Every slice or batch also runs a fixed pure-Python
+calibration loop just before it, and the comparison uses the best ratio of
+the two (loops_per_tick, loops_per_call). That is not enough on its own:
+the same ratio can differ by a third from one process to the next, so the
+measurements run in --runs separate processes and keep the median ratio,
+with the range between the processes as its spread. A ratio that grew by
+more than --threshold plus the spreads of both runs (the limit column) is
+reported as SLOWER. Allocation figures are nearly exact and compared
+directly, with a tighter threshold. The exit status is 1 if an allocation
+regressed, or with --strict-time also if a time did (for quiet hosts).
+
+Usage:
+    python tools/benchmark.py --output baseline.json
+    python tools/benchmark.py --compare baseline.json
+"""
+import argparse
+import asyncio
+import gc
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import simulator  # noqa: E402
+
+FORMAT_VERSION = 2
+STATE_SECONDS = 4.0  # Virtual seconds measured per state (a level lasts 8 s on EASY)
+STATE_WINDOWS = 8  # Timed slices per state; the fastest one counts (host noise only adds time)
+MICRO_TARGET = 0.02  # Seconds per timing batch
+MICRO_REPEAT = 9
+RUNS = 3  # Separate processes: speed also changes between processes on the same host
+CALIBRATION_RUNS = 3  # Calibration loops per slice or batch; the fastest one counts
+
+# 25 degrees: above the activity threshold (0.375 g), below the 30 degree shake threshold
+LEANING = (simulator.GRAVITY * math.sin(math.radians(25)), 0.0, simulator.GRAVITY * math.cos(math.radians(25)))
+
+
+# ==================== Measurement ====================
+
+def _spin():
+    total = 0
+    for i in range(2000):
+        total += i * i
+    return total
+
+
+def calibration_time():
+    """Seconds for a fixed pure-Python loop: the host's speed right now"""
+    best = None
+    for _ in range(CALIBRATION_RUNS):
+        start = time.perf_counter()
+        _spin()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def best_and_spread(values):
+    """Smallest value and the spread of the others: median / best - 1"""
+    ordered = sorted(values)
+    return ordered[0], ordered[len(ordered) // 2] / ordered[0] - 1
+
+
+def timed_slices(run, count):
+    """Best time of count calls of run(), and the best ratio to the calibration loop with its spread"""
+    times = []
+    ratios = []
+    gc.disable()  # As timeit does: collections land in random slices
+    for _ in range(count):
+        calibration = calibration_time()
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        times.append(elapsed)
+        ratios.append(elapsed / calibration)
+    gc.enable()
+    ratio, spread = best_and_spread(ratios)
+    return min(times), ratio, spread
+
+
+class PassMeter:
+    """Heap growth at the peak of every scheduler pass (tracemalloc)"""
+
+    def __init__(self, selector):
+        self.bytes = 0
+        self._base = 0
+        self._select = selector.select
+        selector.select = self.select
+
+    def select(self, timeout=None):
+        current, peak = tracemalloc.get_traced_memory()
+        self.bytes += peak - self._base
+        result = self._select(timeout)
+        tracemalloc.reset_peak()
+        self._base = tracemalloc.get_traced_memory()[0]
+        return result
+
+
+class StateRun:
+    """Drives one simulated game through every state and measures each"""
+
+    def __init__(self, seconds, trace_alloc):
+        self.seconds = seconds
+        self.trace_alloc = trace_alloc
+        self.sim = simulator.Simulation(seed=1)
+        self.game = self.sim.game
+        self.results = {}
+        self.meter = None
+        if trace_alloc:
+            tracemalloc.start()
+            self.meter = PassMeter(self.sim.loop._selector)
+
+    def measure(self, name):
+        sim = self.sim
+        ticks = self.seconds / self.game.GAME_INTERVAL
+        if self.meter is not None:
+            self.meter.bytes = 0
+            sim.run_for(self.seconds)
+            self.results[name] = {"alloc_bytes_per_tick": self.meter.bytes / ticks}
+            return
+        passes = sim.loop.passes
+        window = self.seconds / STATE_WINDOWS
+        best, ratio, spread = timed_slices(lambda: sim.run_for(window), STATE_WINDOWS)
+        per_tick = best / (window / self.game.GAME_INTERVAL)
+        self.results[name] = {
+            "ticks_per_s": 1 / per_tick,
+            "us_per_tick": per_tick * 1e6,
+            "loops_per_tick": ratio / (window / self.game.GAME_INTERVAL),
+            "loops_per_tick_spread": spread,
+            "passes_per_tick": (sim.loop.passes - passes) / ticks,
+        }
+
+    def wait_for(self, state, limit=30.0):
+        game = self.game
+        end = self.sim.now + limit
+        while game.current_state != state:
+            if self.sim.now > end:
+                raise RuntimeError(f"game did not reach state {state}")
+            self.sim.run_for(0.1)
+
+    def click(self):
+        self.sim.apply("click")
+        self.sim.run_for(0.1)
+
+    def run(self):
+        game = self.game
+        self.wait_for(game.STATE_SPLASH)
+        self.measure("SPLASH")
+        self.click()
+        self.wait_for(game.STATE_DIFFICULTY_SELECT)
+        self.measure("DIFFICULTY_SELECT")
+
+        # One level per action: EASY level 1 gives 8 s, enough to measure before the timeout
+        for action in game.actions:
+            sequence = game.combos.SINGLES[action]
+            game.choose_sequence = lambda sequence=sequence: sequence
+            self.click()
+            self.wait_for(game.STATE_GAME_PLAY)
+            if action == game.inputbus.SHAKE:
+                self.sim.apply("accel", LEANING)
+            self.measure("GAME_PLAY_" + game.inputbus.ACTION_NAMES[action])
+            self.sim.apply("accel", simulator.FLAT)
+            self.wait_for(game.STATE_GAME_RESULT)
+            if "GAME_RESULT" not in self.results:
+                self.measure("GAME_RESULT")
+            self.sim.run_for(1.1)  # Result screen ignores input for 1 s
+        return self.results
+
+    def close(self):
+        if self.trace_alloc:
+            tracemalloc.stop()
+        self.sim.close()
+
+
+def loop_reference(seconds, game):
+    """Cost of the event loop alone: idle tasks with the game's periods"""
+    intervals = (game.INPUT_INTERVAL, game.RENDER_INTERVAL, game.LED_INTERVAL, 0.1,
+                 game.LOG_INTERVAL, game.GAME_INTERVAL)
+
+    async def idle(interval):
+        while True:
+            await asyncio.sleep(interval)
+
+    async def tasks():
+        await asyncio.gather(*(idle(interval) for interval in intervals))
+
+    results = {}
+    ticks = seconds / game.GAME_INTERVAL
+    for trace_alloc in (False, True):
+        clock = simulator.VirtualClock()
+        loop = simulator.VirtualTimeLoop(clock)
+        main = loop.create_task(tasks())
+        loop.run_until_complete(asyncio.sleep(1))  # Settle
+        if trace_alloc:
+            tracemalloc.start()
+            meter = PassMeter(loop._selector)
+            loop.run_until_complete(asyncio.sleep(seconds))
+            results["alloc_bytes_per_tick"] = meter.bytes / ticks
+            tracemalloc.stop()
+        else:
+            passes = loop.passes
+            window = seconds / STATE_WINDOWS
+            best, ratio, spread = timed_slices(lambda: loop.run_until_complete(asyncio.sleep(window)),
+                                               STATE_WINDOWS)
+            per_tick = best / (window / game.GAME_INTERVAL)
+            results.update(ticks_per_s=1 / per_tick, us_per_tick=per_tick * 1e6,
+                           loops_per_tick=ratio / (window / game.GAME_INTERVAL), loops_per_tick_spread=spread,
+                           passes_per_tick=(loop.passes - passes) / ticks)
+        main.cancel()
+        try:
+            loop.run_until_complete(main)
+        except asyncio.CancelledError:
+            pass
+        loop.close()
+    return results
+
+
+def run_states(seconds):
+    results = {}
+    for trace_alloc in (False, True):
+        run = StateRun(seconds, trace_alloc)
+        try:
+            for name, values in run.run().items():
+                results.setdefault(name, {}).update(values)
+        finally:
+            game = run.game
+            run.close()
+    reference = loop_reference(seconds, game)
+    for values in results.values():
+        values["alloc_bytes_per_tick"] = max(values["alloc_bytes_per_tick"] - reference["alloc_bytes_per_tick"], 0.0)
+    results["LOOP_ONLY"] = reference
+    return results
+
+
+# ==================== Microbenchmarks ====================
+
+def micro_cases(game):
+    """(name, function) pairs; the game must have booted (labels loaded)"""
+    import shake
+    screens = game.screens
+    detector = game.shake_detector
+    moving_average = shake.MovingAverageFilter(size=5, typecode="h")
+    samples = array("h", [60, -20, 240] * 8)
+    combo = game.combos.COMBOS[0].steps
+
+    def check_shake():
+        detector.check(12.5, -4.0, 10.0)
+
+    def detect_shake():
+        detector.detect(samples, 8, 10.0, 0.005)
+
+    def build(name, builder, *args):
+        def case():
+            setattr(screens, name, None)
+            builder(*args)
+        return case
+
+    return [
+        ("MovingAverageFilter.filter", lambda: moving_average.filter(60, -20, 240)),
+        ("calculate_angles", lambda: shake.calculate_angles(60, -20, 240)),
+        ("TiltDetector.exceeded", lambda: detector.tilt.exceeded(300, -100, 1200)),
+        ("check_shake", check_shake),
+        ("detect_shake[8]", detect_shake),
+        ("get_time_limit", lambda: game.get_time_limit(1, 5, combo)),
+        ("get_time_limit[ADAPTIVE]", lambda: game.get_time_limit(3, 5, combo)),
+        ("create_splash_screen", screens.create_splash_screen),
+        ("create_splash_screen[build]", build("splash_screen", screens.create_splash_screen)),
+        ("create_difficulty_screen", lambda: screens.create_difficulty_screen(1)),
+        ("create_difficulty_screen[build]", build("difficulty_screen", screens.create_difficulty_screen, 1)),
+        ("create_game_screen", game.create_game_screen),
+        ("create_game_screen[build]", build("game_hud", game.create_game_screen)),
+        ("create_result_screen", lambda: screens.create_result_screen(False, 50)),
+        ("create_result_screen[build]", build("result_screen", screens.create_result_screen, False, 50)),
+        ("create_stats_screen", screens.create_stats_screen),
+        ("create_stats_screen[build]", build("stats_screen", screens.create_stats_screen)),
+    ]
+
+
+def time_call(function, repeat):
+    """
+    Best-of-repeat time per call in ns, and per call in calibration loops
+    with its spread (batch size calibrated to MICRO_TARGET)
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MICRO_TARGET / 10 or number >= 1 << 20:
+            break
+        number *= 10
+    number = max(1, int(number * MICRO_TARGET / max(elapsed, 1e-9)))
+
+    def batch():
+        for _ in range(number):
+            function()
+
+    best, ratio, spread = timed_slices(batch, repeat)
+    return best / number * 1e9, ratio / number, spread
+
+
+def alloc_call(function, calls=50):
+    """Largest heap growth during one call, in bytes"""
+    function()  # Warm up caches and first-use imports
+    tracemalloc.start()
+    worst = 0
+    for _ in range(calls):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        function()
+        worst = max(worst, tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    return worst
+
+
+def run_micro(repeat):
+    sim = simulator.Simulation(seed=1)
+    try:
+        while sim.game.current_state != sim.game.STATE_SPLASH:
+            sim.run_for(0.1)
+        results = {}
+        for name, function in micro_cases(sim.game):
+            ns, loops, spread = time_call(function, repeat)
+            results[name] = {"ns_per_call": ns, "loops_per_call": loops, "loops_per_call_spread": spread,
+                             "alloc_bytes_per_call": alloc_call(function)}
+        return results
+    finally:
+        sim.close()
+
+
+# ==================== Runs ====================
+
+def measure(args):
+    """One run in this process"""
+    results = {
+        "version": FORMAT_VERSION,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "runs": 1,
+        "states": {},
+        "micro": {},
+    }
+    if args.only != "micro":
+        results["states"] = run_states(args.seconds)
+    if args.only != "states":
+        results["micro"] = run_micro(args.repeat)
+    return results
+
+
+def measure_runs(args):
+    """args.runs runs in separate processes, merged: median times, the range between them as spread"""
+    command = [sys.executable, os.path.abspath(__file__), "--worker", "--seconds", str(args.seconds),
+               "--repeat", str(args.repeat)] + (["--only", args.only] if args.only else [])
+    runs = [json.loads(subprocess.run(command, check=True, capture_output=True, text=True).stdout)
+            for _ in range(args.runs)]
+    results = runs[0]  # Allocations are the same in every run
+    for group in ("states", "micro"):
+        for name, values in results[group].items():
+            others = [run[group][name] for run in runs]
+            for raw, loops in (("us_per_tick", "loops_per_tick"), ("ns_per_call", "loops_per_call")):
+                if loops not in values:
+                    continue
+                ratios = sorted(other[loops] for other in others)
+                median = ratios[len(ratios) // 2]
+                values[loops] = median
+                values[loops + "_spread"] = (ratios[-1] - ratios[0]) / median
+                values[raw] = sorted(other[raw] for other in others)[len(others) // 2]
+            if "us_per_tick" in values:
+                values["ticks_per_s"] = 1e6 / values["us_per_tick"]
+    results["runs"] = args.runs
+    return results
+
+
+# ==================== Report and comparison ====================
+
+# Compared metric -> (True if lower is better, True for allocation metrics)
+METRICS = {
+    "loops_per_tick": (True, False),
+    "alloc_bytes_per_tick": (True, True),
+    "loops_per_call": (True, False),
+    "alloc_bytes_per_call": (True, True),
+}
+SHOWN = ("us_per_tick", "alloc_bytes_per_tick", "ns_per_call", "alloc_bytes_per_call")
+
+
+def print_results(results):
+    for group in ("states", "micro"):
+        print(f"\n{group}")
+        for name, values in results[group].items():
+            shown = "  ".join(f"{metric}={values[metric]:10.1f}" for metric in SHOWN if metric in values)
+            print(f"  {name:<32} {shown}")
+
+
+def compare(results, baseline, threshold, alloc_threshold):
+    """
+    Print changes against a baseline; returns the number of allocation
+    regressions and of times reported SLOWER
+
+    Times are compared in calibration loops (the same host speed for both
+    runs), with the threshold widened by the spreads of both.
+    """
+    regressions = 0
+    slower = 0
+    print(f"\n{'benchmark':<34} {'metric':<22} {'baseline':>11} {'now':>11} {'change':>8} {'limit':>7}")
+    for group in ("states", "micro"):
+        for name, values in results[group].items():
+            old = baseline.get(group, {}).get(name)
+            if old is None:
+                print(f"{name:<34} (new)")
+                continue
+            for metric, (lower_is_better, allocation) in METRICS.items():
+                if metric not in values or metric not in old:
+                    continue  # Times in a version 1 baseline have no calibration: not comparable
+                before = old[metric]
+                after = values[metric]
+                if before == 0:
+                    change = 0.0 if after == 0 else math.inf
+                else:
+                    change = (after - before) / before
+                if not lower_is_better:
+                    change = -change
+                limit = alloc_threshold
+                if not allocation:
+                    limit = threshold + old[metric + "_spread"] + values[metric + "_spread"]
+                flag = ""
+                if change > limit:
+                    if allocation:
+                        flag = "  REGRESSION"
+                        regressions += 1
+                    else:
+                        flag = "  SLOWER"
+                        slower += 1
+                elif change < -limit:
+                    flag = "  better"
+                print(f"{name:<34} {metric:<22} {before:11.4g} {after:11.4g} {change:+7.1%} {limit:7.0%}{flag}")
+    return regressions, slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", metavar="PATH", help="write the results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="compare with a baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="relative time change (in calibration loops, beyond the measured spread)"
+                             " reported as SLOWER (default 0.15)")
+    parser.add_argument("--strict-time", action="store_true",
+                        help="exit with status 1 on SLOWER times too (only on a quiet host)")
+    parser.add_argument("--alloc-threshold", type=float, default=0.1,
+                        help="relative allocation change counted as a regression (default 0.1)")
+    parser.add_argument("--seconds", type=float, default=STATE_SECONDS, help="virtual seconds per state")
+    parser.add_argument("--repeat", type=int, default=MICRO_REPEAT, help="timing batches per microbenchmark")
+    parser.add_argument("--only", choices=("states", "micro"), help="run one group only")
+    parser.add_argument("--runs", type=int, default=RUNS, help=f"separate processes to measure in (default {RUNS})")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)  # One run, JSON on stdout
+    args = parser.parse_args()
+
+    if args.worker:
+        json.dump(measure(args), sys.stdout)
+        return
+    results = measure(args) if args.runs <= 1 else measure_runs(args)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"\nwritten to {args.output}")
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if baseline.get("python") != results["python"] or baseline.get("machine") != results["machine"]:
+            print(f"\nnote: baseline from Python {baseline.get('python')} on {baseline.get('machine')}")
+        if baseline.get("version") != FORMAT_VERSION:
+            print("\nnote: baseline in an older format, without calibrated times: only allocations are compared")
+        regressions, slower = compare(results, baseline, args.threshold, args.alloc_threshold)
+        print(f"\n{regressions} allocation regression(s) (+{args.alloc_threshold:.0%}),"
+              f" {slower} slower time(s) (+{args.threshold:.0%} beyond the spread)")
+        if regressions or (args.strict_time and slower):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Build the CIRCUITPY drive contents with the game modules precompiled
+
+code.py and boot.py stay source (CircuitPython only runs those names).
+Every other module in src/ is compiled with mpy-cross, so the board loads
+bytecode at boot instead of parsing and compiling source in RAM. Libraries
+that already ship as .mpy (and library folders) are copied as they are.
+Copy the output folder onto the CIRCUITPY drive, after deleting the
+game's .py modules there (the board would import a .py before an .mpy).
+
+mpy-cross must match the board's CircuitPython major version (download it
+from the CircuitPython releases, or pass --mpy-cross PATH).
+
+--release compiles with mpy-cross -O1: __debug__ is False in the modules,
+so asserts are dropped and the event log compiles down to empty calls
+(src/eventlog.py), with no buffers allocated.
+
+--compare reads serial logs captured after a reset of a source build and
+an .mpy build. It prints the boot times (the game's "Boot:" line) and the
+RAM kept by each boot stage (@M lines, src/membudget.py) side by side.
+It exits with status 1 if a stage is over its budget in any log.
+
+Usage:
+    python tools/build.py                    # build/ with .mpy modules
+    python tools/build.py --release          # .mpy modules without logging and asserts
+    python tools/build.py --source           # build/ with .py modules, for comparison
+    python tools/build.py --compare source.log mpy.log
+"""
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+
+# Run by CircuitPython as source
+ENTRY_POINTS = ("code.py", "boot.py")
+
+_BOOT_LINE = re.compile(r"Boot: imports (\d+) ms, first frame (\d+|-) ms, splash (\d+) ms")
+
+
+def build(output, mpy_cross, source, release=False):
+    if os.path.isdir(output):
+        shutil.rmtree(output)
+    os.makedirs(output)
+    if not source:
+        try:
+            version = subprocess.run([mpy_cross, "--version"], capture_output=True, text=True, check=True)
+        except (OSError, subprocess.CalledProcessError):
+            sys.exit(f"{mpy_cross} not found (pass --mpy-cross PATH, or --source for a source build)")
+        print(version.stdout.strip())
+    compiled = source_bytes = mpy_bytes = 0
+    for name in sorted(os.listdir(SRC)):
+        path = os.path.join(SRC, name)
+        target = os.path.join(output, name)
+        if name == "__pycache__":
+            continue
+        if os.path.isdir(path):
+            shutil.copytree(path, target, ignore=shutil.ignore_patterns("__pycache__"))
+        elif not name.endswith(".py") or name in ENTRY_POINTS or source:
+            shutil.copy2(path, target)
+        else:
+            target = target[:-3] + ".mpy"
+            subprocess.run([mpy_cross, *(["-O1"] if release else []), "-o", target, path], check=True)
+            compiled += 1
+            source_bytes += os.path.getsize(path)
+            mpy_bytes += os.path.getsize(target)
+    if not os.path.isdir(os.path.join(SRC, "asyncio")):
+        print("note: asyncio is not in src/; install it on the board from the library bundle (see README)")
+    if compiled:
+        print(f"compiled {compiled} modules{' (release, -O1)' if release else ''}:"
+              f" {source_bytes} bytes of source -> {mpy_bytes} bytes of .mpy")
+    print(f"output: {output}")
+
+
+def read_log(path):
+    """Boot times (ms) and RAM per stage from a serial log"""
+    boot = None
+    stages = {}  # stage: (used, free, budget)
+    with open(path, encoding="utf-8", errors="replace") as lines:
+        for line in lines:
+            match = _BOOT_LINE.search(line)
+            if match:
+                boot = tuple(None if value == "-" else int(value) for value in match.groups())
+                continue
+            fields = line.strip().split(",")
+            if fields[0] == "@M" and len(fields) == 5:
+                try:
+                    stages[fields[1]] = tuple(int(value) for value in fields[2:])
+                except ValueError:
+                    continue
+    return boot, stages
+
+
+def compare(paths):
+    logs = [(os.path.basename(path), *read_log(path)) for path in paths]
+    width = max(12, *(len(name) for name, _, _ in logs))
+    header = f"{'':<20}" + "".join(f" {name:>{width}}" for name, _, _ in logs)
+
+    print(header)
+    for i, metric in enumerate(("imports ms", "first frame ms", "splash ms")):
+        row = f"{metric:<20}"
+        for _, boot, _ in logs:
+            value = boot[i] if boot and boot[i] is not None else "-"
+            row += f" {value:>{width}}"
+        print(row)
+
+    failed = []
+    stage_names = []
+    for _, _, stages in logs:
+        stage_names.extend(name for name in stages if name not in stage_names)
+    if stage_names:
+        print()
+        print(f"{'RAM kept (bytes)':<20}" + "".join(f" {name:>{width}}" for name, _, _ in logs) + f" {'budget':>8}")
+    for stage in stage_names:
+        row = f"{stage:<20}"
+        budget = -1
+        for name, _, stages in logs:
+            if stage not in stages:
+                row += f" {'-':>{width}}"
+                continue
+            used, free, budget = stages[stage]
+            over = 0 <= budget < used
+            row += f" {str(used) + (' OVER' if over else ''):>{width}}"
+            if over:
+                failed.append(f"{name}: {stage} kept {used} bytes, budget {budget}")
+        print(row + f" {budget if budget >= 0 else '-':>8}")
+    for name, _, stages in logs:
+        if stages:
+            print(f"{name}: {min(free for _, free, _ in stages.values())} bytes free after boot")
+    if not any(stages for _, _, stages in logs):
+        print("\nno @M lines found (CircuitPython prints them at boot, see src/membudget.py)")
+    for message in failed:
+        print("over budget: " + message)
+    return not failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=os.path.join(ROOT, "build"), help="output folder (default: build/)")
+    parser.add_argument("--mpy-cross", default="mpy-cross", help="mpy-cross executable")
+    parser.add_argument("--source", action="store_true", help="copy modules as source instead of compiling")
+    parser.add_argument("--release", action="store_true", help="compile with -O1: no event log, no asserts")
+    parser.add_argument("--compare", nargs="+", metavar="LOG", help="compare boot logs instead of building")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(0 if compare(args.compare) else 1)
+    if args.release and args.source:
+        parser.error("--release compiles the modules; it cannot be combined with --source")
+    build(args.output, args.mpy_cross, args.source, args.release)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+"""
+Calibrate shake detection (threshold, duration, filter window) on recorded traces
+
+Runs the game's shake pipeline (src/shake.py) as vectorized NumPy over
+whole traces:
+
+- moving average over the last `window` raw samples (window sums, partial
+  at the start, as after MovingAverageFilter.reset())
+- tilt test on the sums, scaled to small ints and compared with the
+  firmware's fixed-point cos^2 and sin^2 (src/tilt.py)
+- shake = tilt held for `duration` seconds; the detection time is the
+  sample that completed it
+
+It sweeps every combination of the parameter ranges. For each one it
+reports the detection rate on shake traces, false positives on no-shake
+traces, and the detection latency from the shake onset. The best set is
+written as a JSON file that the game loads at boot (copy it to the
+CIRCUITPY drive as /shake.json; see shake.load_config()). The best set has
+the highest detection rate with no more than --max-false false positives,
+then the lowest p90 latency.
+
+Traces are labelled by folder: TRACES/shake/ and TRACES/noshake/. Each
+trace is one of:
+- a CSV file of raw ADXL345 counts (4 mg per count), one "x,y,z" sample
+  per line, with optional header comments:
+      # rate: 200      sample rate in Hz (default --rate)
+      # onset: 0.85    shake traces: seconds from the first sample to the
+                       start of the movement (default 0)
+- a session file recorded by the game (src/session.py): its FIFO batches,
+  back to back, at the recorded rate, with the onset at the first sample
+
+Only the samples the game saw count: the firmware streams the FIFO once
+the ADXL345's activity interrupt fires (X or Y beyond ~22 deg of tilt,
+sensors.ACTIVITY_THRESHOLD), which is also what a session file holds. The
+sweep therefore starts at shake.MIN_THRESHOLD, the tilt of that gate: a
+filtered tilt above it means a raw sample already crossed the gate, and
+the first drain brings the whole FIFO (32 samples, more than any filter
+window), so CSV traces can be run whole. Lower thresholds are dropped,
+as load_config() would reject them on the board.
+
+Usage:
+    python tools/calibrate_shake.py traces/ --output shake.json
+    python tools/calibrate_shake.py --synthetic --top 20
+"""
+import argparse
+import json
+import math
+import os
+import struct
+import sys
+import time
+import warnings
+
+try:
+    import numpy as np
+except ImportError:
+    sys.exit("calibrate_shake.py needs NumPy (pip install numpy)")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+import session  # noqa: E402
+import shake  # noqa: E402
+import tilt  # noqa: E402
+
+COUNTS_PER_G = 250  # ADXL345 full resolution: 4 mg per count
+
+# Default sweep (threshold degrees, duration seconds, window samples)
+THRESHOLDS = (math.ceil(shake.MIN_THRESHOLD), 60, 1)
+DURATIONS = (0.05, 0.5, 0.01)
+WINDOWS = (1, 16, 1)  # At most shake.MAX_WINDOW
+
+
+class Trace:
+    def __init__(self, name, samples, rate, shake, onset=0.0):
+        self.name = name
+        self.samples = np.asarray(samples, dtype=np.int64).reshape(-1, 3)
+        self.rate = rate
+        self.shake = shake
+        self.onset = onset
+
+
+# ==================== Trace files ====================
+
+def read_csv(path, rate, shake):
+    onset = 0.0
+    samples = []
+    with open(path, encoding="utf-8") as lines:
+        for line in lines:
+            line = line.strip()
+            if line.startswith("#"):
+                key, _, value = line[1:].partition(":")
+                key = key.strip().lower()
+                if key == "rate":
+                    rate = float(value)
+                elif key == "onset":
+                    onset = float(value)
+                continue
+            fields = line.split(",")
+            try:
+                samples.append([int(float(field)) for field in fields[-3:]])
+            except ValueError:
+                continue  # Column header
+    return Trace(os.path.basename(path), samples, rate, shake, onset)
+
+
+def read_session(path, shake):
+    """FIFO batches of a session file, back to back"""
+    with open(path, "rb") as file:
+        data = file.read()
+    if len(data) < session.HEADER_SIZE or data[:4] != session.MAGIC:
+        raise ValueError("not a session file: " + path)
+    rate = struct.unpack_from(session._HEADER, data)[2]
+    samples = []
+    pos = session.HEADER_SIZE
+    while pos + session.RECORD_SIZE <= len(data):
+        kind = struct.unpack_from(session._RECORD, data, pos)[1]
+        pos += session.RECORD_SIZE
+        if kind == session.DETENT:
+            pos += struct.calcsize(session._DETENT)
+        elif kind == session.BUS_UPDATE or kind == session.BUS_WATCH:
+            pos += struct.calcsize(session._BUS)
+        elif kind == session.SAMPLES:
+            count = data[pos]
+            values = struct.unpack_from(f"<{3 * count}h", data, pos + 1)
+            samples.extend(values)
+            pos += 1 + 6 * count
+    return Trace(os.path.basename(path), samples, rate, shake)
+
+
+def read_traces(folder, rate):
+    traces = []
+    for label, shake in (("shake", True), ("noshake", False)):
+        directory = os.path.join(folder, label)
+        if not os.path.isdir(directory):
+            continue
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if name.endswith(".csv"):
+                traces.append(read_csv(path, rate, shake))
+            elif name.endswith(".bin"):
+                traces.append(read_session(path, shake))
+    return [trace for trace in traces if len(trace.samples)]
+
+
+def synthetic_traces(rng, count=60, rate=200):
+    """Hand-held board: shakes (tipped past 30 deg with wobble, for 0.3-0.9 s) and handling noise"""
+    traces = []
+    for i in range(count):
+        n = int(2.5 * rate)
+        t = np.arange(n) / rate
+        noise = rng.normal(0, 6, (n, 3))
+        # Resting slightly off level
+        pitch = np.full(n, rng.uniform(-10, 10))
+        roll = np.full(n, rng.uniform(-10, 10))
+        shake = i % 2 == 0
+        onset = 0.0
+        if shake:
+            onset = rng.uniform(0.3, 1.0)
+            length = rng.uniform(0.3, 0.9)
+            moving = (t >= onset) & (t < onset + length)
+            since = t[moving] - onset
+            # Tip over within ~0.1 s, then wobble around the tipped angle
+            angle = rng.uniform(40, 70) * np.minimum(since / 0.1, 1) * rng.choice((-1, 1))
+            wobble = rng.uniform(5, 20) * np.sin(2 * np.pi * rng.uniform(2, 5) * since)
+            pitch[moving] += angle + wobble
+            noise[moving] += rng.normal(0, 25, (int(moving.sum()), 3))
+        else:
+            # Picking up, putting down, a tap: short spikes and slow tilts below 30 deg
+            for _ in range(rng.integers(1, 4)):
+                start = rng.uniform(0, 2.3)
+                jerk = (t >= start) & (t < start + rng.uniform(0.02, 0.12))
+                noise[jerk] += rng.normal(0, 120, (int(jerk.sum()), 3))
+            pitch += rng.uniform(-20, 20) * np.sin(2 * np.pi * rng.uniform(0.2, 0.8) * t)
+        pitch = np.radians(pitch)
+        roll = np.radians(roll)
+        x = np.sin(pitch)
+        y = np.sin(roll) * np.cos(pitch)
+        z = np.cos(roll) * np.cos(pitch)
+        samples = np.stack((x, y, z), axis=1) * COUNTS_PER_G + noise
+        traces.append(Trace(f"synthetic-{i}", np.round(samples), rate, shake, onset))
+    return traces
+
+
+# ==================== Vectorized pipeline ====================
+
+def tilt_ratios(thresholds):
+    """The firmware's fixed-point (cos^2, sin^2) per threshold (TiltDetector.set_threshold)"""
+    detectors = [tilt.TiltDetector(threshold) for threshold in thresholds]
+    return np.array([(detector.cos2, detector.sin2) for detector in detectors], dtype=np.int64)
+
+
+def scaled_sums(sums):
+    """Window sums halved as TiltDetector.exceeded() does until they fit its small ints"""
+    scaled = sums.copy()
+    large = (np.abs(scaled) > tilt.LIMIT).any(axis=1)
+    while large.any():
+        scaled[large] >>= 1
+        large = (np.abs(scaled) > tilt.LIMIT).any(axis=1)
+    return scaled
+
+
+def window_sums(samples, window):
+    """Moving-window sums per axis, partial while the window fills"""
+    cumulative = np.vstack((np.zeros((1, 3), dtype=np.int64), np.cumsum(samples, axis=0)))
+    end = np.arange(1, len(samples) + 1)
+    start = np.maximum(end - window, 0)
+    return cumulative[end] - cumulative[start]
+
+
+def detections(trace, ratios, steps, windows):
+    """
+    Index of the detecting sample for every (window, threshold, duration),
+    or len(samples) where there is none
+
+    steps are the durations in samples: the state machine fires once
+    current_time - start_time >= duration, i.e. `step` samples after the
+    first tilted one. (With a duration at an exact multiple of the sample
+    period, the board's float time stamps can take one sample more.)
+    """
+    n = len(trace.samples)
+    index = np.arange(n)
+    max_step = int(steps.max())
+    result = np.full((len(windows), len(ratios), len(steps)), n, dtype=np.int64)
+    for w, window in enumerate(windows):
+        sums = scaled_sums(window_sums(trace.samples, window))
+        xx = sums[:, 0] ** 2
+        yy = sums[:, 1] ** 2
+        zz = sums[:, 2] ** 2
+        cos2 = ratios[:, 0, None]
+        sin2 = ratios[:, 1, None]
+        exceeded = (xx * cos2 > sin2 * (yy + zz)) | (yy * cos2 > sin2 * (xx + zz))
+        # Samples since the start of the current tilted run (-1 when not tilted)
+        last_reset = np.maximum.accumulate(np.where(exceeded, -1, index), axis=1)
+        run = index - last_reset - 1
+        # A run passes through every length, so the first sample with run == step is the detection
+        first = np.full((len(ratios), max_step + 1), n, dtype=np.int64)
+        rows, columns = np.nonzero((run >= 0) & (run <= max_step))
+        lengths = run[rows, columns]
+        # nonzero() is row-major, so the first occurrence of a (row, length) key is its earliest sample
+        keys, found = np.unique(rows * (max_step + 1) + lengths, return_index=True)
+        first[keys // (max_step + 1), keys % (max_step + 1)] = columns[found]
+        result[w] = first[:, steps]
+    return result
+
+
+def sweep(traces, thresholds, durations, windows):
+    """Metrics for every (window, threshold, duration)"""
+    ratios = tilt_ratios(thresholds)
+    shape = (len(windows), len(thresholds), len(durations))
+    detected = np.zeros(shape, dtype=np.int64)
+    early = np.zeros(shape, dtype=np.int64)
+    false = np.zeros(shape, dtype=np.int64)
+    latencies = []
+    for trace in traces:
+        steps = np.ceil(np.asarray(durations) * trace.rate - 1e-6).astype(np.int64)
+        found = detections(trace, ratios, steps, windows)
+        hit = found < len(trace.samples)
+        seconds = found / trace.rate
+        if trace.shake:
+            on_time = hit & (seconds >= trace.onset)
+            detected += on_time
+            early += hit & ~on_time
+            latencies.append(np.where(on_time, seconds - trace.onset, np.nan))
+        else:
+            false += hit
+    shakes = sum(trace.shake for trace in traces)
+    quiet = len(traces) - shakes
+    if latencies:
+        latency = np.stack(latencies)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # All-NaN slices: never detected
+            mean = np.nanmean(latency, axis=0)
+            p90 = np.nanpercentile(latency, 90, axis=0)
+    else:
+        mean = p90 = np.full(shape, np.nan)
+    return {
+        "detection": detected / max(shakes, 1),
+        "false": false / max(quiet, 1),
+        "early": early / max(shakes, 1),
+        "latency": mean,
+        "latency_p90": p90,
+    }
+
+
+def rank(metrics, max_false):
+    """Flat indices, best first: detection rate, then p90 latency, then mean latency"""
+    allowed = (metrics["false"] <= max_false) & (metrics["early"] <= max_false)
+    p90 = np.nan_to_num(metrics["latency_p90"], nan=np.inf)
+    mean = np.nan_to_num(metrics["latency"], nan=np.inf)
+    order = np.lexsort((mean.ravel(), p90.ravel(), -metrics["detection"].ravel(), ~allowed.ravel()))
+    return order
+
+
+def _grid(spec):
+    start, stop, step = spec
+    count = int(round((stop - start) / step)) + 1
+    return [round(start + i * step, 6) for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("traces", nargs="?", help="folder with shake/ and noshake/ traces")
+    parser.add_argument("--synthetic", action="store_true", help="use generated traces")
+    parser.add_argument("--rate", type=float, default=200, help="sample rate of CSV traces without a rate header")
+    parser.add_argument("--thresholds", type=float, nargs=3, default=THRESHOLDS, metavar=("FROM", "TO", "STEP"))
+    parser.add_argument("--durations", type=float, nargs=3, default=DURATIONS, metavar=("FROM", "TO", "STEP"))
+    parser.add_argument("--windows", type=int, nargs=3, default=WINDOWS, metavar=("FROM", "TO", "STEP"))
+    parser.add_argument("--max-false", type=float, default=0.0, help="allowed false positive rate")
+    parser.add_argument("--top", type=int, default=10, help="parameter sets to list")
+    parser.add_argument("--current", type=float, nargs=3, default=(30, 0.2, 5),
+                        metavar=("THRESHOLD", "DURATION", "WINDOW"), help="parameters to compare against")
+    parser.add_argument("--output", help="write the best set as JSON (the board's /shake.json)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.traces:
+        traces = read_traces(args.traces, args.rate)
+    elif args.synthetic:
+        traces = synthetic_traces(np.random.default_rng(args.seed))
+    else:
+        parser.error("give a trace folder or --synthetic")
+    shakes = sum(trace.shake for trace in traces)
+    if not shakes or shakes == len(traces):
+        sys.exit("need both shake and noshake traces")
+
+    thresholds = [value for value in _grid(args.thresholds) if value >= shake.MIN_THRESHOLD]
+    if not thresholds:
+        sys.exit(f"thresholds below the activity gate: the board never streams samples under {shake.MIN_THRESHOLD:.1f} deg")
+    durations = _grid(args.durations)
+    windows = [int(window) for window in _grid(args.windows) if 1 <= window <= shake.MAX_WINDOW]
+    combinations = len(thresholds) * len(durations) * len(windows)
+    samples = sum(len(trace.samples) for trace in traces)
+    print(f"traces: {shakes} shake, {len(traces) - shakes} noshake, {samples} samples")
+
+    start = time.perf_counter()
+    metrics = sweep(traces, thresholds, durations, windows)
+    elapsed = time.perf_counter() - start
+    print(f"swept {combinations} parameter sets in {elapsed:.2f} s")
+
+    def row(w, t, d):
+        latency = metrics["latency"][w, t, d]
+        p90 = metrics["latency_p90"][w, t, d]
+        return (f"{thresholds[t]:>6.1f} {durations[d]:>6.2f} {windows[w]:>6}"
+                f" {metrics['detection'][w, t, d]:>7.1%} {metrics['false'][w, t, d]:>7.1%}"
+                f" {metrics['early'][w, t, d]:>7.1%}"
+                f" {latency * 1000 if not math.isnan(latency) else float('nan'):>8.0f}"
+                f" {p90 * 1000 if not math.isnan(p90) else float('nan'):>8.0f}")
+
+    header = f"{'thresh':>6} {'dur':>6} {'window':>6} {'detect':>7} {'false':>7} {'early':>7} {'lat ms':>8} {'p90 ms':>8}"
+    print("\n" + header)
+    order = rank(metrics, args.max_false)
+    shape = metrics["detection"].shape
+    for flat in order[:args.top]:
+        print(row(*np.unravel_index(flat, shape)))
+
+    threshold, duration, window = args.current
+    if threshold in thresholds and duration in durations and int(window) in windows:
+        print("\ncurrent")
+        print(row(windows.index(int(window)), thresholds.index(threshold), durations.index(duration)))
+
+    w, t, d = np.unravel_index(order[0], shape)
+    best = {"threshold": thresholds[t], "duration": durations[d], "window": windows[w]}
+    if metrics["false"][w, t, d] > args.max_false or metrics["early"][w, t, d] > args.max_false:
+        print(f"\nno parameter set stays within --max-false {args.max_false}")
+    if args.output:
+        config = dict(best)
+        config["calibration"] = {
+            "traces": len(traces),
+            "detection": round(float(metrics["detection"][w, t, d]), 4),
+            "false": round(float(metrics["false"][w, t, d]), 4),
+            "latency_p90": round(float(np.nan_to_num(metrics["latency_p90"][w, t, d])), 4),
+        }
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(config, file, indent=1)
+            file.write("\n")
+        print(f"\nwrote {args.output}: {best}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Replay reaction-time traces against the game's time limits (src/difficulty.py)
+
+Plays many games per difficulty mode. Each level draws a random action and
+a reaction time for it from the trace, and the player passes if the
+reaction beats the deadline. The ADAPTIVE engine learns from every level,
+as on the device.
+
+Traces:
+- a serial log from the game (level start / detection records, see
+  src/eventlog.py): reaction = detection time - level start time
+- a CSV file of "action,seconds" lines (action name or 0-3)
+- --synthetic: log-normal reaction times per action
+
+Usage:
+    python tools/difficulty_sim.py --synthetic
+    python tools/difficulty_sim.py serial.log --games 2000
+"""
+import argparse
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+import difficulty  # noqa: E402
+import eventlog  # noqa: E402
+
+ACTION_NAMES = eventlog.ARGUMENT_NAMES["action"]
+MODE_NAMES = eventlog.ARGUMENT_NAMES["difficulty"]
+LEVELS = 10
+
+# --synthetic: median reaction (s) per action, log-normal spread
+SYNTHETIC_MEDIANS = (0.45, 0.35, 0.40, 0.75)
+SYNTHETIC_SIGMA = 0.35
+
+
+def read_trace(path):
+    """Reaction samples per action: list of lists of seconds (None = timed out)"""
+    samples = [[] for _ in ACTION_NAMES]
+    level_start = None  # (ms, action, limit)
+    with open(path, encoding="utf-8", errors="replace") as lines:
+        for line in lines:
+            line = line.strip()
+            if line.startswith("#"):
+                fields = line[1:].split(",")
+                try:
+                    ms, _, event, a, b, c = (int(field) for field in fields)
+                except ValueError:
+                    continue
+                if event == eventlog.LEVEL_START:
+                    level_start = (ms, b, c / 10)
+                elif event == eventlog.ACTION_DETECTED and level_start:
+                    samples[a].append((ms - level_start[0]) / 1000)
+                    level_start = None
+                elif event == eventlog.LEVEL_TIMEOUT and level_start:
+                    samples[level_start[1]].append(None)
+                    level_start = None
+            elif "," in line:
+                action, seconds = line.split(",")[:2]
+                action = action.strip().upper()
+                try:
+                    action = int(action) if action.isdigit() else ACTION_NAMES.index(action)
+                    samples[action].append(float(seconds))
+                except (ValueError, IndexError):
+                    continue  # Other serial output
+    return samples
+
+
+def synthetic_trace(rng, count=500):
+    return [[rng.lognormvariate(math.log(median), SYNTHETIC_SIGMA) for _ in range(count)]
+            for median in SYNTHETIC_MEDIANS]
+
+
+def play(mode, samples, games, rng):
+    """Play games in one mode; returns stats"""
+    actions = [action for action in range(len(ACTION_NAMES)) if samples[action]]
+    engine = difficulty.DifficultyEngine(LEVELS, len(ACTION_NAMES))
+    wins = 0
+    cleared = 0
+    passes_by_level = [0] * LEVELS
+    tries_by_level = [0] * LEVELS
+    deadlines = []
+    slack = []
+    for _ in range(games):
+        for level in range(1, LEVELS + 1):
+            action = rng.choice(actions)
+            limit = engine.time_limit(mode, level, action)
+            reaction = rng.choice(samples[action])
+            deadlines.append(limit)
+            tries_by_level[level - 1] += 1
+            if reaction is not None and reaction <= limit:
+                engine.record(action, reaction)
+                passes_by_level[level - 1] += 1
+                slack.append(limit - reaction)
+                cleared += 1
+            else:
+                engine.record_timeout(action, limit)
+                break
+        else:
+            wins += 1
+    return {
+        "wins": wins / games,
+        "levels": cleared / games,
+        "deadline": sum(deadlines) / len(deadlines),
+        "slack": sum(slack) / len(slack) if slack else 0,
+        "pass_by_level": [p / t if t else 0 for p, t in zip(passes_by_level, tries_by_level)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("trace", nargs="?", help="serial log or action,seconds CSV")
+    parser.add_argument("--synthetic", action="store_true", help="use generated reaction times")
+    parser.add_argument("--games", type=int, default=1000, help="games per mode")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    if args.trace:
+        samples = read_trace(args.trace)
+    elif args.synthetic:
+        samples = synthetic_trace(rng)
+    else:
+        parser.error("give a trace file or --synthetic")
+    for action, name in enumerate(ACTION_NAMES):
+        done = [s for s in samples[action] if s is not None]
+        if samples[action]:
+            print(f"trace {name:<6} n={len(samples[action]):<5} timeouts={len(samples[action]) - len(done):<4}"
+                  f" median={sorted(done)[len(done) // 2] if done else float('nan'):.3f} s")
+    if not any(samples):
+        sys.exit("no reaction times in the trace")
+
+    print(f"\n{'mode':<9} {'wins':>6} {'levels':>7} {'deadline':>9} {'slack':>7}  pass rate by level")
+    for mode, name in enumerate(MODE_NAMES):
+        stats = play(mode, samples, args.games, random.Random(args.seed))
+        by_level = " ".join(f"{rate:4.2f}" for rate in stats["pass_by_level"])
+        print(f"{name:<9} {stats['wins']:6.1%} {stats['levels']:7.2f} {stats['deadline']:8.2f}s"
+              f" {stats['slack']:6.2f}s  {by_level}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Decode the game's compact log records (src/eventlog.py)
+
+Turns "#<ms>,<level>,<event>,<a>,<b>,<c>" lines from a serial log back
+into messages; all other lines are passed through unchanged.
+
+Usage:
+    python tools/logdecode.py serial.log
+    python tools/simulator.py --games 1 --verbose | python tools/logdecode.py
+    python tools/logdecode.py --level WARN serial.log
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+import eventlog  # noqa: E402
+
+
+def decode(line, min_level=0):
+    """Decoded text of one serial line, or None to hide it"""
+    if not line.startswith("#"):
+        return line
+    fields = line[1:].strip().split(",")
+    if fields[0] == "dropped":
+        return f"           !! {fields[1]} log records dropped"
+    try:
+        ms, level, event, a, b, c = (int(field) for field in fields)
+    except ValueError:
+        return line
+    if level < min_level:
+        return None
+    try:
+        text = eventlog.format_record(event, a, b, c)
+    except (IndexError, TypeError):
+        text = f"unknown event {event} ({a}, {b}, {c})"
+    return f"{ms / 1000:10.3f} {eventlog.LEVEL_NAMES[level]:<5} {text}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("log", nargs="?", help="captured serial log (default: stdin)")
+    parser.add_argument("--level", default="DEBUG", choices=eventlog.LEVEL_NAMES, help="lowest level to show")
+    args = parser.parse_args()
+
+    min_level = eventlog.LEVEL_NAMES.index(args.level)
+    lines = open(args.log, encoding="utf-8", errors="replace") if args.log else sys.stdin
+    for line in lines:
+        text = decode(line.rstrip("\n"), min_level)
+        if text is not None:
+            print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1008 @@
+"""
+Host-side simulator for the game in src/ (code.py runs game.py)
+
+Runs the real game code under CPython with:
+- stand-ins for displayio, terminalio and adafruit_display_text.label
+- a simulated backend (encoder, button, OLED, NeoPixels, audio output that
+  records every playback request with its time) installed through
+  hardware.set_backend(), with the real sensor service talking to a
+  register-level ADXL345 model over a simulated I2C bus
+- a virtual clock: asyncio sleeps and time.monotonic() advance instantly,
+  so simulated seconds cost only the Python work done in them
+- scripted input traces and an automatic player
+- session record/replay (src/session.py): --record captures the automatic
+  player's raw inputs, --replay feeds a session file (e.g. one recorded on
+  the board) through the game instead of the player
+- framebuffer capture of the current screen
+
+Usage:
+    python tools/simulator.py --games 100 --reaction 0.3 --seed 1
+    python tools/simulator.py --replay session.bin --verbose
+    python tools/simulator.py --games 1 --sounds
+"""
+import argparse
+import asyncio
+import heapq
+import importlib
+import math
+import os
+import random
+import sys
+import time
+import tracemalloc
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+
+WIDTH = 128
+HEIGHT = 64
+GRAVITY = 9.80665
+
+
+# ==================== Virtual clock ====================
+
+class VirtualClock:
+    """
+    Replacement for the time module used by the game
+
+    Time is counted in whole nanoseconds. A float sum of delays would
+    differ in its last bits depending on the timers the clock stopped at
+    on the way (a player's, say), and so would the order of tasks due at
+    the same time.
+    """
+
+    def __init__(self):
+        self.ns = 0
+
+    @property
+    def now(self):
+        return self.ns / 1_000_000_000
+
+    def advance(self, seconds):
+        self.ns += round(seconds * 1_000_000_000)
+
+    def advance_to(self, when):
+        """Jump to time when (seconds), unless already past it"""
+        self.ns = max(self.ns, round(when * 1_000_000_000))
+
+    def monotonic(self):
+        return self.ns / 1_000_000_000
+
+    def monotonic_ns(self):
+        return self.ns
+
+    def sleep(self, seconds):
+        self.advance(seconds)
+
+
+class _VirtualSelector:
+    """Selector that advances the virtual clock instead of blocking"""
+
+    def __init__(self, selector, clock, loop):
+        self._selector = selector
+        self._clock = clock
+        self._loop = loop
+        self.passes = 0
+
+    def select(self, timeout=None):
+        self.passes += 1
+        if timeout is None:
+            raise RuntimeError("simulation deadlocked: no task is scheduled")
+        if timeout > 0:
+            # Jump to the next timer itself: now + timeout can be off by a
+            # rounding error
+            self._clock.advance_to(self._loop._scheduled[0].when())
+        return self._selector.select(0)
+
+    def __getattr__(self, name):
+        return getattr(self._selector, name)
+
+
+class _OrderedTimer(asyncio.TimerHandle):
+    """Timer handle that keeps scheduling order among timers due at the same time"""
+
+    __slots__ = ("_sequence",)
+
+    def __init__(self, when, callback, args, loop, context, sequence):
+        super().__init__(when, callback, args, loop, context)
+        self._sequence = sequence
+
+    def __lt__(self, other):
+        if self._when != other._when:
+            return self._when < other._when
+        return self._sequence < other._sequence
+
+
+class VirtualTimeLoop(asyncio.SelectorEventLoop):
+    """
+    Event loop whose time is the virtual clock
+
+    Timers due at the same time run in the order they were scheduled (a
+    plain heap would order them by its own history), so the game's tasks
+    interleave the same way whatever else is scheduled, e.g. a player or
+    a session replay.
+    """
+
+    def __init__(self, clock):
+        super().__init__()
+        self.clock = clock
+        self._selector = _VirtualSelector(self._selector, clock, self)
+        self._clock_resolution = 0.5e-9  # Timers due the same nanosecond run together
+        self._timers = 0
+
+    def time(self):
+        return self.clock.now
+
+    def call_at(self, when, callback, *args, context=None):
+        self._check_closed()
+        self._timers += 1
+        timer = _OrderedTimer(when, callback, args, self, context, self._timers)
+        heapq.heappush(self._scheduled, timer)
+        timer._scheduled = True
+        return timer
+
+    @property
+    def passes(self):
+        return self._selector.passes
+
+
+# ==================== displayio stand-ins ====================
+
+class Group(list):
+    def __init__(self, *, scale=1, x=0, y=0):
+        super().__init__()
+        self.scale = scale
+        self.x = x
+        self.y = y
+        self.hidden = False
+
+
+class Bitmap:
+    def __init__(self, width, height, value_count):
+        self.width = width
+        self.height = height
+        self.value_count = value_count
+        self._data = bytearray(width * height)
+
+    def __getitem__(self, xy):
+        x, y = xy
+        return self._data[y * self.width + x]
+
+    def __setitem__(self, xy, value):
+        x, y = xy
+        self._data[y * self.width + x] = value
+
+    def fill(self, value):
+        for i in range(len(self._data)):
+            self._data[i] = value
+
+
+class Palette:
+    def __init__(self, color_count):
+        self._colors = [0] * color_count
+        self._transparent = set()
+
+    def __len__(self):
+        return len(self._colors)
+
+    def __getitem__(self, index):
+        return self._colors[index]
+
+    def __setitem__(self, index, color):
+        self._colors[index] = color
+
+    def make_transparent(self, index):
+        self._transparent.add(index)
+
+    def make_opaque(self, index):
+        self._transparent.discard(index)
+
+    def is_transparent(self, index):
+        return index in self._transparent
+
+
+class TileGrid:
+    def __init__(self, bitmap, *, pixel_shader, x=0, y=0, **kwargs):
+        self.bitmap = bitmap
+        self.pixel_shader = pixel_shader
+        self.x = x
+        self.y = y
+        self.hidden = False
+
+
+class Label:
+    """adafruit_display_text.label.Label stand-in (text is not rasterized)"""
+
+    constructed = 0  # Number of labels built, for allocation checks
+
+    def __init__(self, font, *, text="", x=0, y=0, scale=1, **kwargs):
+        Label.constructed += 1
+        self.font = font
+        self.text = text
+        self.x = x
+        self.y = y
+        self.scale = scale
+        self.hidden = False
+
+
+def install_stubs():
+    """Register the displayio stand-ins as importable modules"""
+    displayio = types.ModuleType("displayio")
+    displayio.Group = Group
+    displayio.Bitmap = Bitmap
+    displayio.Palette = Palette
+    displayio.TileGrid = TileGrid
+    displayio.release_displays = lambda: None
+
+    terminalio = types.ModuleType("terminalio")
+    terminalio.FONT = object()
+
+    text_package = types.ModuleType("adafruit_display_text")
+    text_package.__path__ = []
+    label = types.ModuleType("adafruit_display_text.label")
+    label.Label = Label
+    text_package.label = label
+
+    sys.modules["displayio"] = displayio
+    sys.modules["terminalio"] = terminalio
+    sys.modules["adafruit_display_text"] = text_package
+    sys.modules["adafruit_display_text.label"] = label
+
+    if "microcontroller" not in sys.modules:
+        microcontroller = types.ModuleType("microcontroller")
+        microcontroller.nvm = bytearray(8192)  # ESP32 NVM size; persists across simulations, like the board
+        sys.modules["microcontroller"] = microcontroller
+
+    audiocore = types.ModuleType("audiocore")
+    audiocore.RawSample = RawSample
+    sys.modules["audiocore"] = audiocore
+
+    keypad = types.ModuleType("keypad")
+    keypad.Keys = Keys
+    keypad.Event = KeypadEvent
+    sys.modules["keypad"] = keypad
+    if SRC not in sys.path:
+        sys.path.insert(0, SRC)
+
+
+# ==================== Simulated hardware ====================
+
+class SimButton:
+    """digitalio.DigitalInOut with pull-up: value is False while pressed"""
+
+    def __init__(self):
+        self.value = True
+        self.direction = None
+        self.pull = None
+
+
+class SimADXL345:
+    """
+    Register-level ADXL345 model
+
+    Generates samples at the configured output data rate from the current
+    acceleration (virtual time), keeps a 32-entry FIFO, latches single tap
+    and DC-coupled activity interrupts and drives the INT1 line.
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.registers = bytearray(64)
+        self.registers[0x00] = 0xE5  # DEVID
+        self.registers[0x2C] = 0x0A  # BW_RATE: 100 Hz
+        self.acceleration = (0.0, 0.0, GRAVITY)
+        self.fifo = []
+        self.latched = 0
+        self.transactions = 0
+        self._next_sample = 0.0
+
+    @property
+    def rate(self):
+        return 3200 / 2 ** (0x0F - (self.registers[0x2C] & 0x0F))
+
+    def _counts(self):
+        scale = 0.004 * GRAVITY  # Full resolution: 4 mg per count
+        return tuple(max(-4096, min(4095, round(a / scale))) for a in self.acceleration)
+
+    def _sample(self):
+        now = self.clock.now
+        if not self.registers[0x2D] & 0x08:  # Standby
+            self._next_sample = now
+            return
+        period = 1 / self.rate
+        while self._next_sample <= now:
+            self._next_sample += period
+            sample = self._counts()
+            if self.registers[0x38] & 0xC0:  # FIFO, stream or trigger mode
+                self.fifo.append(sample)
+                if len(self.fifo) > 32:
+                    del self.fifo[0]
+            else:
+                self.fifo = [sample]
+            # DC-coupled activity on the enabled axes (62.5 mg per count)
+            limit = self.registers[0x24] * 0.0625 / 0.004
+            control = self.registers[0x27]
+            for axis, bit in ((0, 0x40), (1, 0x20), (2, 0x10)):
+                if control & bit and abs(sample[axis]) > limit:
+                    self.latched |= 0x10
+
+    def tap(self):
+        self._sample()
+        self.latched |= 0x40
+
+    def int_source(self):
+        source = self.latched
+        if self.fifo:
+            source |= 0x80  # DATA_READY
+        if len(self.fifo) >= (self.registers[0x38] & 0x1F):
+            source |= 0x02  # WATERMARK
+        return source
+
+    @property
+    def int1(self):
+        self._sample()
+        return bool(self.int_source() & self.registers[0x2E] & ~self.registers[0x2F])
+
+    def write(self, data):
+        self.transactions += 1
+        register = data[0]
+        for offset, value in enumerate(data[1:]):
+            self.registers[register + offset] = value
+
+    def read(self, register, buffer):
+        self.transactions += 1
+        self._sample()
+        if register == 0x30:
+            value = self.int_source()
+            self.latched = 0  # Reading INT_SOURCE clears tap/activity
+            buffer[0] = value
+        elif register == 0x39:
+            buffer[0] = len(self.fifo)
+        elif register == 0x32:
+            sample = self.fifo.pop(0) if self.fifo else self._counts()
+            data = b"".join((v & 0xFFFF).to_bytes(2, "little") for v in sample)
+            buffer[:] = data[:len(buffer)]
+        else:
+            buffer[:] = self.registers[register:register + len(buffer)]
+
+
+class SimI2C:
+    """
+    busio.I2C stand-in routing transactions to simulated devices
+
+    Every transaction takes bus time on the virtual clock: 9 clocks per byte
+    (8 bits and the ACK, address byte included) plus start and stop.
+    """
+
+    def __init__(self, devices, clock, frequency=100_000):
+        self.devices = devices
+        self.clock = clock
+        self.frequency = frequency
+        self.transactions = 0
+        self.busy = 0.0  # Seconds of bus time
+        self._locked = False
+
+    def transfer(self, nbytes, restarts=0):
+        """Spend the bus time of nbytes on the wire (address bytes included)"""
+        seconds = (9 * nbytes + 2 + restarts) / self.frequency
+        self.busy += seconds
+        self.clock.advance(seconds)
+
+    def try_lock(self):
+        if self._locked:
+            return False
+        self._locked = True
+        return True
+
+    def unlock(self):
+        self._locked = False
+
+    def writeto(self, address, buffer, *, start=0, end=None):
+        self.transactions += 1
+        data = bytes(buffer[start:end])
+        self.transfer(1 + len(data))
+        self.devices[address].write(data)
+
+    def readfrom_into(self, address, buffer, *, start=0, end=None):
+        raise NotImplementedError("register reads go through writeto_then_readfrom")
+
+    def writeto_then_readfrom(self, address, out_buffer, in_buffer, **kwargs):
+        self.transactions += 1
+        view = memoryview(in_buffer).cast("B")  # Typed buffers take raw bytes
+        data = bytearray(len(view))
+        self.transfer(2 + len(out_buffer) + len(data), restarts=1)
+        self.devices[address].read(out_buffer[0], data)
+        view[:] = data
+
+
+class SimPin:
+    """Input pin whose level comes from a function"""
+
+    def __init__(self, level):
+        self._level = level
+
+    @property
+    def value(self):
+        return self._level()
+
+
+class KeypadEvent:
+    def __init__(self, key_number=0, pressed=True):
+        self.key_number = key_number
+        self.pressed = pressed
+        self.released = not pressed
+        self.timestamp = 0
+
+
+class _KeyEvents:
+    def __init__(self, pins, value_when_pressed):
+        self._pins = pins
+        self._value_when_pressed = value_when_pressed
+        self._last = [False] * len(pins)
+        self._queue = []  # Injected (key_number, pressed, timestamp) edges
+
+    def inject(self, key_number, pressed, timestamp):
+        """Queue an edge as the background scanner would"""
+        self._queue.append((key_number, pressed, timestamp))
+
+    def get_into(self, event):
+        if self._queue:
+            event.key_number, event.pressed, event.timestamp = self._queue.pop(0)
+            event.released = not event.pressed
+            return True
+        # SimPin edges are detected when polled (the real scanner runs in the background)
+        for number, pin in enumerate(self._pins):
+            if not isinstance(pin, SimPin):
+                continue
+            pressed = pin.value == self._value_when_pressed
+            if pressed != self._last[number]:
+                self._last[number] = pressed
+                event.key_number = number
+                event.pressed = pressed
+                event.released = not pressed
+                return True
+        return False
+
+
+class Keys:
+    """keypad.Keys stand-in"""
+
+    def __init__(self, pins, *, value_when_pressed, pull=True, **kwargs):
+        self.events = _KeyEvents(pins, value_when_pressed)
+
+
+def _rgb(color):
+    """Pixel color as an (r, g, b) tuple; pixelbuf also takes 0xRRGGBB ints"""
+    if isinstance(color, int):
+        return (color >> 16 & 0xFF, color >> 8 & 0xFF, color & 0xFF)
+    return tuple(color)
+
+
+class SimPixels:
+    """neopixel.NeoPixel stand-in"""
+
+    # WS2812B: 24 bits of 1.25 us per LED, sent with interrupts off
+    SHOW_SECONDS_PER_PIXEL = 24 * 1.25e-6
+
+    def __init__(self, n=8):
+        self.n = n
+        self.brightness = 0.3
+        self.auto_write = False
+        self._buffer = [(0, 0, 0)] * n
+        self.shown = tuple(self._buffer)
+        self.shows = 0
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, index):
+        return self._buffer[index]
+
+    def __setitem__(self, index, color):
+        self._buffer[index] = _rgb(color)
+
+    def fill(self, color):
+        self._buffer = [_rgb(color)] * self.n
+
+    @property
+    def interrupts_off(self):
+        """Total seconds spent in show() with interrupts disabled"""
+        return self.shows * self.n * self.SHOW_SECONDS_PER_PIXEL
+
+    def show(self):
+        self.shows += 1
+        self.shown = tuple(self._buffer)
+
+
+class RawSample:
+    """audiocore.RawSample stand-in"""
+
+    def __init__(self, buffer, *, channel_count=1, sample_rate=8000, single_buffer=True):
+        self.buffer = buffer
+        self.sample_rate = sample_rate
+
+    @property
+    def duration(self):
+        return len(self.buffer) / self.sample_rate
+
+
+class SimAudio:
+    """
+    audiopwmio.PWMAudioOut stand-in that records playback requests
+
+    plays holds (time, sample) for every play() call; a sample counts as
+    playing until its buffer would have been streamed out.
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.plays = []
+        self._end = 0
+
+    @property
+    def playing(self):
+        return self.clock.monotonic() < self._end
+
+    def play(self, sample, *, loop=False):
+        now = self.clock.monotonic()
+        self.plays.append((now, sample))
+        self._end = math.inf if loop else now + sample.duration
+
+    def stop(self):
+        self._end = 0
+
+
+class SimDisplay:
+    """
+    SSD1306 stand-in with framebuffer capture
+
+    refresh() holds the I2C bus for the push: per damaged page (the
+    renderer's damage, or the whole screen without one) a command
+    transaction setting the column and page range and a data transaction
+    with one byte per column.
+    """
+
+    width = WIDTH
+    height = HEIGHT
+    ADDRESS = 0x3C
+
+    def __init__(self, i2c):
+        self.i2c = i2c
+        self.renderer = None  # Set once the game has one
+        self._root_group = None
+        self.root_group_sets = 0
+        self.auto_refresh = True
+        self.refreshes = 0
+        self.push_time = 0.0
+        self.max_push = 0.0
+
+    @property
+    def root_group(self):
+        return self._root_group
+
+    @root_group.setter
+    def root_group(self, group):
+        self.root_group_sets += 1
+        self._root_group = group
+
+    def refresh(self, *args, **kwargs):
+        self.refreshes += 1
+        i2c = self.i2c
+        if not i2c.try_lock():
+            raise RuntimeError("I2C bus held during a display refresh")
+        start = i2c.busy
+        renderer = self.renderer
+        for page in range(HEIGHT // 8):
+            if renderer is None:
+                columns = WIDTH
+            else:
+                columns = renderer._dirty_max[page] - renderer._dirty_min[page] + 1
+            if columns > 0:
+                i2c.transfer(1 + 1 + 6)  # Control byte, 0x21 c0 c1 0x22 p p
+                i2c.transfer(1 + 1 + columns)  # Control byte, GDDRAM data
+        i2c.unlock()
+        push = i2c.busy - start
+        self.push_time += push
+        self.max_push = max(self.max_push, push)
+        return True
+
+    def texts(self):
+        """Visible label texts of the current screen, in drawing order"""
+        found = []
+        _walk(self._root_group, 0, 0, found, None)
+        return found
+
+    def capture(self):
+        """Render bitmaps of the current screen into a 1-bit framebuffer"""
+        frame = bytearray(WIDTH * HEIGHT)
+        _walk(self._root_group, 0, 0, [], frame)
+        return frame
+
+
+def _walk(node, ox, oy, texts, frame):
+    if node is None or getattr(node, "hidden", False):
+        return
+    if isinstance(node, Group):
+        for child in node:
+            _walk(child, ox + node.x, oy + node.y, texts, frame)
+    elif isinstance(node, Label):
+        texts.append(node.text)
+    elif isinstance(node, TileGrid) and frame is not None:
+        bitmap = node.bitmap
+        palette = node.pixel_shader
+        for by in range(bitmap.height):
+            for bx in range(bitmap.width):
+                index = bitmap[bx, by]
+                if palette.is_transparent(index) or not palette[index]:
+                    continue
+                x = ox + node.x + bx
+                y = oy + node.y + by
+                if 0 <= x < WIDTH and 0 <= y < HEIGHT:
+                    frame[y * WIDTH + x] = 1
+
+
+def frame_to_text(frame):
+    """Render a captured framebuffer as ASCII art"""
+    rows = []
+    for y in range(HEIGHT):
+        rows.append("".join("#" if frame[y * WIDTH + x] else "." for x in range(WIDTH)))
+    return "\n".join(rows)
+
+
+class SimBackend:
+    """Simulated board for hardware.set_backend()"""
+
+    def __init__(self, clock, int_pin=True, i2c_frequency=None):
+        import hardware
+        import sensors
+        from encoder_input import EncoderInput
+        from i2cbus import BusManager
+        self.adxl = SimADXL345(clock)
+        self.i2c = SimI2C({0x53: self.adxl}, clock, i2c_frequency or hardware.I2C_FREQUENCY)
+        self.bus = BusManager(self.i2c, clock)
+        self.display = SimDisplay(self.i2c)
+        # Real decoder on the keypad fallback; edges are injected by Simulation
+        self.encoder = EncoderInput("ENC_A", "ENC_B", use_rotaryio=False)
+        self.button = SimButton()
+        pin = SimPin(lambda: self.adxl.int1) if int_pin else None
+        self.accel_service = sensors.AccelService(self.bus, int_pin=pin)
+        self.pixels = SimPixels()
+        self.audio = SimAudio(clock)
+
+
+# ==================== Simulation ====================
+
+# Modules holding game state, imported fresh for every simulation
+GAME_MODULES = ("game", "screens", "inputs", "shake", "membudget")
+
+
+def load_game(backend, clock, quiet=True, session_mode=None, session_path=None):
+    """Import a fresh copy of the game modules, wired to the given backend and clock"""
+    install_stubs()
+    import hardware
+    import session
+    hardware.set_backend(backend)
+    session.MODE = session_mode
+    if session_path:
+        session.PATH = session_path
+    for name in GAME_MODULES:
+        sys.modules.pop(name, None)  # Module globals are the game state: start clean
+    game = importlib.import_module("game")
+    game.time = clock
+    sys.modules["inputs"].time = clock
+    game.event_log.clock = clock
+    backend.display.renderer = game.renderer
+    for session_io in (game.session_recorder, game.session_player):
+        if session_io is not None:
+            session_io.clock = clock
+    # Boot timings: keep the real import time, then continue on the virtual clock
+    imports_ns = game.boot_imports_ns - game.boot_start_ns
+    game.boot_start_ns = clock.monotonic_ns() - imports_ns
+    game.boot_imports_ns = clock.monotonic_ns()
+    if quiet:
+        game.print = lambda *args, **kwargs: None  # Module globals shadow the builtin
+        game.inputbus.print = game.print
+        game.eventlog.print = game.print
+    return game
+
+
+class Simulation:
+    """
+    One simulated device running the game
+
+    Inputs can be scripted as a trace of (time, event, argument) tuples:
+        ("press", None), ("release", None), ("click", None),
+        ("rotate", steps), ("tap", None), ("accel", (x, y, z))
+    """
+
+    def __init__(self, seed=0, quiet=True, int_pin=True, session_mode=None, session_path=None,
+                 i2c_frequency=None):
+        random.seed(seed)
+        install_stubs()
+        self.clock = VirtualClock()
+        self.backend = SimBackend(self.clock, int_pin, i2c_frequency)
+        self.game = load_game(self.backend, self.clock, quiet, session_mode, session_path)
+        self.loop = VirtualTimeLoop(self.clock)
+        self.main_task = self.loop.create_task(self.game.main())
+
+    def close(self):
+        self.main_task.cancel()
+        try:
+            self.loop.run_until_complete(self.main_task)
+        except asyncio.CancelledError:
+            pass
+        self.loop.close()
+
+    @property
+    def now(self):
+        return self.clock.now
+
+    def run_for(self, seconds):
+        """Advance the simulation by the given number of virtual seconds"""
+        self.loop.run_until_complete(asyncio.sleep(seconds))
+        if self.main_task.done():
+            self.main_task.result()  # Surface crashes in the game
+
+    def run_trace(self, trace, until=None):
+        """Schedule a scripted input trace and run until its last event (or until)"""
+        start = self.clock.now
+        end = start
+        for t, event, argument in trace:
+            self.loop.call_at(start + t, self.apply, event, argument)
+            end = max(end, start + t)
+        self.run_for((until if until is not None else end - start) + 0.05)
+
+    def apply(self, event, argument=None):
+        """Apply one input event to the simulated hardware"""
+        backend = self.backend
+        if event == "press":
+            backend.button.value = False
+        elif event == "release":
+            backend.button.value = True
+        elif event == "click":
+            backend.button.value = False
+            self.loop.call_later(0.05, setattr, backend.button, "value", True)
+        elif event == "rotate":
+            self._rotate(argument)
+        elif event == "tap":
+            backend.adxl.tap()
+        elif event == "accel":
+            backend.adxl._sample()  # Samples up to now use the old value
+            backend.adxl.acceleration = tuple(argument)
+        else:
+            raise ValueError("Unknown event: " + event)
+
+    def _rotate(self, steps, edge_interval=0.002):
+        """Schedule the quadrature edges of the given number of detents"""
+        events = self.backend.encoder._keys.events
+        # Pressed = pin pulled low; clockwise A leads B
+        first, second = (0, 1) if steps > 0 else (1, 0)
+        edges = ((first, True), (second, True), (first, False), (second, False))
+        delay = 0.0
+        for _ in range(abs(steps)):
+            for key_number, pressed in edges:
+                self.loop.call_later(delay, self._inject_edge, events, key_number, pressed)
+                delay += edge_interval
+
+    def _inject_edge(self, events, key_number, pressed):
+        events.inject(key_number, pressed, int(self.clock.now * 1000) & (2 ** 29 - 1))
+
+    def capture(self):
+        return self.backend.display.capture()
+
+
+# ==================== Automatic player ====================
+
+TILTED = (GRAVITY * math.sin(math.radians(50)), 0.0, GRAVITY * math.cos(math.radians(50)))
+FLAT = (0.0, 0.0, GRAVITY)
+
+
+class AutoPlayer:
+    """Plays whole games, answering each prompt after a reaction delay"""
+
+    def __init__(self, sim, games, reaction=0.3, jitter=0.0, miss_rate=0.0):
+        self.sim = sim
+        self.games = games
+        self.reaction = reaction
+        self.jitter = jitter
+        self.miss_rate = miss_rate
+        self.rng = random.Random(1)
+        self.finished = 0
+        self.wins = 0
+        self.latencies = {}  # action -> [seconds from input to detection]
+
+    async def _click(self):
+        self.sim.apply("press")
+        await asyncio.sleep(0.05)
+        self.sim.apply("release")
+
+    def _perform(self, action):
+        sim = self.sim
+        if action == "ROTATE":
+            sim.apply("rotate", 1)
+        elif action == "BUTTON":
+            sim.apply("click")
+        elif action == "TAP":
+            sim.apply("tap")
+        elif action == "SHAKE":
+            sim.apply("accel", TILTED)
+
+    async def run(self):
+        game = self.sim.game
+        seen_prompt = None
+        while self.finished < self.games:
+            state = game.current_state
+            if state == game.STATE_SPLASH or state == game.STATE_DIFFICULTY_SELECT:
+                await self._click()
+                await asyncio.sleep(0.1)
+            elif state == game.STATE_GAME_PLAY:
+                # One prompt per combo step
+                prompt = (game.game_start_time, game.sequence_matcher.index)
+                if prompt == seen_prompt or game.action_completed:
+                    await asyncio.sleep(0.01)
+                    continue
+                seen_prompt = prompt
+                action = game.inputbus.ACTION_NAMES[game.current_action]
+                await asyncio.sleep(max(0.0, self.reaction + self.rng.uniform(-self.jitter, self.jitter)))
+                if self.rng.random() < self.miss_rate or game.current_state != game.STATE_GAME_PLAY:
+                    continue
+                pressed_at = self.sim.now
+                self._perform(action)
+                while not game.action_completed and game.current_state == game.STATE_GAME_PLAY \
+                        and (game.game_start_time, game.sequence_matcher.index) == seen_prompt:
+                    await asyncio.sleep(0.001)
+                if game.action_completed or game.sequence_matcher.index != seen_prompt[1]:
+                    self.latencies.setdefault(action, []).append(self.sim.now - pressed_at)
+                if action == "SHAKE":
+                    self.sim.apply("accel", FLAT)
+            elif state == game.STATE_GAME_RESULT:
+                self.finished += 1
+                if game.score == game.total_levels * 10:
+                    self.wins += 1
+                await asyncio.sleep(1.1)  # Result screen ignores input for 1 s
+                if self.finished < self.games:
+                    await self._click()
+                while game.current_state == game.STATE_GAME_RESULT and self.finished < self.games:
+                    await asyncio.sleep(0.01)
+            else:
+                await asyncio.sleep(0.05)  # Boot animation
+
+
+class SessionReplay:
+    """Runs the game on a recorded session (src/session.py) and counts the outcomes"""
+
+    TAIL = 5.0  # Seconds to keep running after the last record (level end, celebration, result screen)
+
+    def __init__(self, sim):
+        self.sim = sim
+        eventlog = sim.game.eventlog
+        self.counts = [0] * len(eventlog.MESSAGES)
+        printer = getattr(eventlog, "print", print)
+
+        def collect(line, *args, **kwargs):
+            if line.startswith("#") and not line.startswith("#dropped"):
+                self.counts[int(line.split(",")[2])] += 1
+            printer(line, *args, **kwargs)
+
+        eventlog.print = collect
+
+    async def run(self):
+        player = self.sim.game.session_player
+        while not player.done:
+            await asyncio.sleep(0.1)
+        await asyncio.sleep(self.TAIL)
+        self.sim.game.event_log.drain(self.sim.game.event_log.size)
+
+    def count(self, event):
+        return self.counts[event]
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=20, help="games to play")
+    parser.add_argument("--reaction", type=float, default=0.3, help="player reaction time (s)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="reaction time jitter (s)")
+    parser.add_argument("--miss-rate", type=float, default=0.02, help="chance to ignore a prompt")
+    parser.add_argument("--seed", type=int, default=0, help="game RNG seed")
+    parser.add_argument("--alloc", action="store_true", help="track Python allocations")
+    parser.add_argument("--screenshot", action="store_true", help="print the final framebuffer")
+    parser.add_argument("--verbose", action="store_true", help="show the game's serial output")
+    parser.add_argument("--no-int-pin", action="store_true", help="poll the ADXL345 instead of using INT1")
+    parser.add_argument("--profile", action="store_true",
+                        help="enable the game's profiler (telemetry for tools/telemetry.py)")
+    parser.add_argument("--i2c-frequency", type=int, metavar="HZ",
+                        help="I2C clock of the simulated bus (default: hardware.I2C_FREQUENCY)")
+    parser.add_argument("--record", metavar="PATH", help="record the player's raw inputs to a session file")
+    parser.add_argument("--replay", metavar="PATH", help="play a recorded session instead of the automatic player")
+    parser.add_argument("--sounds", action="store_true", help="list every sound played, with its time")
+    args = parser.parse_args()
+
+    session_mode = "replay" if args.replay else "record" if args.record else None
+    sim = Simulation(seed=args.seed, quiet=not args.verbose, int_pin=not args.no_int_pin,
+                     session_mode=session_mode, session_path=args.replay or args.record,
+                     i2c_frequency=args.i2c_frequency)
+    if args.replay:
+        player = SessionReplay(sim)
+    else:
+        player = AutoPlayer(sim, args.games, args.reaction, args.jitter, args.miss_rate)
+    if args.profile:
+        sim.game.set_profiling(True)
+    else:
+        sim.game.bus.set_enabled(True)  # Sensor waits for the summary (no telemetry windows)
+    if args.alloc:
+        tracemalloc.start()
+    start = time.perf_counter()
+    sim.loop.run_until_complete(player.run())
+    wall = time.perf_counter() - start
+    if args.alloc:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    passes = sim.loop.passes
+    backend = sim.backend
+    eventlog = sim.game.eventlog
+    if args.replay:
+        session_player = sim.game.session_player
+        print(f"replay: {session_player.records} records, seed {session_player.seed}"
+              f"  levels passed: {player.count(eventlog.LEVEL_PASSED)}"
+              f"  timeouts: {player.count(eventlog.LEVEL_TIMEOUT)}  wins: {player.count(eventlog.GAME_WON)}")
+    else:
+        print(f"games: {player.finished}  wins: {player.wins}")
+    if args.record:
+        recorder = sim.game.session_recorder
+        recorder.flush()
+        print(f"recorded: {recorder.records} records, {recorder.bytes_written} bytes"
+              f" ({recorder.forced_flushes} forced flushes) to {args.record}")
+    print(f"simulated: {sim.now:.1f} s  wall: {wall:.3f} s  speed-up: {sim.now / wall:.0f}x")
+    print(f"scheduler passes: {passes}  cost: {wall / passes * 1e6:.1f} us/pass")
+    print(f"root_group swaps: {backend.display.root_group_sets}  LED shows: {backend.pixels.shows}"
+          f" ({backend.pixels.interrupts_off * 1000:.1f} ms interrupts off)"
+          f"  ADXL I2C transactions: {backend.adxl.transactions}  labels built: {Label.constructed}")
+    renderer = sim.game.renderer
+    print(f"frames rendered: {renderer.frames_rendered}  skipped: {renderer.frames_skipped}"
+          f"  bytes pushed: {renderer.bytes_pushed}  display refreshes: {backend.display.refreshes}")
+    i2c = backend.i2c
+    display = backend.display
+    print(f"i2c at {i2c.frequency // 1000} kHz: busy {i2c.busy / sim.now:.1%}"
+          f" (display {display.push_time / sim.now:.1%})  push avg"
+          f" {display.push_time / max(display.refreshes, 1) * 1000:.2f} ms max {display.max_push * 1000:.2f} ms", end="")
+    if not args.profile:
+        bus_manager = sim.game.bus
+        print(f"  sensor waits: {bus_manager.waits} max {bus_manager.wait_max_us / 1000:.2f} ms", end="")
+    print()
+    sounds = sim.game.sounds
+    names = sim.game.sound.SOUND_NAMES
+    counts = [0] * len(names)
+    for _, sample in backend.audio.plays:
+        counts[sounds.samples.index(sample)] += 1
+    print(f"sounds played: {sounds.played} ("
+          + ", ".join(f"{name} {count}" for name, count in zip(names, counts) if count)
+          + f")  preempted: {sounds.preempted}  dropped: {sounds.dropped}")
+    if args.sounds:
+        for at, sample in backend.audio.plays:
+            print(f"  {at:9.3f} s  {names[sounds.samples.index(sample)]}")
+    if args.alloc:
+        print(f"python heap: {current / 1024:.1f} KiB live, {peak / 1024:.1f} KiB peak")
+    for action in sorted(getattr(player, "latencies", ())):
+        values = player.latencies[action]
+        print(f"latency {action:<6} n={len(values):<4} avg={sum(values) / len(values) * 1000:6.1f} ms"
+              f"  p99={_percentile(values, 0.99) * 1000:6.1f} ms  max={max(values) * 1000:6.1f} ms")
+    bus = sim.game.input_bus
+    for kind, action in enumerate(sim.game.inputbus.ACTION_NAMES):
+        if bus.samples[kind]:
+            print(f"game    {action:<6} n={bus.samples[kind]:<4} reaction avg={bus.total_ms[kind] / bus.samples[kind]:6.1f} ms"
+                  f"  p90<={bus.percentile(kind, 0.9)} ms  lag<={bus.max_lag_ms[kind]} ms")
+    if args.screenshot:
+        print("\n".join(sim.backend.display.texts()))
+        print(frame_to_text(sim.capture()))
+    sim.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Report from the game's profiling telemetry (src/profiler.py)
+
+Reads a captured serial log (a file, stdin, or a serial port when pyserial
+is installed), keeps the @P/@L telemetry lines and the I2C bus lines
+(@B/@W, src/i2cbus.py) and ignores everything else.
+
+Usage:
+    python tools/telemetry.py serial.log
+    python tools/simulator.py --games 5 --profile | python tools/telemetry.py
+    python tools/telemetry.py --port /dev/ttyACM0 --seconds 30
+"""
+import argparse
+import sys
+import time
+
+
+class SectionStats:
+    def __init__(self):
+        self.windows = 0
+        self.count = 0
+        self.total_us = 0
+        self.min_us = None
+        self.max_us = 0
+        self.p99_us = 0  # Worst window p99
+
+    def add(self, count, avg_us, min_us, max_us, p99_us):
+        self.windows += 1
+        self.count += count
+        self.total_us += count * avg_us
+        self.min_us = min_us if self.min_us is None else min(self.min_us, min_us)
+        self.max_us = max(self.max_us, max_us)
+        self.p99_us = max(self.p99_us, p99_us)
+
+
+class Telemetry:
+    """Aggregates telemetry windows"""
+
+    def __init__(self):
+        self.sections = {}
+        self.loops = []  # (ms, ticks, hz, jitter_avg, jitter_max, late, mem_free)
+        self.bus = {}  # client: [windows, transactions, busy_us, max_hold_us, permille sum, max_permille]
+        self.waits = [0, 0, 0]  # count, total_us, max_us
+        self.ignored = 0
+
+    def feed(self, line):
+        fields = line.strip().split(",")
+        try:
+            if fields[0] == "@P" and len(fields) == 8:
+                stats = self.sections.setdefault(fields[2], SectionStats())
+                stats.add(*(int(value) for value in fields[3:]))
+                return
+            if fields[0] == "@L" and len(fields) == 8:
+                self.loops.append(tuple(int(value) for value in fields[1:]))
+                return
+            if fields[0] == "@B" and len(fields) == 7:
+                transactions, busy, hold, permille = (int(value) for value in fields[3:])
+                stats = self.bus.setdefault(fields[2], [0, 0, 0, 0, 0, 0])
+                stats[0] += 1
+                stats[1] += transactions
+                stats[2] += busy
+                stats[3] = max(stats[3], hold)
+                stats[4] += permille
+                stats[5] = max(stats[5], permille)
+                return
+            if fields[0] == "@W" and len(fields) == 5:
+                count, average, longest = (int(value) for value in fields[2:])
+                self.waits[0] += count
+                self.waits[1] += count * average
+                self.waits[2] = max(self.waits[2], longest)
+                return
+        except ValueError:
+            pass
+        self.ignored += 1
+
+    def report(self):
+        lines = []
+        if not self.sections and not self.loops:
+            return "no telemetry found (type 'p' on the serial console to enable profiling)"
+        lines.append(f"{'section':<8} {'calls':>8} {'avg us':>8} {'min us':>8} {'p99 us':>8} {'max us':>8} {'ms/s':>7}")
+        seconds = _span_seconds(self.loops)
+        for name, stats in sorted(self.sections.items(), key=lambda item: -item[1].total_us):
+            avg = stats.total_us / stats.count if stats.count else 0
+            load = f"{stats.total_us / 1000 / seconds:7.2f}" if seconds else "      -"
+            lines.append(f"{name:<8} {stats.count:>8} {avg:>8.0f} {stats.min_us:>8} "
+                         f"{stats.p99_us:>8} {stats.max_us:>8} {load}")
+        if self.loops:
+            ticks = sum(loop[1] for loop in self.loops)
+            hz = sum(loop[2] * loop[1] for loop in self.loops) / max(ticks, 1)
+            jitter = sum(loop[3] * max(loop[1] - 1, 0) for loop in self.loops) / max(ticks - len(self.loops), 1)
+            jitter_max = max(loop[4] for loop in self.loops)
+            late = sum(loop[5] for loop in self.loops)
+            lines.append("")
+            lines.append(f"game loop: {hz:.1f} Hz over {len(self.loops)} windows, "
+                         f"jitter avg {jitter:.0f} us max {jitter_max} us, {late} late ticks")
+            free = [loop[6] for loop in self.loops if loop[6] >= 0]
+            if free:
+                lines.append(f"mem_free: min {min(free)} B, last {free[-1]} B")
+        if self.bus:
+            lines.append("")
+            lines.append(f"{'i2c':<8} {'transfers':>9} {'busy ms':>8} {'max hold us':>11} {'util':>6} {'peak':>6}")
+            for name, (windows, transactions, busy, hold, total, peak) in self.bus.items():
+                lines.append(f"{name:<8} {transactions:>9} {busy / 1000:>8.1f} {hold:>11}"
+                             f" {total / windows / 10:5.1f}% {peak / 10:5.1f}%")
+            count, total, longest = self.waits
+            average = total / count if count else 0
+            lines.append(f"sensor waits behind display pushes: {count}, avg {average:.0f} us, max {longest} us")
+        return "\n".join(lines)
+
+
+def _span_seconds(loops):
+    if len(loops) < 2:
+        return 0
+    return (loops[-1][0] - loops[0][0]) / 1000
+
+
+def _serial_lines(port, seconds):
+    import serial  # pyserial, only needed for live capture
+    end = time.monotonic() + seconds
+    with serial.Serial(port, 115200, timeout=0.5) as connection:
+        connection.write(b"p")  # Switch profiling on
+        while time.monotonic() < end:
+            yield connection.readline().decode("utf-8", "replace")
+        connection.write(b"p")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("log", nargs="?", help="captured serial log (default: stdin)")
+    parser.add_argument("--port", help="read live from a serial port (needs pyserial)")
+    parser.add_argument("--seconds", type=float, default=20, help="capture time with --port")
+    args = parser.parse_args()
+
+    telemetry = Telemetry()
+    if args.port:
+        lines = _serial_lines(args.port, args.seconds)
+    elif args.log:
+        lines = open(args.log, encoding="utf-8", errors="replace")
+    else:
+        lines = sys.stdin
+    for line in lines:
+        if line.startswith("@"):
+            telemetry.feed(line)
+    print(telemetry.report())
+
+
+if __name__ == "__main__":
+    main()